@@ -1,21 +1,93 @@
 # app.py
+import html
 import streamlit as st
 import sys
+import time
+import uuid
 from pathlib import Path
 
 # Ajout du chemin src
 src_path = Path(__file__).parent / "src"
 sys.path.append(str(src_path))
 
-from chatbot_engine import ChatbotEngine
+from config.settings import APP_CONFIG, MODEL_CONFIG
+from admission_control import get_shared_gate
+from answer_pool import AnswerPool
+from chatbot_engine import get_shared_engine
+from conversation_context import ConversationContext
+from metrics import metrics, start_exporter
 from utils import setup_logging
 
+# Libellés des boutons de questions rapides
+QUICK_SUGGESTIONS = [
+    "Formations proposées",
+    "Comment s'inscrire",
+    "Frais de scolarité",
+    "Prérequis admission",
+    "Nous contacter",
+    "Année de création"
+]
+
+def _render_user_message(question: str) -> str:
+    """HTML d'une question (échappée : saisie libre de l'utilisateur)"""
+    return f"""
+    <div style='text-align: right; margin: 10px; padding: 10px; 
+              background-color: #0078D4; color: white; border-radius: 10px;'>
+        <strong>Vous:</strong> {html.escape(question)}
+    </div>
+    """
+
+def _render_bot_message(response: dict) -> str:
+    """HTML d'une réponse du chatbot"""
+    return f"""
+    <div style='text-align: left; margin: 10px; padding: 10px; 
+              background-color: #F0F2F6; border-radius: 10px;'>
+        <strong>Assistant:</strong> {response['answer']}
+        <br><small>Catégorie: {response['category']} • 
+        Confiance: {response['confidence']:.2f}</small>
+    </div>
+    """
+
+def _render_pending_message() -> str:
+    """HTML d'une réponse en cours de calcul"""
+    return """
+    <div style='text-align: left; margin: 10px; padding: 10px; 
+              background-color: #F0F2F6; border-radius: 10px; opacity: 0.6;'>
+        <strong>Assistant:</strong> ⏳ Recherche de la réponse…
+    </div>
+    """
+
+@st.cache_resource
+def _setup_logging_once():
+    """Affiche les informations réseau une seule fois par processus (et non à chaque réexécution)"""
+    setup_logging()
+    # Export Prometheus (endpoint local et/ou fichier) si les métriques sont activées
+    start_exporter()
+    return True
+
+@st.cache_resource
+def _warm_suggestions(_engine) -> bool:
+    """Précharge dans le cache les réponses des boutons de questions rapides"""
+    _engine.warm_cache(QUICK_SUGGESTIONS)
+    return True
+
+@st.cache_resource
+def _answer_pool(_engine) -> AnswerPool:
+    """Pool de workers partagé par toutes les sessions du processus"""
+    # Porte d'admission commune : débit limité par session, cache seul si saturé
+    return AnswerPool(_engine, APP_CONFIG["answer_workers"], APP_CONFIG["answer_timeout"], get_shared_gate())
+
 class ChatbotApp:
     """Application Streamlit pour le chatbot"""
     
     def __init__(self):
-        setup_logging()
-        self.chatbot = ChatbotEngine()
+        _setup_logging_once()
+        # Moteur en lecture seule partagé entre sessions et réexécutions
+        self.chatbot = get_shared_engine()
+        # Rechargement à chaud après réentraînement, sans redémarrer Streamlit
+        self.chatbot.start_watcher()
+        _warm_suggestions(self.chatbot)
+        self.answers = _answer_pool(self.chatbot)
         self.setup_page()
     
     def setup_page(self):
@@ -29,8 +101,10 @@ class ChatbotApp:
     
     def initialize_session(self):
         """Initialise l'état de la session"""
-        if 'conversation' not in st.session_state:
-            st.session_state.conversation = []
+        if 'session_id' not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
+        if 'transcript' not in st.session_state:
+            self.reset_conversation()
         if 'suggestions' not in st.session_state:
             st.session_state.suggestions = [
                 "Quelles formations proposez-vous ?",
@@ -40,6 +114,23 @@ class ChatbotApp:
                 "Comment vous contacter ?"
             ]
     
+    def reset_conversation(self):
+        """Vide l'historique affiché et le contexte de la session"""
+        # Historique déjà rendu en HTML : chaque message est mis en forme une seule fois
+        st.session_state.transcript = ""
+        st.session_state.exchanges = 0
+        st.session_state.last_confidence = None
+        if st.session_state.get('inflight') is not None:
+            # Réponse en cours de l'ancienne conversation : plus attendue
+            self.answers.abandon(st.session_state.inflight[0])
+        # Questions en attente de réponse (dans l'ordre) et calcul en cours de la première
+        st.session_state.pending = []
+        st.session_state.inflight = None
+        # Contexte de recherche borné (derniers tours seulement)
+        st.session_state.context = ConversationContext(
+            MODEL_CONFIG["context"]["max_turns"], MODEL_CONFIG["context"]["decay"]
+        )
+    
     def display_header(self):
         """Affiche l'en-tête de l'application"""
         st.title("🤖 Chatbot d'Orientation - IFOAD-UJKZ")
@@ -52,43 +143,24 @@ class ChatbotApp:
     def display_conversation(self):
         """Affiche l'historique de conversation"""
         st.markdown("### 💬 Conversation")
-        
-        for i, (question, response, is_user) in enumerate(st.session_state.conversation):
-            if is_user:
-                st.markdown(f"""
-                <div style='text-align: right; margin: 10px; padding: 10px; 
-                          background-color: #0078D4; color: white; border-radius: 10px;'>
-                    <strong>Vous:</strong> {question}
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div style='text-align: left; margin: 10px; padding: 10px; 
-                          background-color: #F0F2F6; border-radius: 10px;'>
-                    <strong>Assistant:</strong> {response['answer']}
-                    <br><small>Catégorie: {response['category']} • 
-                    Confiance: {response['confidence']:.2f}</small>
-                </div>
-                """, unsafe_allow_html=True)
+        # Un seul élément, construit au fil des échanges plutôt qu'à chaque réexécution
+        transcript = st.session_state.transcript + "".join(
+            _render_user_message(question) + _render_pending_message()
+            for question in st.session_state.pending
+        )
+        if transcript:
+            st.markdown(transcript, unsafe_allow_html=True)
     
     def display_suggestions(self):
         """Affiche les questions suggérées"""
         st.markdown("### 💡 Questions rapides")
 
-        cols = st.columns(6)
-        suggestions = [
-            "Formations proposées",
-            "Comment s'inscrire", 
-            "Frais de scolarité",
-            "Prérequis admission",
-            "Nous contacter",
-            "Année de création"
-        ]
+        cols = st.columns(len(QUICK_SUGGESTIONS))
         
-        for i, suggestion in enumerate(suggestions):
+        for i, suggestion in enumerate(QUICK_SUGGESTIONS):
             with cols[i]:
-                if st.button(suggestion, key=f"sugg_{i}"):
-                    self.process_question(suggestion)
+                # Callback : la question est en attente dès l'affichage qui suit le clic
+                st.button(suggestion, key=f"sugg_{i}", on_click=self.process_question, args=(suggestion,))
     
     def display_input(self):
         """Affiche la zone de saisie"""
@@ -97,36 +169,71 @@ class ChatbotApp:
         col1, col2 = st.columns([6, 1])
         
         with col1:
-            user_input = st.text_input(
+            st.text_input(
                 "Votre question:",
                 placeholder="Ex: Quelles sont les conditions d'admission pour la licence ?",
                 key="user_input",
-                on_change=self._handle_enter_key
+                on_change=self._submit_input
             )
         
         with col2:
             st.markdown("<br>", unsafe_allow_html=True)
-            if st.button("Envoyer ↗️") and user_input:
-                self.process_question(user_input)
-                st.session_state.user_input = ""
+            # La saisie ne peut être vidée qu'avant la création du widget : dans un callback
+            st.button("Envoyer ↗️", on_click=self._submit_input)
             
             if st.button("Effacer 🗑️"):
-                st.session_state.conversation = []
+                self.reset_conversation()
                 st.rerun()
     
-    def _handle_enter_key(self):
-        """Gère l'appui sur la touche Entrée"""
+    def _submit_input(self):
+        """Envoie la saisie (touche Entrée ou bouton Envoyer) puis vide la zone de saisie"""
         if st.session_state.user_input:
             self.process_question(st.session_state.user_input)
             st.session_state.user_input = ""
+    
     def process_question(self, question: str):
-        """Traite une question et met à jour la conversation"""
-        response = self.chatbot.get_response(question)
+        """Met une question en attente : la page s'affiche avant que la réponse soit calculée
         
-        # Ajoute la question utilisateur
-        st.session_state.conversation.append((question, None, True))
-        # Ajoute la réponse du chatbot
-        st.session_state.conversation.append(("", response, False))
+        Appelée depuis les callbacks des widgets, où st.rerun() est sans effet :
+        la réexécution qui suit le callback affiche déjà la question en attente.
+        """
+        # Double-clic sur une suggestion : la question attend déjà sa réponse
+        if question in st.session_state.pending:
+            metrics.inc("coalesced_requests")
+            return
+        st.session_state.pending.append(question)
+    
+    def _await_answer(self):
+        """Surveille la réponse à la première question en attente, sans bloquer le script
+        
+        Tant que le calcul n'est ni terminé ni hors délai, la page est
+        réaffichée à intervalle court ; la réponse est ajoutée dès qu'elle est prête.
+        """
+        if not st.session_state.pending:
+            return
+        question = st.session_state.pending[0]
+        if st.session_state.inflight is None:
+            # Une question à la fois par session : le contexte suit l'ordre des tours
+            # (« et pour le master ? » relance la question précédente)
+            future = self.answers.submit(st.session_state.session_id, question, st.session_state.context)
+            st.session_state.inflight = (future, self.answers.deadline())
+        future, deadline = st.session_state.inflight
+        if not self.answers.ready(future, deadline):
+            time.sleep(APP_CONFIG["answer_poll_interval"])
+            st.rerun()
+        response, timed_out = self.answers.result(future, deadline)
+        if timed_out:
+            # Le calcul abandonné écrirait encore dans ce contexte : la session repart d'un contexte vierge
+            st.session_state.context = ConversationContext(
+                MODEL_CONFIG["context"]["max_turns"], MODEL_CONFIG["context"]["decay"]
+            )
+        st.session_state.pending.pop(0)
+        st.session_state.inflight = None
+        
+        # Seuls les nouveaux messages sont mis en forme
+        st.session_state.transcript += _render_user_message(question) + _render_bot_message(response)
+        st.session_state.exchanges += 1
+        st.session_state.last_confidence = response['confidence']
         
         # Met à jour les suggestions
         st.session_state.suggestions = response['suggestions']
@@ -152,16 +259,20 @@ class ChatbotApp:
             """)
             
             st.markdown("### 📊 Statistiques")
-            st.info(f"💬 {len(st.session_state.conversation)//2} échanges")
+            st.info(f"💬 {st.session_state.exchanges} échanges")
             
-            if st.session_state.conversation:
-                last_response = st.session_state.conversation[-1][2]
-                if not last_response:  # Si c'est une réponse du bot
-                    confidence = st.session_state.conversation[-1][1]['confidence']
-                    st.metric("Confiance dernière réponse", f"{confidence:.2f}")
+            if st.session_state.last_confidence is not None:
+                st.metric("Confiance dernière réponse", f"{st.session_state.last_confidence:.2f}")
     
     def run(self):
         """Lance l'application"""
+        with metrics.span("streamlit_render"):
+            self._render()
+        # Page déjà affichée (état d'attente compris) : l'attente ne fige pas l'interface
+        self._await_answer()
+    
+    def _render(self):
+        """Construit la page"""
         self.initialize_session()
         self.display_header()
         
@@ -175,6 +286,7 @@ class ChatbotApp:
         with col2:
             self.display_sidebar()
 
+
 def main():
     """Fonction principale"""
     app = ChatbotApp()
@@ -7,6 +7,7 @@ BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
+MODEL_DIR = PROCESSED_DATA_DIR / "model"
 
 # Création des dossiers s'ils n'existent pas
 DATA_DIR.mkdir(exist_ok=True)
@@ -17,7 +18,136 @@ PROCESSED_DATA_DIR.mkdir(exist_ok=True)
 MODEL_CONFIG = {
     "similarity_threshold": 0.3,
     "max_questions": 1000,
-    "language": "french"
+    "language": "french",
+    "max_features": 1000,
+    "cache_size": 1024,      # Nombre maximal de réponses en cache
+    "cache_ttl": None,       # Durée de vie d'une entrée en secondes (None = illimitée)
+    "reload_interval": 5,     # Surveillance de l'artefact pour le rechargement à chaud (secondes, None = désactivé)
+    # Recherche : "word" (index de mots) ou "hybrid" (mots + n-grammes de caractères, tolérant aux fautes)
+    "retrieval_mode": "hybrid",
+    "char_ngram_range": (3, 5),
+    "char_n_features": 2 ** 18,     # Taille fixe de l'espace haché des n-grammes
+    "char_weight": 0.8,             # Poids des n-grammes dans le score fusionné
+    # MaxScore : arrêt anticipé du parcours des listes pour le top-k. Utile quand
+    # quelques termes rares décident du classement ; sur le corpus actuel, le
+    # parcours complet des listes est aussi rapide
+    "early_termination": False,
+    # Recherche sémantique optionnelle (sentence-transformers, modèle local sur CPU)
+    "dense_retrieval": {
+        "enabled": os.getenv("CHATBOT_DENSE", "0") == "1",
+        # Dossier d'un petit modèle multilingue, ex. paraphrase-multilingual-MiniLM-L12-v2
+        "model_path": Path(os.getenv("CHATBOT_EMBEDDING_MODEL", str(DATA_DIR / "embedding_model"))),
+        "weight": 0.3,            # Poids de la similarité sémantique dans le score fusionné
+        "n_lists": None,          # Listes de l'index IVF (None = racine du nombre de questions)
+        "n_probe": 8,             # Listes sondées par requête
+        "batch_size": 64          # Questions encodées par lot à l'entraînement
+    },
+    # Classifieur d'intention : catégorie prédite (suggestions des réponses de repli) et,
+    # optionnellement, recherche limitée aux fragments de une ou deux catégories
+    "intent": {
+        "enabled": True,
+        "C": 10.0,                # Inverse de la régularisation de la régression logistique
+        # Recherche par fragments : même classement que l'index complet (repli dès
+        # qu'une autre catégorie pourrait faire mieux), mais sur le corpus actuel le
+        # repli est trop fréquent pour gagner du temps
+        "shard_search": False,
+        "route_confidence": 0.7,  # Probabilité cumulée requise pour restreindre la recherche
+        "max_shards": 2           # Catégories interrogées au plus
+    },
+    # Contexte de conversation (relances du type « et pour le master ? »)
+    "context": {
+        "max_turns": 5,           # Tours conservés par session
+        "decay": 0.5,             # Atténuation du poids d'un tour à chaque nouveau tour
+        "query_weight": 0.5,      # Poids du vecteur de la question précédente dans la requête
+        "category_boost": 0.1,    # Bonus relatif des réponses d'une catégorie récente
+        "candidates": 20          # Réponses reclassées après application du bonus
+    },
+    # Normalisation des questions à l'entraînement et des requêtes
+    "normalization": {
+        "remove_stop_words": True,
+        "fold_accents": True,     # « frais de scolarité » = « frais de scolarite »
+        "stemming": True          # Racinisation légère (pluriels, e final)
+    }
+}
+
+# API HTTP/JSON (hors Streamlit)
+API_CONFIG = {
+    "host": "0.0.0.0",
+    "port": 8000,
+    "workers": os.cpu_count() or 1,
+    "max_batch_size": 1000,
+    # Mode pré-fork : intervalle de détection d'un nouvel artefact (secondes)
+    "reload_poll_interval": 5,
+    # Mode pré-fork : un worker arrêté peu après son démarrage est relancé avec un délai croissant
+    "worker_min_uptime": 10,        # En deçà (secondes), l'arrêt compte comme un échec au démarrage
+    "worker_backoff": 0.5,          # Délai avant la relance après un premier échec, doublé ensuite
+    "worker_backoff_max": 30,       # Délai maximal (secondes)
+    "worker_max_failures": 5        # Échecs consécutifs au démarrage avant d'abandonner l'emplacement
+}
+
+# Interface Streamlit : réponses calculées par un pool de workers
+APP_CONFIG = {
+    "answer_workers": 4,            # Réponses calculées simultanément (toutes sessions)
+    "answer_timeout": 2.0,          # Au-delà (secondes), la réponse de repli est affichée
+    "answer_poll_interval": 0.1     # Intervalle entre deux réaffichages en attente de réponse (secondes)
+}
+
+# Contrôle d'admission devant le moteur (API et Streamlit, par processus)
+ADMISSION_CONFIG = {
+    "max_concurrency": os.cpu_count() or 1,   # Réponses calculées simultanément
+    "max_queue": 64,                # Requêtes en attente d'une place au plus
+    "queue_timeout": 0.5,           # Attente maximale en file (secondes), puis cache seul
+    "client_rate": 2.0,             # Questions par seconde et par client (seau à jetons)
+    "client_burst": 10,             # Rafale maximale par client
+    "max_clients": 10000,           # Seaux conservés (clients les plus récents)
+    # Limites propres à des clients identifiés (nom -> {"rate", "burst"}, None = exempté),
+    # ex. {"moodle": {"rate": 50.0, "burst": 200}, "whatsapp": None}
+    "client_limits": {}
+}
+
+# Identification des clients de l'API pour la limitation de débit
+CLIENT_IDENTITY_CONFIG = {
+    "api_key_header": "X-API-Key",
+    # Clés des intégrations (Moodle, passerelle WhatsApp...) : "clé1:nom1,clé2:nom2"
+    "api_keys": dict(
+        entry.split(":", 1) for entry in os.getenv("CHATBOT_API_KEYS", "").split(",") if ":" in entry
+    ),
+    # Reverse proxies dont l'en-tête X-Forwarded-For est pris en compte
+    "trusted_proxies": [p for p in os.getenv("CHATBOT_TRUSTED_PROXIES", "").split(",") if p]
+}
+
+# Métriques (format Prometheus) : désactivées par défaut
+METRICS_CONFIG = {
+    "enabled": os.getenv("CHATBOT_METRICS", "0") == "1",
+    "port": int(os.getenv("CHATBOT_METRICS_PORT", "0")) or None,   # Endpoint local /metrics
+    "export_path": DATA_DIR / "metrics.prom",                        # Fichier pour le textfile collector
+    "export_interval": 15,                                           # Secondes entre deux écritures
+    # Plusieurs workers (uvicorn --workers, pré-fork) : instantanés agrégés par /metrics
+    "multiprocess_dir": DATA_DIR / "metrics_workers",
+    "snapshot_interval": 5                                           # Secondes entre deux instantanés
+}
+
+# Prétraitement des données
+PREPROCESS_CONFIG = {
+    "chunk_size": 50000,            # Lignes écrites par bloc (borne la mémoire du prétraitement)
+    "dedup_memory": 1_000_000,      # Empreintes de dédoublonnage gardées en mémoire (8 octets chacune), le reste sur disque
+    "workers": 1,                   # Processus d'expansion (0 = tous les cœurs)
+    "batch_size": 256               # Entrées brutes par tâche envoyée aux workers
+}
+
+# Paramètres du web scraping
+SCRAPER_CONFIG = {
+    "max_workers": 8,               # Téléchargements simultanés (tous hôtes)
+    "per_host_concurrency": 4,      # Requêtes simultanées par hôte
+    "requests_per_second": 4.0,     # Débit moyen par hôte (seau à jetons)
+    "burst": 4,                     # Rafale maximale par hôte
+    "timeout": 10,
+    "respect_robots": True,         # Respect de robots.txt (Disallow, Crawl-delay)
+    "max_retries": 3,               # Nouveaux essais après un 429 / 503
+    "backoff": 1.0,                 # Premier délai sans Retry-After, doublé à chaque essai (s)
+    "max_backoff": 60,              # Pause maximale d'un hôte (s)
+    "parser": "auto",               # Backend HTML : "auto" (lxml si installé), "lxml", "html.parser"
+    "cache_dir": RAW_DATA_DIR / "http_cache"
 }
 
 # URLs pour le web scraping (exemple)
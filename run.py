@@ -26,8 +26,9 @@ except ImportError:
     def display_network_info(port=8501):
         print(f"\n📍 Application accessible sur : http://localhost:{port}")
         print("🌐 Pour l'accès externe, configurez votre firewall et utilisez votre IP publique")
-# Variable globale pour le processus
+# Variables globales pour les processus
 streamlit_process = None
+api_process = None
 
 def signal_handler(sig, frame):
     """Gère l'interruption Ctrl+C - Retour au menu au lieu de quitter"""
@@ -36,6 +37,10 @@ def signal_handler(sig, frame):
         print("Fermeture de l'application Streamlit...")
         streamlit_process.terminate()
         streamlit_process.wait(timeout=5)
+    if api_process:
+        print("Fermeture de l'API HTTP...")
+        api_process.terminate()
+        api_process.wait(timeout=5)
     # Ne pas appeler sys.exit(), on laisse le programme continuer
 
 def display_menu():
@@ -49,6 +54,7 @@ def display_menu():
     print("4️⃣  - Entraîner le chatbot")
     print("5️⃣  - Lancer l'application web")
     print("6️⃣  - Tout exécuter (1-2-3-4-5)")
+    print("7️⃣  - Lancer l'API HTTP (Moodle, WhatsApp...)")
     print("0️⃣  - Quitter")
     print("💡 Ctrl+C - Retour au menu à tout moment")
     print("-"*50)
@@ -57,11 +63,11 @@ def get_user_choice():
     """Demande et valide le choix de l'utilisateur"""
     while True:
         try:
-            choice = input("\n🎯 Votre choix (0-6) : ").strip()
-            if choice in ['0', '1', '2', '3', '4', '5', '6']:
+            choice = input("\n🎯 Votre choix (0-7) : ").strip()
+            if choice in ['0', '1', '2', '3', '4', '5', '6', '7']:
                 return int(choice)
             else:
-                print("❌ Choix invalide. Veuillez entrer un nombre entre 0 et 6.")
+                print("❌ Choix invalide. Veuillez entrer un nombre entre 0 et 7.")
         except KeyboardInterrupt:
             print("\n🔄 Retour au menu...")
             return -1  # Code spécial pour retour au menu
@@ -109,7 +115,8 @@ def preprocess_data():
     print("\n🔧 Prétraitement des données...")
     try:
         preprocessor = DataPreprocessor()
-        result = preprocessor.prepare_training_data()
+        # Incrémental : seules les entrées modifiées depuis le dernier passage sont réexpansées
+        result = preprocessor.prepare_training_data(incremental=True)
         return result is not None
     except KeyboardInterrupt:
         print("\n🔄 Prétraitement interrompue - Retour au menu")
@@ -130,8 +137,13 @@ def train_chatbot():
     
     try:
         from chatbot_engine import ChatbotEngine
+        from model_store import train_model
+        # Écrit l'artefact versionné que le moteur chargera au démarrage
+        model = train_model()
+        print(f"💾 Modèle enregistré ({model.n_rows} questions, {len(model.answers)} réponses, empreinte {model.data_hash[:12]})")
         chatbot = ChatbotEngine()
         print("✅ Chatbot entraîné avec succès!")
+        print("💡 Une interface déjà lancée chargera ce modèle automatiquement, sans redémarrage")
         return True
     except KeyboardInterrupt:
         print("\n🔄 Entraînement interrompue - Retour au menu")
@@ -190,6 +202,41 @@ def run_app():
             streamlit_process = None
 
 
+def run_api():
+    """Lance l'API HTTP/JSON (/ask, /ask/batch, /health, /metrics)"""
+    global api_process
+    from config.settings import API_CONFIG
+    
+    print("\n🔌 Lancement de l'API HTTP...")
+    
+    try:
+        signal.signal(signal.SIGINT, signal_handler)
+        
+        # Plusieurs workers partagent l'artefact du modèle chargé en mmap
+        api_process = subprocess.Popen([
+            sys.executable, "-m", "uvicorn", "api_server:app",
+            "--app-dir", "src",
+            "--host", API_CONFIG["host"],
+            "--port", str(API_CONFIG["port"]),
+            "--workers", str(API_CONFIG["workers"])
+        ])
+        
+        print(f"📍 API accessible sur : http://localhost:{API_CONFIG['port']}/ask")
+        print(f"⚙️ {API_CONFIG['workers']} workers")
+        
+        api_process.wait()
+        print("\n🔄 Retour au menu principal...")
+        
+    except KeyboardInterrupt:
+        print("\n🔄 Retour au menu...")
+    except Exception as e:
+        print(f"❌ Erreur : {e}")
+    finally:
+        if api_process:
+            api_process.terminate()
+            api_process = None
+
+
 def execute_all():
     """Exécute toutes les étapes en séquence"""
     print("\n🚀 Exécution de toutes les étapes...")
@@ -260,9 +307,12 @@ def main():
                 
             elif choice == 6:
                 execute_all()
+                
+            elif choice == 7:
+                run_api()
             
             # Pause avant de revenir au menu (sauf si l'utilisateur a quitté)
-            if choice != 5 and choice != 6:  # Les options 5 et 6 gèrent leur propre flux
+            if choice not in (5, 6, 7):  # Les options 5, 6 et 7 gèrent leur propre flux
                 try:
                     input("\n⏎ Appuyez sur Entrée pour revenir au menu...")
                 except KeyboardInterrupt:
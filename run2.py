@@ -5,6 +5,7 @@ Script principal pour lancer le projet Chatbot IFOAD-UJKZ
 """
 
 import argparse
+import json
 import sys
 import signal
 import subprocess
@@ -51,11 +52,11 @@ def collect_data():
     collector = DataCollector()
     return collector.collect_from_website()
 
-def preprocess_data():
+def preprocess_data(incremental: bool = False, workers: int = None):
     """Lance le prétraitement des données"""
     print("🔧 Prétraitement des données...")
     preprocessor = DataPreprocessor()
-    return preprocessor.prepare_training_data()
+    return preprocessor.prepare_training_data(incremental=incremental, workers=workers)
 
 def train_chatbot():
     """Lance l'entraînement du chatbot"""
@@ -69,6 +70,10 @@ def train_chatbot():
     
     try:
         from chatbot_engine import ChatbotEngine
+        from model_store import train_model
+        # Écrit l'artefact versionné que le moteur chargera au démarrage
+        model = train_model()
+        print(f"💾 Modèle enregistré ({model.n_rows} questions, {len(model.answers)} réponses, empreinte {model.data_hash[:12]})")
         chatbot = ChatbotEngine()
         print("✅ Chatbot entraîné avec succès!")
         return chatbot
@@ -110,6 +115,77 @@ def run_app():
         if streamlit_process:
             streamlit_process.terminate()
 
+def answer_batch(input_path: str, output_path: str, batch_size: int = 256):
+    """Répond à un fichier de questions (une par ligne) et écrit les réponses en JSONL"""
+    print(f"📨 Réponses par lot : {input_path} → {output_path}")
+    
+    from chatbot_engine import ChatbotEngine
+    chatbot = ChatbotEngine()
+    total = 0
+    
+    def flush(batch, out):
+        for question, response in zip(batch, chatbot.get_responses(batch)):
+            out.write(json.dumps({"question": question, **response}, ensure_ascii=False) + "\n")
+    
+    # Lecture en flux : seul le lot courant est gardé en mémoire
+    with open(input_path, 'r', encoding='utf-8') as src, \
+            open(output_path, 'w', encoding='utf-8') as out:
+        batch = []
+        for line in src:
+            question = line.rstrip("\n")
+            if not question.strip():
+                continue
+            batch.append(question)
+            if len(batch) >= batch_size:
+                flush(batch, out)
+                total += len(batch)
+                batch = []
+        if batch:
+            flush(batch, out)
+            total += len(batch)
+    
+    print(f"✅ {total} questions traitées")
+    return total
+
+def run_benchmark(scales: str, queries: int, output: str, baseline: str = None, modes: str = None):
+    """Lance le banc d'essai et le compare éventuellement à une exécution de référence"""
+    from benchmark import compare_runs, run_benchmark as run_all
+    
+    print("📏 Banc d'essai du chatbot...")
+    report = run_all([int(s) for s in scales.split(",")], queries,
+                     modes=modes.split(",") if modes else None)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Résultats enregistrés dans {output}")
+    
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_runs(json.load(f), report)
+        if regressions:
+            print(f"❌ {len(regressions)} régression(s) détectée(s) :")
+            for r in regressions:
+                print(f"   • {r['scale']}x {r['mode']} {r['metric']} : {r['baseline']:.4g} → {r['current']:.4g} ({r['change']:+.0%})")
+            sys.exit(1)
+        print("✅ Aucune régression par rapport à la référence")
+    return report
+
+def run_api(host: str = None, port: int = None, workers: int = None, prefork: bool = False):
+    """Lance l'API HTTP/JSON (/ask, /ask/batch, /health, /metrics)"""
+    from config.settings import API_CONFIG
+    
+    host = host or API_CONFIG["host"]
+    port = port or API_CONFIG["port"]
+    workers = workers or API_CONFIG["workers"]
+    if prefork:
+        # Modèle chargé une fois dans le parent, partagé par les workers
+        from prefork import PreforkServer
+        PreforkServer(host, port, workers).serve_forever()
+        return
+    
+    from api_server import run_server
+    print(f"🔌 API HTTP sur http://{host}:{port} ({workers} workers)")
+    run_server(host, port, workers)
+
 def main():
     """Fonction principale"""
     setup_logging()
@@ -117,9 +193,24 @@ def main():
     parser = argparse.ArgumentParser(description="Chatbot IFOAD-UJKZ")
     parser.add_argument(
         "command", 
-        choices=["init", "collect", "preprocess", "train", "run", "all"],
+        choices=["init", "collect", "preprocess", "train", "run", "all", "batch", "bench", "serve"],
         help="Commande à exécuter"
     )
+    parser.add_argument("--input", help="Fichier de questions, une par ligne (commande batch)")
+    parser.add_argument("--output", default=None,
+                        help="Fichier de sortie (batch : answers.jsonl, bench : bench_results.json)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Taille des lots (commande batch)")
+    parser.add_argument("--scales", default="1,10,100,1000", help="Échelles du corpus (commande bench)")
+    parser.add_argument("--queries", type=int, default=1000, help="Questions rejouées par échelle (commande bench)")
+    parser.add_argument("--baseline", help="Résultats de référence à comparer (commande bench)")
+    parser.add_argument("--modes", help="Modes de recherche comparés, ex. word,hybrid (commande bench)")
+    parser.add_argument("--host", help="Adresse d'écoute (commande serve)")
+    parser.add_argument("--port", type=int, help="Port d'écoute (commande serve)")
+    parser.add_argument("--workers", type=int, help="Nombre de processus (commandes serve et preprocess, 0 = tous les cœurs)")
+    parser.add_argument("--prefork", action="store_true",
+                        help="Workers forkés depuis un parent qui partage le modèle (commande serve)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Ne réexpanse que les entrées modifiées (commande preprocess)")
     
     args = parser.parse_args()
     
@@ -130,12 +221,20 @@ def main():
         collect_data()
     elif args.command == "preprocess":
         initialize_project()
-        preprocess_data()
+        preprocess_data(args.incremental, args.workers)
     elif args.command == "train":
         initialize_project()
         train_chatbot()
     elif args.command == "run":
         run_app()
+    elif args.command == "batch":
+        if not args.input:
+            parser.error("la commande batch requiert --input")
+        answer_batch(args.input, args.output or "answers.jsonl", args.batch_size)
+    elif args.command == "bench":
+        run_benchmark(args.scales, args.queries, args.output or "bench_results.json", args.baseline, args.modes)
+    elif args.command == "serve":
+        run_api(args.host, args.port, args.workers, args.prefork)
     elif args.command == "all":
         initialize_project()
         collect_data()
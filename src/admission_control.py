@@ -0,0 +1,179 @@
+# src/admission_control.py
+"""
+Contrôle d'admission devant le moteur de réponses
+
+Lors des pics (publication d'un communiqué de recrutement), tout calculer en
+même temps ralentit toutes les requêtes ensemble. La porte limite les calculs
+simultanés ; les requêtes suivantes attendent dans une file bornée, chacune
+avec une échéance. Chaque client est limité par un seau à jetons (limites
+propres aux intégrations connues, qui peuvent aussi être exemptées). File
+pleine ou échéance dépassée : seule une réponse déjà en cache est servie.
+La latence des requêtes admises reste ainsi bornée.
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from config.settings import ADMISSION_CONFIG
+from chatbot_engine import get_shared_engine
+from conversation_context import ConversationContext
+from metrics import metrics
+from rate_limiter import TokenBucket
+
+
+class Overloaded(Exception):
+    """Requête refusée : client trop rapide ("rate_limited") ou service saturé ("saturated")"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """Limite de concurrence, file d'attente bornée à échéance et débit par client"""
+
+    def __init__(self, engine, max_concurrency: int = 4, max_queue: int = 64, queue_timeout: float = 0.5,
+                 client_rate: float = 2.0, client_burst: float = 10.0, max_clients: int = 10000,
+                 client_limits: Optional[Dict[str, Optional[Dict[str, float]]]] = None):
+        self.engine = engine
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+        self.client_limits = client_limits or {}
+        self.active = 0
+        self.queued = 0
+        self._available = threading.Condition()
+        # Seaux des clients récents (LRU borné : un seau oublié repart plein)
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._buckets_lock = threading.Lock()
+
+    def _bucket(self, client_id: str) -> Optional[TokenBucket]:
+        """Seau du client (None s'il est exempté de limitation)"""
+        limits = self.client_limits.get(client_id, {})
+        if limits is None:
+            return None
+        with self._buckets_lock:
+            bucket = self._buckets.get(client_id)
+            if bucket is None:
+                bucket = self._buckets[client_id] = TokenBucket(limits.get("rate", self.client_rate),
+                                                                limits.get("burst", self.client_burst))
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client_id)
+            return bucket
+
+    def _publish(self):
+        metrics.set_gauge("admission_active", self.active)
+        metrics.set_gauge("admission_queued", self.queued)
+
+    def _acquire(self, deadline: float) -> bool:
+        """Prend une place de calcul avant l'échéance (False si file pleine ou échéance dépassée)"""
+        with self._available:
+            # Premier arrivé, premier servi : pas de dépassement des requêtes en file
+            if self.active < self.max_concurrency and self.queued == 0:
+                self.active += 1
+                self._publish()
+                return True
+            if self.queued >= self.max_queue:
+                metrics.inc("admission_shed", reason="queue_full")
+                return False
+            self.queued += 1
+            self._publish()
+            try:
+                while self.active >= self.max_concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        metrics.inc("admission_shed", reason="deadline")
+                        # Une place libérée pendant l'expiration revient au suivant
+                        if self.active < self.max_concurrency:
+                            self._available.notify()
+                        return False
+                    self._available.wait(remaining)
+                self.active += 1
+                return True
+            finally:
+                self.queued -= 1
+                self._publish()
+
+    def _release(self):
+        with self._available:
+            self.active -= 1
+            self._publish()
+            self._available.notify()
+
+    @contextmanager
+    def slot(self, client_id: str, tokens: float = 1.0) -> Iterator[None]:
+        """Exécute un bloc dans une place de calcul ; lève Overloaded si refusé
+
+        Le coût est plafonné à la rafale du client : un lot plus grand que son
+        seau reste possible une fois le seau plein.
+        """
+        bucket = self._bucket(client_id)
+        if bucket is not None:
+            tokens = min(tokens, bucket.capacity)
+        if bucket is not None and not bucket.try_acquire(tokens):
+            metrics.inc("admission_rejected", reason="rate_limited")
+            raise Overloaded("rate_limited", tokens / bucket.rate if bucket.rate > 0 else 1.0)
+        start = time.monotonic()
+        if not self._acquire(start + self.queue_timeout):
+            raise Overloaded("saturated", self.queue_timeout)
+        metrics.observe("admission_wait", time.monotonic() - start)
+        metrics.inc("admission_admitted")
+        try:
+            yield
+        finally:
+            self._release()
+
+    def get_response(self, question: str, client_id: str,
+                     context: Optional[ConversationContext] = None) -> Dict:
+        """Réponse calculée si la requête est admise, réponse en cache sinon
+
+        Lève Overloaded si le client dépasse son débit, ou si le service est
+        saturé et que la question n'est pas en cache.
+        """
+        try:
+            with self.slot(client_id):
+                return self.engine.get_response(question, context)
+        except Overloaded as error:
+            if error.reason != "saturated":
+                raise
+            # Mode dégradé : aucune nouvelle recherche, seulement le cache
+            cached = self.engine.cached_response(question)
+            metrics.inc("admission_degraded", result="hit" if cached is not None else "miss")
+            if cached is None:
+                raise
+            return cached
+
+    def stats(self) -> Dict:
+        """État instantané de la porte"""
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "clients": len(self._buckets)
+        }
+
+
+# Porte partagée par toutes les requêtes du processus (API, Streamlit)
+_shared_gate: Optional[AdmissionGate] = None
+_shared_gate_lock = threading.Lock()
+
+
+def get_shared_gate() -> AdmissionGate:
+    """Retourne la porte d'admission du processus, devant le moteur partagé"""
+    global _shared_gate
+    gate = _shared_gate
+    if gate is None:
+        with _shared_gate_lock:
+            if _shared_gate is None:
+                _shared_gate = AdmissionGate(get_shared_engine(), **ADMISSION_CONFIG)
+            gate = _shared_gate
+    return gate
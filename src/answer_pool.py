@@ -0,0 +1,88 @@
+# src/answer_pool.py
+"""
+Calcul des réponses hors du fil de l'interface
+
+Un pool borné de workers exécute get_response ; l'interface affiche un état
+d'attente au lieu de bloquer. Une même question d'une même session déjà en
+cours n'est calculée qu'une fois (double-clic sur une suggestion), et une
+réponse trop lente est remplacée par la réponse de repli. Avec une porte
+d'admission, chaque session est un client limité en débit.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Dict, Optional, Tuple
+
+from admission_control import AdmissionGate, Overloaded
+from conversation_context import ConversationContext
+from metrics import metrics
+
+
+class AnswerPool:
+    """Pool de workers partagé par les sessions d'un processus"""
+
+    def __init__(self, engine, max_workers: int = 4, timeout: float = 2.0,
+                 gate: Optional[AdmissionGate] = None):
+        self.engine = engine
+        self.timeout = timeout
+        self.gate = gate
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="answer")
+        # Calculs en cours par (session, question)
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, session_id: str, question: str,
+               context: Optional[ConversationContext] = None) -> Future:
+        """Lance le calcul d'une réponse, ou rejoint celui de la même question de la session"""
+        key = (session_id, question.strip())
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                metrics.inc("coalesced_requests")
+                return future
+            if self.gate is not None:
+                future = self._executor.submit(self.gate.get_response, question, session_id, context)
+            else:
+                future = self._executor.submit(self.engine.get_response, question, context)
+            self._pending[key] = future
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return future
+
+    def ready(self, future: Future, deadline: float) -> bool:
+        """Vrai si result() répond sans attendre : calcul terminé ou échéance dépassée"""
+        return future.done() or time.monotonic() >= deadline
+
+    def _forget(self, key: Tuple[str, str], future: Future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def abandon(self, future: Future):
+        """Retire un calcul dont plus personne n'attend le résultat (annulé s'il n'a pas démarré)
+
+        La même question posée ensuite repart d'un nouveau calcul, sur le contexte courant.
+        """
+        future.cancel()
+        with self._lock:
+            for key, pending in list(self._pending.items()):
+                if pending is future:
+                    del self._pending[key]
+
+    def deadline(self) -> float:
+        """Échéance (horloge monotone) d'une question soumise maintenant"""
+        return time.monotonic() + self.timeout
+
+    def result(self, future: Future, deadline: float) -> Tuple[Dict, bool]:
+        """Réponse calculée, réponse de repli si l'échéance est dépassée, message d'attente si refusée
+
+        Le booléen indique si le délai a expiré : le calcul est alors abandonné
+        (il peut encore se terminer en arrière-plan, mais n'est plus rejoint).
+        """
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic())), False
+        except TimeoutError:
+            metrics.inc("answer_timeouts")
+            self.abandon(future)
+            return self.engine.fallback_response(), True
+        except Overloaded:
+            return self.engine.busy_response(), False
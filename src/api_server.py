@@ -0,0 +1,136 @@
+# src/api_server.py
+"""
+API HTTP/JSON du chatbot, indépendante de Streamlit
+
+Endpoints : POST /ask, POST /ask/batch, GET /health, GET /metrics
+"""
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from config.settings import API_CONFIG, CLIENT_IDENTITY_CONFIG, METRICS_CONFIG
+from admission_control import Overloaded, get_shared_gate
+from chatbot_engine import get_shared_engine
+from metrics import MULTIPROCESS_ENV, metrics, reset_multiprocess_dir
+
+
+class AskRequest(BaseModel):
+    """Question unique"""
+    question: str
+
+
+class BatchRequest(BaseModel):
+    """Lot de questions"""
+    questions: List[str]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Charge le moteur (artefact mmap) avant d'accepter des requêtes"""
+    if os.getenv(MULTIPROCESS_ENV) == "1":
+        # Plusieurs workers : /metrics agrège les séries de tous
+        metrics.enable_multiprocess(METRICS_CONFIG["multiprocess_dir"], METRICS_CONFIG["snapshot_interval"])
+    engine = get_shared_engine()
+    # En mode pré-fork, le parent gère les nouvelles versions (redémarrage progressif)
+    if not getattr(app.state, "managed_reload", False):
+        engine.start_watcher()
+    yield
+
+
+app = FastAPI(title="Chatbot IFOAD-UJKZ", lifespan=lifespan)
+
+
+def _client_id(http_request: Request) -> str:
+    """Client pour la limitation de débit
+
+    Une intégration présentant une clé API connue est identifiée par son nom.
+    Sinon, l'adresse du client : la connexion, ou derrière un reverse proxy de
+    confiance, la dernière adresse non fiable de X-Forwarded-For.
+    """
+    api_key = http_request.headers.get(CLIENT_IDENTITY_CONFIG["api_key_header"])
+    name = CLIENT_IDENTITY_CONFIG["api_keys"].get(api_key) if api_key else None
+    if name is not None:
+        return name
+    address = http_request.client.host if http_request.client else "anonymous"
+    trusted = CLIENT_IDENTITY_CONFIG["trusted_proxies"]
+    forwarded = http_request.headers.get("x-forwarded-for")
+    if address in trusted and forwarded:
+        # Chaque proxy ajoute l'adresse de son pair à droite de la liste
+        for hop in reversed([hop.strip() for hop in forwarded.split(",") if hop.strip()]):
+            address = hop
+            if hop not in trusted:
+                break
+    return f"ip:{address}"
+
+
+def _refuse(error: Overloaded) -> HTTPException:
+    """429 pour un client trop rapide, 503 pour un service saturé, avec Retry-After"""
+    return HTTPException(
+        status_code=429 if error.reason == "rate_limited" else 503,
+        detail="Trop de requêtes" if error.reason == "rate_limited" else "Service saturé",
+        headers={"Retry-After": str(max(1, round(error.retry_after)))}
+    )
+
+
+# Les handlers synchrones s'exécutent dans le pool de threads de l'ASGI :
+# la boucle d'événements reste disponible pendant le calcul
+@app.post("/ask")
+def ask(request: AskRequest, http_request: Request) -> Dict:
+    """Répond à une question (réponse en cache seulement si le service est saturé)"""
+    try:
+        return get_shared_gate().get_response(request.question, _client_id(http_request))
+    except Overloaded as error:
+        raise _refuse(error)
+
+
+@app.post("/ask/batch")
+def ask_batch(request: BatchRequest, http_request: Request) -> Dict:
+    """Répond à un lot de questions"""
+    if len(request.questions) > API_CONFIG["max_batch_size"]:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lot limité à {API_CONFIG['max_batch_size']} questions"
+        )
+    gate = get_shared_gate()
+    try:
+        # Un lot occupe une place de calcul et consomme le débit du client
+        # (une question par jeton, au plus la rafale de son propre seau)
+        with gate.slot(_client_id(http_request), len(request.questions)):
+            return {"responses": get_shared_engine().get_responses(request.questions)}
+    except Overloaded as error:
+        raise _refuse(error)
+
+
+@app.get("/health")
+def health() -> Dict:
+    """État du service et version du modèle chargé"""
+    engine = get_shared_engine()
+    return {
+        "status": "ok",
+        "model": engine.model.data_hash[:12],
+        "rows": engine.model.n_rows,
+        "answers": len(engine.model.answers),
+        "cache": engine.cache.stats(),
+        "admission": get_shared_gate().stats()
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint() -> str:
+    """Métriques au format Prometheus (vide si désactivées), agrégées sur les workers"""
+    return metrics.render_prometheus()
+
+
+def run_server(host: str = API_CONFIG["host"], port: int = API_CONFIG["port"],
+               workers: int = API_CONFIG["workers"]):
+    """Lance le serveur ; chaque worker charge le même artefact en mmap (pages partagées)"""
+    import uvicorn
+    if workers > 1 and metrics.enabled:
+        # Les workers héritent de l'environnement : chacun dépose ses instantanés
+        reset_multiprocess_dir(METRICS_CONFIG["multiprocess_dir"])
+        os.environ[MULTIPROCESS_ENV] = "1"
+    uvicorn.run("api_server:app", host=host, port=port, workers=workers, log_level="info")
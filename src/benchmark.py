@@ -0,0 +1,269 @@
+# src/benchmark.py
+"""
+Banc d'essai reproductible du chemin de requête et du pipeline de données
+
+Pour chaque échelle (1x, 10x, ... la taille de ifoad_data.json), un corpus
+synthétique est généré, prétraité et entraîné dans un dossier temporaire,
+puis une charge de questions est rejouée. Chaque échelle s'exécute dans un
+processus séparé pour que le pic mémoire mesuré lui soit propre.
+"""
+import json
+import platform
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import psutil
+from config.settings import MODEL_CONFIG, RAW_DATA_DIR
+
+DEFAULT_SCALES = [1, 10, 100, 1000]
+
+# Métriques comparées entre deux exécutions : True si « plus grand = pire »
+COMPARED_METRICS = {
+    "preprocess_s": True,
+    "train_s": True,
+    "startup_s": True,
+    "latency_p50_ms": True,
+    "latency_p95_ms": True,
+    "latency_p99_ms": True,
+    "throughput_qps": False,
+    "peak_rss_mb": True,
+    "engine_rss_mb": True,
+    "fallback_rate": True
+}
+
+# Proportion de questions de la charge portant une faute de frappe
+_TYPO_RATE = 0.3
+
+# Lettres utilisées pour les fautes de substitution et d'insertion
+_TYPO_LETTERS = "aeiourstnl"
+
+
+# Intervalle d'échantillonnage de la mémoire résidente (secondes)
+_RSS_SAMPLE_INTERVAL = 0.005
+
+
+def _current_rss_mb() -> float:
+    """Mémoire résidente actuelle du processus (Mo)"""
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+class _PeakRss:
+    """Pic de mémoire résidente du processus pendant un bloc (Mo), sur tous les systèmes
+
+    Windows fournit le pic (peak_wset) ; ailleurs la mémoire résidente est
+    échantillonnée par un thread de fond.
+    """
+
+    def __init__(self):
+        self.process = psutil.Process()
+        self.peak_mb = _current_rss_mb()
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(_RSS_SAMPLE_INTERVAL):
+            self.peak_mb = max(self.peak_mb, _current_rss_mb())
+
+    def __enter__(self) -> "_PeakRss":
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        memory = self.process.memory_info()
+        self.peak_mb = max(self.peak_mb, memory.rss / (1024 * 1024),
+                           getattr(memory, "peak_wset", 0) / (1024 * 1024))
+        return False
+
+
+def _percentile_ms(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q) * 1000) if values else 0.0
+
+
+def generate_corpus(base_data: Dict, scale: int, seed: int = 0) -> Dict:
+    """Corpus synthétique de scale fois la taille des données de base"""
+    if scale <= 1:
+        return base_data
+    rng = random.Random(seed)
+    vocabulary = sorted({word for qa in base_data.values() for q in qa for word in q.split()})
+    corpus = {}
+    for category, qa_pairs in base_data.items():
+        pairs = dict(qa_pairs)
+        for copy in range(1, scale):
+            for question, answer in qa_pairs.items():
+                # Variante distincte : mots tirés du vocabulaire + identifiant de copie
+                extra = " ".join(rng.sample(vocabulary, k=min(2, len(vocabulary))))
+                pairs[f"{question} {extra} v{copy}"] = f"{answer} (variante {copy})"
+        corpus[category] = pairs
+    return corpus
+
+
+def _add_typo(question: str, rng: random.Random) -> str:
+    """Faute de frappe au hasard : lettre supprimée, remplacée ou insérée"""
+    pos = rng.randrange(len(question))
+    edit = rng.random()
+    if edit < 0.4:
+        return question[:pos] + question[pos + 1:]
+    letter = rng.choice(_TYPO_LETTERS)
+    if edit < 0.7:
+        return question[:pos] + letter + question[pos + 1:]
+    return question[:pos] + letter + question[pos:]
+
+
+def build_workload(base_data: Dict, n_queries: int, seed: int = 0) -> List[str]:
+    """Charge de questions : questions connues, dont une part avec une ou deux fautes de frappe"""
+    rng = random.Random(seed)
+    questions = [q for qa in base_data.values() for q in qa]
+    workload = []
+    for _ in range(n_queries):
+        question = rng.choice(questions)
+        if rng.random() < _TYPO_RATE and len(question) > 4:
+            for _ in range(rng.randint(1, 2)):
+                question = _add_typo(question, rng)
+        workload.append(question)
+    return workload
+
+
+def run_scale(scale: int, n_queries: int = 1000, seed: int = 0,
+              raw_data_path: Optional[Path] = None, mode: Optional[str] = None) -> Dict:
+    """Mesure une échelle pour un mode de recherche (à exécuter dans un processus dédié)"""
+    # Le processus est dédié à cette mesure : le mode peut être fixé globalement
+    if mode:
+        MODEL_CONFIG["retrieval_mode"] = mode
+    from chatbot_engine import ChatbotEngine
+    from data_preprocessor import DataPreprocessor
+    from model_store import train_model
+
+    raw_data_path = Path(raw_data_path) if raw_data_path else RAW_DATA_DIR / "ifoad_data.json"
+    with open(raw_data_path, 'r', encoding='utf-8') as f:
+        base_data = json.load(f)
+
+    with _PeakRss() as peak, tempfile.TemporaryDirectory(prefix=f"bench_{scale}x_") as tmp:
+        tmp = Path(tmp)
+        corpus = generate_corpus(base_data, scale, seed)
+        corpus_path = tmp / "raw.json"
+        with open(corpus_path, 'w', encoding='utf-8') as f:
+            json.dump(corpus, f, ensure_ascii=False)
+
+        # Les étapes du pipeline sont silencieuses pendant la mesure
+        with redirect_stdout(StringIO()):
+            preprocessor = DataPreprocessor(corpus_path, tmp / "processed")
+            start = time.perf_counter()
+            table = preprocessor.prepare_training_data()
+            preprocess_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            train_model(preprocessor.columnar_data_path, tmp / "model")
+            train_s = time.perf_counter() - start
+
+            rss_before = _current_rss_mb()
+            start = time.perf_counter()
+            engine = ChatbotEngine(preprocessor.columnar_data_path, tmp / "model")
+            startup_s = time.perf_counter() - start
+            engine_rss_mb = _current_rss_mb() - rss_before
+
+        # Cache désactivé : on mesure le chemin de calcul complet
+        engine.cache.max_size = 0
+        engine.cache.clear()
+
+        workload = build_workload(base_data, n_queries, seed)
+        fallbacks = 0
+        latencies = []
+        start_all = time.perf_counter()
+        for question in workload:
+            start = time.perf_counter()
+            response = engine.get_response(question)
+            latencies.append(time.perf_counter() - start)
+            if response["category"] == "unknown":
+                fallbacks += 1
+        total_s = time.perf_counter() - start_all
+
+        result = {
+            "scale": scale,
+            "mode": MODEL_CONFIG["retrieval_mode"],
+            "raw_questions": sum(len(qa) for qa in corpus.values()),
+            "rows": len(table),
+            "preprocess_s": preprocess_s,
+            "train_s": train_s,
+            "startup_s": startup_s,
+            "queries": len(workload),
+            "latency_p50_ms": _percentile_ms(latencies, 50),
+            "latency_p95_ms": _percentile_ms(latencies, 95),
+            "latency_p99_ms": _percentile_ms(latencies, 99),
+            "throughput_qps": len(workload) / total_s if total_s else 0.0,
+            "fallback_rate": fallbacks / len(workload) if workload else 0.0,
+            "engine_rss_mb": engine_rss_mb
+        }
+    result["peak_rss_mb"] = peak.peak_mb
+    return result
+
+
+def run_benchmark(scales: List[int] = None, n_queries: int = 1000, seed: int = 0,
+                  raw_data_path: Optional[Path] = None, modes: List[str] = None) -> Dict:
+    """Exécute toutes les échelles et tous les modes, chaque mesure dans un processus neuf
+
+    Avec plusieurs modes, l'écart de latence et de taux de repli de chaque
+    mode par rapport au premier est affiché.
+    """
+    scales = scales or DEFAULT_SCALES
+    modes = modes or [MODEL_CONFIG["retrieval_mode"]]
+    results = []
+    for scale in scales:
+        reference = None
+        for mode in modes:
+            print(f"⏱️ Échelle {scale}x, mode {mode}...")
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(run_scale, scale, n_queries, seed, raw_data_path, mode).result()
+            print(f"   p50 {result['latency_p50_ms']:.2f} ms • p99 {result['latency_p99_ms']:.2f} ms • "
+                  f"{result['throughput_qps']:.0f} q/s • repli {result['fallback_rate']:.1%} • "
+                  f"démarrage {result['startup_s'] * 1000:.1f} ms • pic {result['peak_rss_mb']:.0f} Mo")
+            if reference is None:
+                reference = result
+            else:
+                print(f"   vs {reference['mode']} : latence p50 "
+                      f"{result['latency_p50_ms'] - reference['latency_p50_ms']:+.2f} ms, p99 "
+                      f"{result['latency_p99_ms'] - reference['latency_p99_ms']:+.2f} ms • repli "
+                      f"{(result['fallback_rate'] - reference['fallback_rate']) * 100:+.1f} pts")
+            results.append(result)
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "results": results
+    }
+
+
+def compare_runs(baseline: Dict, current: Dict, tolerance: float = 0.10) -> List[Dict]:
+    """Liste les métriques dégradées de plus de `tolerance` par rapport à la référence"""
+    regressions = []
+    baseline_by_run = {(r["scale"], r.get("mode")): r for r in baseline.get("results", [])}
+    for result in current.get("results", []):
+        reference = baseline_by_run.get((result["scale"], result.get("mode")))
+        if reference is None:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            old, new = reference.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (change > tolerance) if higher_is_worse else (change < -tolerance):
+                regressions.append({
+                    "scale": result["scale"],
+                    "mode": result.get("mode"),
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change": change
+                })
+    return regressions
@@ -1,53 +1,227 @@
 # src/chatbot_engine.py
-import pandas as pd
+import logging
+import threading
+import time
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import Tuple, Dict, List
-from config.settings import MODEL_CONFIG, PROCESSED_DATA_DIR
+from pathlib import Path
+from typing import Tuple, Dict, List, Optional
+from config.settings import MODEL_CONFIG, MODEL_DIR
+from conversation_context import ConversationContext
+from model_store import TfidfModel, artifact_signature, data_fingerprint, default_data_path
+from inverted_index import QueryPart, search
+from response_cache import ResponseCache
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Sépare la question normalisée de l'empreinte du contexte dans les clés de cache contextuelles
+_CONTEXT_KEY_SEPARATOR = "\x1f"
 
 class ChatbotEngine:
     """Moteur principal du chatbot avec NLP"""
     
-    def __init__(self):
-        self.data_path = PROCESSED_DATA_DIR / "training_data.csv"
-        self.vectorizer = TfidfVectorizer(
-        stop_words=None,  # ✅ Correction
-        lowercase=True,
-        max_features=1000
-        )
-        self.qa_data = None
-        self.question_vectors = None
+    def __init__(self, data_path: Optional[Path] = None, model_dir: Optional[Path] = None):
+        # Données colonnaires (mmap) par défaut, CSV en repli
+        self._uses_default_data = data_path is None
+        self.data_path = Path(data_path) if data_path else default_data_path()
+        self.model_dir = Path(model_dir) if model_dir else MODEL_DIR
+        self.model: Optional[TfidfModel] = None
+        # Clés de cache = requêtes déjà normalisées par le modèle en service
+        self.cache = ResponseCache(MODEL_CONFIG["cache_size"], MODEL_CONFIG["cache_ttl"], normalizer=None)
+        self._warm_questions: List[str] = []
+        self._reload_lock = threading.Lock()
+        self._signature = None
+        self._watcher: Optional[threading.Thread] = None
         self._load_and_train()
     
+    @property
+    def vectorizer(self):
+        """Vectoriseur du modèle en service"""
+        return self.model.vectorizer
+    
+    @property
+    def question_vectors(self):
+        """Matrice des questions du modèle en service"""
+        return self.model.question_vectors
+    
+    def _build_model(self) -> TfidfModel:
+        """Charge l'artefact du modèle, ou entraîne si les données ont changé"""
+        with metrics.span("data_loading"):
+            data_hash = data_fingerprint(self.data_path)
+            
+            # Artefact à jour : chargement en mémoire partagée (mmap), sans réentraînement
+            model = TfidfModel.load(self.model_dir, expected_hash=data_hash)
+            if model is None:
+                logger.info("Chargement et entraînement du chatbot...")
+                model = TfidfModel.from_path(self.data_path)
+                try:
+                    model.save(self.model_dir)
+                except OSError as e:
+                    logger.warning("Impossible d'enregistrer le modèle : %s", e)
+        return model
+    
     def _load_and_train(self):
-        """Charge les données et entraîne le modèle"""
-        print("Chargement et entraînement du chatbot...")
+        """Construit le modèle puis le met en service"""
+        self._signature = artifact_signature(self.data_path, self.model_dir)
+        self._install(self._build_model())
+        logger.info("Chatbot entraîné sur %d questions (%d réponses distinctes)",
+                    self.model.n_rows, len(self.model.answers))
+    
+    def _install(self, model: TfidfModel):
+        """Met un modèle en service par une seule affectation de référence
         
-        # Chargement des données
-        self.qa_data = pd.read_csv(self.data_path)
+        Les appels en cours ont capturé l'ancien modèle et terminent dessus.
+        """
+        self.model = model
         
-        # Entraînement du vectoriseur
-        questions = self.qa_data['question'].tolist()
-        self.question_vectors = self.vectorizer.fit_transform(questions)
+        # Les réponses en cache ne sont valables que pour cette version du modèle
+        self.cache.bind(model.data_hash)
+        if self._warm_questions:
+            self.warm_cache(self._warm_questions)
         
-        print(f"Chatbot entraîné sur {len(questions)} questions")
+        metrics.set_gauge("index_rows", model.n_rows)
+        metrics.set_gauge("index_answers", len(model.answers))
     
-    def find_best_match(self, user_question: str) -> Tuple[str, float, str]:
-        """Trouve la meilleure correspondance"""
-        user_vector = self.vectorizer.transform([user_question])
-        similarities = cosine_similarity(user_vector, self.question_vectors)
-        best_match_idx = np.argmax(similarities)
-        best_score = similarities[0, best_match_idx]
+    def reload(self, force: bool = False) -> bool:
+        """Recharge le modèle si l'artefact ou les données ont changé, sans interrompre le service
+        
+        Le nouvel index est construit à côté de l'ancien, qui continue de
+        répondre jusqu'à la bascule. Retourne True si un nouveau modèle est en service.
+        """
+        with self._reload_lock:
+            signature = artifact_signature(self.data_path, self.model_dir)
+            if not force and signature == self._signature:
+                return False
+            
+            start = time.perf_counter()
+            # Le format colonnaire peut être apparu ou avoir disparu depuis le démarrage
+            if self._uses_default_data:
+                self.data_path = default_data_path()
+            model = self._build_model()
+            self._signature = artifact_signature(self.data_path, self.model_dir)
+            if not force and model.data_hash == self.model.data_hash:
+                return False
+            
+            previous = self.model.data_hash
+            self._install(model)
+            duration = time.perf_counter() - start
+        
+        metrics.inc("model_reloads")
+        metrics.observe("model_reload", duration)
+        logger.info("Modèle rechargé à chaud : %s -> %s en %.2fs (%d questions, %d réponses)",
+                    previous[:12], model.data_hash[:12], duration, model.n_rows, len(model.answers))
+        return True
+    
+    def start_watcher(self, interval: Optional[float] = None) -> bool:
+        """Surveille l'artefact dans un thread de fond et recharge à chaque changement"""
+        interval = interval if interval is not None else MODEL_CONFIG["reload_interval"]
+        if not interval:
+            return False
+        
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload()
+                except Exception:
+                    # Artefact en cours d'écriture ou invalide : l'ancien modèle reste en service
+                    logger.exception("Échec du rechargement du modèle, version actuelle conservée")
         
-        best_question = self.qa_data.iloc[best_match_idx]['question']
-        best_answer = self.qa_data.iloc[best_match_idx]['answer']
-        category = self.qa_data.iloc[best_match_idx]['category']
+        with self._reload_lock:
+            # Un seul thread de surveillance par moteur, même si plusieurs sessions le demandent
+            if self._watcher is not None:
+                return False
+            self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+            self._watcher.start()
+        return True
+    
+    def find_top_k(self, user_question: str, k: int = 5,
+                   model: Optional[TfidfModel] = None) -> List[Dict]:
+        """Retourne les k meilleures réponses distinctes avec leur score (au plus k, scores non nuls)"""
+        # Une seule lecture de self.model par appel : cohérent même pendant un rechargement
+        model = model or self.model
+        return self._rank(model, model.normalizer(user_question), k)[0]
+    
+    def _rank(self, model: TfidfModel, normalized_question: str, k: int,
+              context: Optional[ConversationContext] = None,
+              parts: Optional[List[QueryPart]] = None,
+              dense: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Classe les réponses pour une question déjà normalisée
+        
+        Retourne les candidats et la catégorie prédite par le classifieur
+        d'intention (None sans classifieur). La recherche se limite aux
+        catégories prédites et repart sur l'index complet dès qu'une ligne
+        hors de ces catégories pourrait dépasser le k-ième score obtenu : le
+        classement est celui de l'index complet. Avec un contexte, la requête
+        est enrichie des vecteurs des questions précédentes et les réponses
+        des catégories récentes sont favorisées. parts et dense sont des
+        encodages déjà calculés (dense n'est recalculé que sans parts).
+        """
+        if k <= 0 or model.n_rows == 0:
+            return [], None
+        
+        if parts is None:
+            with metrics.span("vectorizer_transform"):
+                parts = model.query_parts(normalized_question)
+            with metrics.span("embedding"):
+                dense = model.query_dense(normalized_question)
+        with metrics.span("intent_routing"):
+            shards, intent = model.route(parts)
         
-        return best_answer, best_score, category
+        boosts: Dict[str, float] = {}
+        n_candidates = k
+        if context:
+            settings = MODEL_CONFIG["context"]
+            # Les vecteurs d'un autre modèle (avant un rechargement) ne sont pas réutilisables
+            parts = parts + [
+                (index, terms, settings["query_weight"] * weight * weights)
+                for weight, turn in context.recent(model.data_hash)
+                for (index, _, _), (terms, weights) in zip(parts, turn.vector)
+            ]
+            boosts = context.category_weights()
+            n_candidates = max(k, settings["candidates"])
+        
+        # Seules les lignes partageant un terme avec la requête (ou proches dans
+        # l'index sémantique) sont scorées
+        with metrics.span("similarity_scoring"):
+            answer_ids, scores = search(parts, model.answer_ids, n_candidates,
+                                        MODEL_CONFIG["early_termination"], model.restrict(dense, shards), shards)
+            kth = scores[n_candidates - 1] if scores.shape[0] >= n_candidates else 0.0
+            if shards is not None and model.outside_bound(parts, dense, shards) > kth:
+                # Une ligne d'une autre catégorie pourrait entrer dans le top-k : recherche sur tout l'index
+                metrics.inc("intent_fallbacks")
+                answer_ids, scores = search(parts, model.answer_ids, n_candidates,
+                                            MODEL_CONFIG["early_termination"], dense)
+            if boosts:
+                factors = np.array([1.0 + MODEL_CONFIG["context"]["category_boost"]
+                                    * boosts.get(model.answer_categories[idx], 0.0) for idx in answer_ids])
+                scores = scores * factors
+                order = np.argsort(-scores, kind='stable')[:k]
+                # Score enrichi par le contexte, ramené dans [0, 1] comme une similarité
+                answer_ids, scores = answer_ids[order], np.minimum(scores[order], 1.0)
+        return [
+            {
+                "answer": model.answers[idx],
+                "score": float(score),
+                "category": model.answer_categories[idx]
+            }
+            for idx, score in zip(answer_ids, scores)
+        ], intent
+    
+    def find_best_match(self, user_question: str) -> Tuple[str, float, str]:
+        """Trouve la meilleure correspondance"""
+        candidates = self.find_top_k(user_question, 1)
+        if not candidates:
+            return "", 0.0, "unknown"
+        best = candidates[0]
+        return best["answer"], best["score"], best["category"]
     
-    def get_response(self, user_question: str) -> Dict:
-        """Obtient une réponse structurée"""
+    def get_response(self, user_question: str, context: Optional[ConversationContext] = None) -> Dict:
+        """Obtient une réponse structurée
+        
+        Avec le contexte de la session, la réponse tient compte des tours
+        précédents et le tour courant y est enregistré.
+        """
         if not user_question.strip():
             return {
                 "answer": "Veuillez poser une question sur IFOAD-UJKZ.",
@@ -56,25 +230,147 @@ class ChatbotEngine:
                 "suggestions": self._get_suggestions()
             }
         
-        answer, confidence, category = self.find_best_match(
-            user_question.lower()
-        )
+        # Même normalisation qu'à l'entraînement, calculée une fois pour le cache et le calcul
+        model = self.model
+        normalized = model.normalizer(user_question)
         
-        if confidence < MODEL_CONFIG["similarity_threshold"]:
+        if context is not None:
+            with metrics.span("vectorizer_transform"):
+                parts = model.query_parts(normalized)
+            if context:
+                response = self._contextual_response(model, normalized, context, parts)
+            else:
+                response = self._cached_response(model, normalized)
+            context.add(response["category"], [(terms, weights) for _, terms, weights in parts],
+                        model.data_hash)
+            return response
+        return self._cached_response(model, normalized)
+    
+    def _contextual_response(self, model: TfidfModel, normalized: str,
+                             context: ConversationContext, parts: List[QueryPart]) -> Dict:
+        """Réponse tenant compte du contexte, servie par le cache quand c'est possible
+        
+        Le classement dépend des vecteurs et des catégories des tours
+        précédents : la réponse est mise en cache sous (question, empreinte du contexte).
+        """
+        key = f"{normalized}{_CONTEXT_KEY_SEPARATOR}{context.digest(model.data_hash)}"
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics.inc("cache_hits", mode="context")
+            return cached
+        metrics.inc("cache_misses", mode="context")
+        
+        with metrics.span("get_response", mode="context"):
+            response = self._build_response(*self._rank(model, normalized, 1, context, parts,
+                                                         model.query_dense(normalized)))
+        if self.model is model:
+            self.cache.put(key, response)
+        return response
+    
+    def _cached_response(self, model: TfidfModel, normalized: str) -> Dict:
+        """Réponse sans contexte, servie par le cache quand c'est possible"""
+        cached = self.cache.get(normalized)
+        if cached is not None:
+            metrics.inc("cache_hits")
+            return cached
+        metrics.inc("cache_misses")
+        
+        with metrics.span("get_response"):
+            response = self._build_response(*self._rank(model, normalized, 1))
+        # Pas de mise en cache d'une réponse de l'ancien modèle après une bascule
+        if self.model is model:
+            self.cache.put(normalized, response)
+        return response
+    
+    def warm_cache(self, questions: List[str]):
+        """Précalcule les réponses de questions fréquentes (boutons de suggestion)"""
+        for question in questions:
+            if question not in self._warm_questions:
+                self._warm_questions.append(question)
+        keys = self.model.normalizer.batch(questions)
+        for key, response in zip(keys, self.get_responses(questions)):
+            self.cache.put(key, response)
+    
+    def get_responses(self, user_questions: List[str], chunk_size: int = 256) -> List[Dict]:
+        """Obtient les réponses structurées d'un lot de questions"""
+        responses: List[Optional[Dict]] = [None] * len(user_questions)
+        
+        # Les questions vides reçoivent la même réponse que dans get_response
+        model = self.model
+        indexed = []
+        for i, question in enumerate(user_questions):
+            if question.strip():
+                indexed.append((i, question))
+            else:
+                responses[i] = self.get_response(question)
+        normalized = model.normalizer.batch([question for _, question in indexed])
+        
+        if indexed and model.n_rows:
+            # Une seule transformation par bloc ; classement identique à get_response
+            # (orientation par catégorie comprise), cache inclus via warm_cache
+            for start in range(0, len(indexed), chunk_size):
+                block = normalized[start:start + chunk_size]
+                with metrics.span("vectorizer_transform", mode="batch"):
+                    batch_parts = model.query_parts_batch(block)
+                with metrics.span("embedding", mode="batch"):
+                    batch_dense = model.query_dense_batch(block)
+                for offset, (question, parts, dense) in enumerate(zip(block, batch_parts, batch_dense)):
+                    position = indexed[start + offset][0]
+                    responses[position] = self._build_response(*self._rank(model, question, 1, parts=parts,
+                                                                           dense=dense))
+        else:
+            for i, _ in indexed:
+                responses[i] = self._build_response([])
+        
+        return responses
+    
+    def _build_response(self, candidates: List[Dict], intent: Optional[str] = None) -> Dict:
+        """Construit la réponse structurée à partir des candidats classés
+        
+        Sans réponse assez proche, les suggestions suivent la catégorie
+        prédite (intent) quand elle est connue.
+        """
+        with metrics.span("fallback_decision"):
+            confidence = candidates[0]["score"] if candidates else 0.0
+            is_fallback = confidence < MODEL_CONFIG["similarity_threshold"]
+        
+        if is_fallback:
+            metrics.inc("fallbacks")
             return {
                 "answer": self._get_fallback_response(),
                 "confidence": confidence,
                 "category": "unknown",
-                "suggestions": self._get_suggestions()
+                "suggestions": self._get_related_suggestions(intent) if intent else self._get_suggestions()
             }
         
+        best = candidates[0]
+        metrics.inc("category_hits", category=best["category"])
         return {
-            "answer": answer,
+            "answer": best["answer"],
             "confidence": confidence,
-            "category": category,
-            "suggestions": self._get_related_suggestions(category)
+            "category": best["category"],
+            "suggestions": self._get_related_suggestions(best["category"])
         }
     
+    def cached_response(self, user_question: str) -> Optional[Dict]:
+        """Réponse déjà en cache, sans aucun calcul de recherche (None sinon)"""
+        if not user_question.strip():
+            return None
+        return self.cache.get(self.model.normalizer(user_question))
+    
+    def busy_response(self) -> Dict:
+        """Réponse structurée quand le service est saturé"""
+        return {
+            "answer": "Le service est très sollicité en ce moment. Merci de reposer votre question dans quelques instants.",
+            "confidence": 0.0,
+            "category": "unknown",
+            "suggestions": self._get_suggestions()
+        }
+    
+    def fallback_response(self) -> Dict:
+        """Réponse structurée de repli (question incomprise ou réponse trop lente)"""
+        return self._build_response([])
+    
     def _get_fallback_response(self) -> str:
         """Réponse par défaut quand la question n'est pas comprise"""
         return (
@@ -115,7 +411,7 @@ class ChatbotEngine:
                 "Y a-t-il des bourses disponibles ?",
                 "Puis-je payer en plusieurs fois ?"
             ],
-            "histoire": [
+            "Historique": [
                 "Qui a fondé IFOAD-UJKZ ?",
                 "Quels sont les moments clés de l'histoire d'IFOAD-UJKZ ?"
             ],
@@ -125,4 +421,31 @@ class ChatbotEngine:
             ]
 
         }
-        return categories_suggestions.get(category, self._get_suggestions())
\ No newline at end of file
+        return categories_suggestions.get(category, self._get_suggestions())
+
+
+# Instance partagée par toutes les sessions du processus (Streamlit, scripts)
+_shared_engine: Optional[ChatbotEngine] = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_shared_engine() -> ChatbotEngine:
+    """Retourne le moteur partagé du processus, créé au premier appel"""
+    global _shared_engine
+    engine = _shared_engine
+    if engine is None:
+        with _shared_engine_lock:
+            # Double vérification : un autre thread a pu le créer entre-temps
+            if _shared_engine is None:
+                _shared_engine = ChatbotEngine()
+            engine = _shared_engine
+    return engine
+
+
+def reload_shared_engine() -> ChatbotEngine:
+    """Recharge le moteur partagé après régénération des données prétraitées"""
+    engine = get_shared_engine()
+    # Bascule atomique du modèle : les requêtes en cours terminent sur
+    # l'ancien, les suivantes utilisent le nouveau
+    engine.reload(force=True)
+    return engine
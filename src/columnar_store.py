@@ -0,0 +1,313 @@
+# src/columnar_store.py
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from config.settings import PROCESSED_DATA_DIR
+
+# Version du format colonnaire : à incrémenter à chaque changement de structure
+COLUMNAR_FORMAT_VERSION = 1
+
+# Emplacement par défaut des données prétraitées au format colonnaire
+COLUMNAR_DATA_PATH = PROCESSED_DATA_DIR / "training_data.cols"
+
+# Taille des blocs lus pour l'empreinte et la copie des colonnes (octets)
+_BLOCK_BYTES = 1 << 24
+
+
+class StringColumn:
+    """Colonne de chaînes stockée dans un tampon UTF-8 contigu avec ses offsets"""
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return self.offsets.shape[0] - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.buffer[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def tolist(self) -> List[str]:
+        """Décode toute la colonne"""
+        data = bytes(self.buffer)
+        offsets = self.offsets.tolist()
+        return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    @staticmethod
+    def encode(values: Iterable[str]) -> "StringColumn":
+        """Encode une liste de chaînes en tampon + offsets"""
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return StringColumn(buffer, offsets)
+
+
+class ColumnarTable:
+    """Données d'entraînement au format colonnaire (chargées par mmap)
+
+    - questions : une chaîne par ligne, dans un tampon contigu
+    - answers : table des réponses uniques, référencées par answer_ids (int32)
+    - categories : dictionnaire des catégories, référencées par category_codes (int16)
+    - original_questions : table des questions d'origine, référencées par original_ids (int32)
+    """
+
+    def __init__(self, questions: StringColumn, answers: StringColumn, answer_ids: np.ndarray,
+                 categories: List[str], category_codes: np.ndarray,
+                 original_questions: StringColumn, original_ids: np.ndarray, data_hash: str):
+        self.questions = questions
+        self.answers = answers
+        self.answer_ids = answer_ids
+        self.categories = categories
+        self.category_codes = category_codes
+        self.original_questions = original_questions
+        self.original_ids = original_ids
+        self.data_hash = data_hash
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "ColumnarTable":
+        """Construit la table à partir du DataFrame du prétraitement"""
+        answer_codes, answer_values = pd.factorize(df['answer'], sort=False)
+        category_codes, category_values = pd.factorize(df['category'], sort=False)
+        original_codes, original_values = pd.factorize(df['original_question'], sort=False)
+
+        questions = StringColumn.encode(df['question'].astype(str).tolist())
+        answers = StringColumn.encode(answer_values.tolist())
+        originals = StringColumn.encode(original_values.tolist())
+
+        table = cls(
+            questions,
+            answers,
+            answer_codes.astype(np.int32),
+            [str(c) for c in category_values],
+            category_codes.astype(np.int16),
+            originals,
+            original_codes.astype(np.int32),
+            ""
+        )
+        table.data_hash = table._content_hash()
+        return table
+
+    def _content_hash(self) -> str:
+        """Empreinte du contenu (sert de version des données pour le modèle)"""
+        digest = hashlib.sha256()
+        for column in (self.questions, self.answers, self.original_questions):
+            _update_digest(digest, column.offsets)
+            _update_digest(digest, column.buffer)
+        _update_digest(digest, self.answer_ids)
+        _update_digest(digest, self.category_codes)
+        digest.update(json.dumps(self.categories, ensure_ascii=False).encode('utf-8'))
+        _update_digest(digest, self.original_ids)
+        return digest.hexdigest()
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Reconstitue le DataFrame (export CSV lisible)"""
+        answers = np.array(self.answers.tolist(), dtype=object)
+        categories = np.array(self.categories, dtype=object)
+        originals = np.array(self.original_questions.tolist(), dtype=object)
+        return pd.DataFrame({
+            'category': categories[np.asarray(self.category_codes)] if len(self) else [],
+            'question': self.questions.tolist(),
+            'answer': answers[np.asarray(self.answer_ids)] if len(self) else [],
+            'original_question': originals[np.asarray(self.original_ids)] if len(self) else []
+        })
+
+    def save(self, path: Path = COLUMNAR_DATA_PATH):
+        """Écrit la table dans un dossier, remplacé en une seule bascule"""
+        path = Path(path)
+        tmp_dir = path.with_name(f".{path.name}.tmp")
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+
+        arrays: Dict[str, np.ndarray] = {
+            "questions_buffer": self.questions.buffer,
+            "questions_offsets": self.questions.offsets,
+            "answers_buffer": self.answers.buffer,
+            "answers_offsets": self.answers.offsets,
+            "answer_ids": self.answer_ids,
+            "category_codes": self.category_codes,
+            "originals_buffer": self.original_questions.buffer,
+            "originals_offsets": self.original_questions.offsets,
+            "original_ids": self.original_ids
+        }
+        for name, array in arrays.items():
+            np.save(tmp_dir / f"{name}.npy", np.asarray(array))
+
+        _write_meta(tmp_dir, len(self), self.data_hash, self.categories)
+        _replace_dir(tmp_dir, path)
+
+    @classmethod
+    def load(cls, path: Path = COLUMNAR_DATA_PATH, mmap: bool = True) -> "ColumnarTable":
+        """Charge la table par mmap, sans analyse de texte"""
+        path = Path(path)
+        with open(path / "meta.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("format_version") != COLUMNAR_FORMAT_VERSION:
+            raise ValueError(f"Format colonnaire non supporté : {meta.get('format_version')}")
+
+        mmap_mode = 'r' if mmap else None
+
+        def load_array(name: str) -> np.ndarray:
+            return np.load(path / f"{name}.npy", mmap_mode=mmap_mode)
+
+        return cls(
+            StringColumn(load_array("questions_buffer"), load_array("questions_offsets")),
+            StringColumn(load_array("answers_buffer"), load_array("answers_offsets")),
+            load_array("answer_ids"),
+            meta["categories"],
+            load_array("category_codes"),
+            StringColumn(load_array("originals_buffer"), load_array("originals_offsets")),
+            load_array("original_ids"),
+            meta["data_hash"]
+        )
+
+
+class ColumnarWriter:
+    """Écriture de la table par blocs, sans la garder en mémoire
+
+    Les lignes sont ajoutées au fil de l'eau dans des fichiers bruts ; seuls
+    les dictionnaires (réponses, catégories, questions d'origine) restent en
+    mémoire. close() produit les .npy, l'empreinte et bascule le dossier.
+    """
+
+    def __init__(self, path: Path = COLUMNAR_DATA_PATH):
+        self.path = Path(path)
+        self.tmp_dir = self.path.with_name(f".{self.path.name}.tmp")
+        if self.tmp_dir.exists():
+            shutil.rmtree(self.tmp_dir)
+        self.tmp_dir.mkdir(parents=True)
+
+        self.n_rows = 0
+        self._question_end = 0
+        self._answers: Dict[str, int] = {}
+        self._categories: Dict[str, int] = {}
+        self._originals: Dict[str, int] = {}
+        self._files = {
+            name: open(self.tmp_dir / f"{name}.bin", 'wb')
+            for name in ("questions_buffer", "questions_offsets", "answer_ids",
+                         "category_codes", "original_ids")
+        }
+        self._files["questions_offsets"].write(np.zeros(1, dtype=np.int64).tobytes())
+
+    @staticmethod
+    def _codes(dictionary: Dict[str, int], values: List[str], dtype) -> bytes:
+        codes = np.fromiter(
+            (dictionary.setdefault(value, len(dictionary)) for value in values),
+            dtype=dtype, count=len(values)
+        )
+        return codes.tobytes()
+
+    def append(self, categories: List[str], questions: List[str],
+               answers: List[str], original_questions: List[str]):
+        """Ajoute un bloc de lignes (listes de même longueur)"""
+        encoded = [question.encode('utf-8') for question in questions]
+        ends = np.cumsum([len(e) for e in encoded], dtype=np.int64) + self._question_end
+        if encoded:
+            self._question_end = int(ends[-1])
+
+        self._files["questions_buffer"].write(b''.join(encoded))
+        self._files["questions_offsets"].write(ends.tobytes())
+        self._files["answer_ids"].write(self._codes(self._answers, answers, np.int32))
+        self._files["category_codes"].write(self._codes(self._categories, categories, np.int16))
+        self._files["original_ids"].write(self._codes(self._originals, original_questions, np.int32))
+        self.n_rows += len(questions)
+
+    def close(self) -> ColumnarTable:
+        """Finalise les fichiers, calcule l'empreinte et remplace la table existante"""
+        dtypes = {
+            "questions_buffer": np.uint8,
+            "questions_offsets": np.int64,
+            "answer_ids": np.int32,
+            "category_codes": np.int16,
+            "original_ids": np.int32
+        }
+        for name, handle in self._files.items():
+            handle.close()
+            _bin_to_npy(self.tmp_dir / f"{name}.bin", self.tmp_dir / f"{name}.npy", dtypes[name])
+
+        for name, values in (("answers", self._answers), ("originals", self._originals)):
+            column = StringColumn.encode(values)
+            np.save(self.tmp_dir / f"{name}_buffer.npy", column.buffer)
+            np.save(self.tmp_dir / f"{name}_offsets.npy", column.offsets)
+
+        categories = list(self._categories)
+        _write_meta(self.tmp_dir, self.n_rows, "", categories)
+        # Empreinte calculée par blocs sur les colonnes en mmap : même valeur que from_dataframe
+        data_hash = ColumnarTable.load(self.tmp_dir)._content_hash()
+        _write_meta(self.tmp_dir, self.n_rows, data_hash, categories)
+
+        _replace_dir(self.tmp_dir, self.path)
+        return ColumnarTable.load(self.path)
+
+    def abort(self):
+        """Abandonne l'écriture (la table existante reste en place)"""
+        for handle in self._files.values():
+            handle.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def _update_digest(digest, array: np.ndarray):
+    """Ajoute un tableau à l'empreinte par blocs (évite la copie complète d'un mmap)"""
+    array = np.asarray(array)
+    step = max(1, _BLOCK_BYTES // max(1, array.itemsize))
+    for start in range(0, array.shape[0], step):
+        digest.update(np.ascontiguousarray(array[start:start + step]).tobytes())
+
+
+def _bin_to_npy(bin_path: Path, npy_path: Path, dtype):
+    """Convertit un fichier binaire brut en .npy (en-tête puis copie par blocs)"""
+    dtype = np.dtype(dtype)
+    n_items = bin_path.stat().st_size // dtype.itemsize
+    with open(npy_path, 'wb') as out, open(bin_path, 'rb') as src:
+        np.lib.format.write_array_header_1_0(out, {
+            'descr': np.lib.format.dtype_to_descr(dtype),
+            'fortran_order': False,
+            'shape': (n_items,)
+        })
+        shutil.copyfileobj(src, out, _BLOCK_BYTES)
+    bin_path.unlink()
+
+
+def _write_meta(directory: Path, n_rows: int, data_hash: str, categories: List[str]):
+    meta = {
+        "format_version": COLUMNAR_FORMAT_VERSION,
+        "n_rows": n_rows,
+        "data_hash": data_hash,
+        "categories": categories
+    }
+    with open(directory / "meta.json", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def _replace_dir(tmp_dir: Path, path: Path):
+    """Remplace le dossier de la table (les lecteurs en mmap gardent leurs fichiers)"""
+    old_dir = path.with_name(f".{path.name}.old")
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+    if path.exists():
+        os.replace(path, old_dir)
+    os.replace(tmp_dir, path)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_data_hash(path: Path = COLUMNAR_DATA_PATH) -> Optional[str]:
+    """Lit l'empreinte des données sans charger les colonnes"""
+    try:
+        with open(Path(path) / "meta.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if meta.get("format_version") != COLUMNAR_FORMAT_VERSION:
+        return None
+    return meta.get("data_hash")
@@ -0,0 +1,85 @@
+# src/conversation_context.py
+"""
+Contexte de conversation borné, propre à chaque session
+
+Seuls les derniers tours sont conservés (anneau de taille fixe) et chaque
+tour ne garde que l'essentiel pour la recherche : la catégorie de la
+réponse et le vecteur creux de la question. Une relance comme « et pour le
+master ? » hérite ainsi de la catégorie et des termes du tour précédent.
+"""
+import hashlib
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Vecteur creux d'une question : (termes, poids) pour chaque index de recherche
+QueryVector = List[Tuple[np.ndarray, np.ndarray]]
+
+
+class Turn:
+    """Un tour de conversation : catégorie répondue et vecteur de la question"""
+
+    __slots__ = ("category", "vector", "model_hash")
+
+    def __init__(self, category: str, vector: QueryVector, model_hash: str):
+        self.category = category
+        self.vector = vector
+        # Les numéros de termes ne valent que pour le modèle qui les a produits
+        self.model_hash = model_hash
+
+
+class ConversationContext:
+    """Anneau des derniers tours d'une session"""
+
+    def __init__(self, max_turns: int = 5, decay: float = 0.5):
+        self.turns: "deque[Turn]" = deque(maxlen=max_turns)
+        self.decay = decay
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def add(self, category: str, vector: QueryVector, model_hash: str):
+        """Enregistre un tour (le plus ancien sort de l'anneau)"""
+        self.turns.append(Turn(category, vector, model_hash))
+
+    def clear(self):
+        self.turns.clear()
+
+    def recent(self, model_hash: Optional[str] = None) -> Iterator[Tuple[float, Turn]]:
+        """Tours du plus récent au plus ancien, avec leur poids (decay ** âge)
+
+        Avec model_hash, seuls les tours dont le vecteur provient de ce modèle sont retenus.
+        """
+        for age, turn in enumerate(reversed(self.turns)):
+            if model_hash is None or turn.model_hash == model_hash:
+                yield self.decay ** age, turn
+
+    def category_weights(self) -> Dict[str, float]:
+        """Poids de chaque catégorie récente (plafonné à 1), hors réponses de repli"""
+        weights: Dict[str, float] = {}
+        for weight, turn in self.recent():
+            if turn.category != "unknown":
+                weights[turn.category] = min(1.0, weights.get(turn.category, 0.0) + weight)
+        return weights
+
+    def digest(self, model_hash: str) -> str:
+        """Empreinte de tout ce que la recherche lit dans le contexte pour ce modèle
+
+        Catégories et ordre des tours (d'où leurs poids), vecteurs des tours
+        issus de ce modèle : deux contextes de même empreinte donnent le même classement.
+        """
+        digest = hashlib.blake2b(repr(self.decay).encode('utf-8'), digest_size=16)
+        for _, turn in self.recent():
+            digest.update(turn.category.encode('utf-8') + b"\x1f")
+            if turn.model_hash == model_hash:
+                for terms, weights in turn.vector:
+                    digest.update(np.ascontiguousarray(terms, dtype=np.int64).tobytes())
+                    digest.update(np.ascontiguousarray(weights, dtype=np.float64).tobytes())
+            digest.update(b"\x1e")
+        return digest.hexdigest()
+
+    def dominant_category(self) -> Optional[str]:
+        """Catégorie récente de plus grand poids (None sans catégorie connue)"""
+        weights = self.category_weights()
+        return max(weights, key=weights.get) if weights else None
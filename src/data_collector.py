@@ -1,12 +1,22 @@
 # src/data_collector.py
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional
 import time
 import re
-from config.settings import RAW_DATA_DIR, DATA_SOURCES
+from config.settings import RAW_DATA_DIR, DATA_SOURCES, SCRAPER_CONFIG
+from http_fetcher import PoliteFetcher
+from page_parser import PageIndex, select_parser
+
+# Motifs des extracteurs, compilés une seule fois
+FORMATION_CLASS_PATTERN = re.compile(r'formation|course|program', re.I)
+STEP_PATTERN = re.compile(r'étape|step|procédure', re.I)
+DOCUMENT_PATTERN = re.compile(r'document|pièce|fournir', re.I)
+PRICE_PATTERN = re.compile(r'\d+[\s\.,]?\d*\s*(FCFA|€|euro|francs?)', re.I)
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'[\+\(]?[1-9][\d\s\(\)\.-]{8,}\d')
+ADDRESS_PATTERNS = [re.compile(keyword, re.I) for keyword in ['adresse', 'address', 'siège', 'localisation']]
 
 class DataCollector:
     """Classe pour collecter les données depuis diverses sources"""
@@ -19,8 +29,31 @@ class DataCollector:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        # Téléchargements concurrents sur la session partagée (pool de connexions)
+        self.fetcher = PoliteFetcher(
+            self.session,
+            cache_dir=SCRAPER_CONFIG["cache_dir"],
+            max_workers=SCRAPER_CONFIG["max_workers"],
+            per_host_concurrency=SCRAPER_CONFIG["per_host_concurrency"],
+            requests_per_second=SCRAPER_CONFIG["requests_per_second"],
+            burst=SCRAPER_CONFIG["burst"],
+            timeout=SCRAPER_CONFIG["timeout"],
+            respect_robots=SCRAPER_CONFIG["respect_robots"],
+            max_retries=SCRAPER_CONFIG["max_retries"],
+            backoff=SCRAPER_CONFIG["backoff"],
+            max_backoff=SCRAPER_CONFIG["max_backoff"]
+        )
+        # Backend d'analyse HTML (lxml si disponible)
+        self.parser = select_parser(SCRAPER_CONFIG["parser"])
+        # Extracteurs appliqués à chaque page sur le même index
+        self.extraction_handlers = [
+            self._extract_formations,
+            self._extract_admission,
+            self._extract_frais,
+            self._extract_contact
+        ]
     
-    def scrape_ifoad_website(self) -> Dict[str, str]:
+    def scrape_ifoad_website(self, pages_to_scrape: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         """
         Web scraping du site IFOAD-UJKZ
         """
@@ -29,36 +62,43 @@ class DataCollector:
         qa_data = {}
         
         try:
-            # URL du site IFOAD-UJKZ (à adapter selon le vrai site)
-            base_url = "https://www.ifoad-ujkz.net/formationenligne/course//index.php?categoryid=17"
+            if pages_to_scrape is None:
+                # URL du site IFOAD-UJKZ (à adapter selon le vrai site)
+                base_url = "https://www.ifoad-ujkz.net/formationenligne/course//index.php?categoryid=17"
+                
+                # Tentative de scraping des pages principales et des sources configurées
+                pages_to_scrape = {
+                    "formations": f"{base_url}formations/",
+                    "admission": f"{base_url}admission/", 
+                    "frais": f"{base_url}frais-scolarite/",
+                    "contact": f"{base_url}contact/",
+                    **DATA_SOURCES
+                }
             
-            # Tentative de scraping des pages principales
-            pages_to_scrape = {
-                "formations": f"{base_url}formations/",
-                "admission": f"{base_url}admission/", 
-                "frais": f"{base_url}frais-scolarite/",
-                "contact": f"{base_url}contact/"
-            }
+            # Téléchargement concurrent : la durée totale est celle de la page la plus lente
+            start = time.perf_counter()
+            results = self.fetcher.fetch_all(pages_to_scrape)
+            print(f"⏱️ {len(results)} pages récupérées en {time.perf_counter() - start:.2f}s")
             
-            for section, url in pages_to_scrape.items():
+            for section, result in results.items():
                 try:
-                    print(f"📄 Scraping de la page: {section}")
-                    response = self.session.get(url, timeout=10)
+                    if not result.ok:
+                        reason = result.error or f"HTTP {result.status}"
+                        print(f"⚠️ Erreur lors du scraping de {section}: {reason}")
+                        continue
                     
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        
-                        # Extraction des informations selon la section
-                        if section == "formations":
-                            qa_data.update(self._extract_formations(soup))
-                        elif section == "admission":
-                            qa_data.update(self._extract_admission(soup))
-                        elif section == "frais":
-                            qa_data.update(self._extract_frais(soup))
-                        elif section == "contact":
-                            qa_data.update(self._extract_contact(soup))
-                            
-                        time.sleep(2)  # Respectful delay
+                    source = "cache" if result.from_cache else f"{result.elapsed:.2f}s"
+                    print(f"📄 Scraping de la page: {section} ({source})")
+                    
+                    if 'html' not in result.headers.get('Content-Type', 'text/html'):
+                        # Documents non HTML (communiqués PDF...) : non analysés ici
+                        continue
+                    
+                    # Une seule analyse et un seul parcours de l'arbre par page
+                    page = PageIndex.parse(result.content, self.parser)
+                    print(f"   ⏱️ Analyse {self.parser} : {page.parse_time * 1000:.1f} ms, "
+                          f"parcours : {page.walk_time * 1000:.1f} ms")
+                    self._merge_sections(qa_data, self._extract_page(page))
                         
                 except Exception as e:
                     print(f"⚠️ Erreur lors du scraping de {section}: {e}")
@@ -69,26 +109,39 @@ class DataCollector:
             
         return qa_data
     
-    def _extract_formations(self, soup) -> Dict[str, str]:
+    def _extract_page(self, page: PageIndex) -> Dict:
+        """Applique tous les extracteurs sur l'index de la page"""
+        extracted = {}
+        for handler in self.extraction_handlers:
+            self._merge_sections(extracted, handler(page))
+        return extracted
+    
+    @staticmethod
+    def _merge_sections(qa_data: Dict, extracted: Dict):
+        """Fusionne les questions extraites d'une page dans les catégories existantes"""
+        for category, pairs in extracted.items():
+            qa_data.setdefault(category, {}).update(pairs)
+    
+    def _extract_formations(self, page: PageIndex) -> Dict[str, str]:
         """Extrait les informations sur les formations"""
         formations_data = {}
         
         try:
             # Recherche des sections de formations
-            formations_sections = soup.find_all(['div', 'section'], class_=re.compile(r'formation|course|program', re.I))
+            formations_sections = [
+                tag for tag in page.tags('div', 'section')
+                if FORMATION_CLASS_PATTERN.search(" ".join(tag.get('class') or []))
+            ]
             
             if not formations_sections:
                 # Fallback: recherche de listes
-                formations_list = soup.find_all(['ul', 'ol'])
-                for formation_list in formations_list:
-                    items = formation_list.find_all('li')
-                    for item in items:
-                        text = item.get_text(strip=True)
-                        if any(keyword in text.lower() for keyword in ['licence', 'master', 'bachelor', 'mba', 'formation']):
-                            formations_data[f"formation {text}"] = f"Description de la formation: {text}"
+                for item in page.tags('li'):
+                    text = item.get_text(strip=True)
+                    if any(keyword in text.lower() for keyword in ['licence', 'master', 'bachelor', 'mba', 'formation']):
+                        formations_data[f"formation {text}"] = f"Description de la formation: {text}"
             
             # Extraction des titres et descriptions
-            titles = soup.find_all(['h1', 'h2', 'h3', 'h4'])
+            titles = page.tags('h1', 'h2', 'h3', 'h4')
             for title in titles:
                 text = title.get_text(strip=True)
                 if any(keyword in text.lower() for keyword in ['licence', 'master', 'historique', 'formation', 'programme']):
@@ -107,23 +160,26 @@ class DataCollector:
             
         return {"formations": formations_data} if formations_data else {}
     
-    def _extract_admission(self, soup) -> Dict[str, str]:
+    def _extract_admission(self, page: PageIndex) -> Dict[str, str]:
         """Extrait les informations sur l'admission"""
         admission_data = {}
         
         try:
             # Recherche d'informations sur l'admission
-            content = soup.get_text().lower()
+            content = page.text_lower
             
             if 'admission' in content or 'inscription' in content:
                 # Extraction des étapes d'admission
-                steps = soup.find_all(['li', 'p', 'div'], string=re.compile(r'étape|step|procédure', re.I))
+                steps = [
+                    tag for tag in page.tags('li', 'p', 'div')
+                    if tag.string and STEP_PATTERN.search(tag.string)
+                ]
                 for step in steps[:5]:  # Limite à 5 étapes
                     step_text = step.get_text(strip=True)
                     admission_data[f"étape admission {len(admission_data)+1}"] = step_text
                 
                 # Documents requis
-                doc_elements = soup.find_all(string=re.compile(r'document|pièce|fournir', re.I))
+                doc_elements = [string for string in page.strings if DOCUMENT_PATTERN.search(string)]
                 for doc_elem in doc_elements[:3]:
                     parent = doc_elem.parent
                     if parent:
@@ -134,14 +190,13 @@ class DataCollector:
             
         return {"admission": admission_data} if admission_data else {}
     
-    def _extract_frais(self, soup) -> Dict[str, str]:
+    def _extract_frais(self, page: PageIndex) -> Dict[str, str]:
         """Extrait les informations sur les frais"""
         frais_data = {}
         
         try:
             # Recherche de prix et frais
-            price_pattern = re.compile(r'\d+[\s\.,]?\d*\s*(FCFA|€|euro|francs?)', re.I)
-            price_elements = soup.find_all(string=price_pattern)
+            price_elements = [string for string in page.strings if PRICE_PATTERN.search(string)]
             
             for elem in price_elements[:5]:
                 text = elem.get_text(strip=True)
@@ -152,25 +207,24 @@ class DataCollector:
             
         return {"frais": frais_data} if frais_data else {}
     
-    def _extract_contact(self, soup) -> Dict[str, str]:
+    def _extract_contact(self, page: PageIndex) -> Dict[str, str]:
         """Extrait les informations de contact"""
         contact_data = {}
         
         try:
             # Recherche d'emails
-            emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', soup.get_text())
+            emails = EMAIL_PATTERN.findall(page.text)
             if emails:
                 contact_data["email contact"] = f"Email: {emails[0]}"
             
             # Recherche de numéros de téléphone
-            phones = re.findall(r'[\+\(]?[1-9][\d\s\(\)\.-]{8,}\d', soup.get_text())
+            phones = PHONE_PATTERN.findall(page.text)
             if phones:
                 contact_data["téléphone"] = f"Téléphone: {phones[0]}"
                 
             # Recherche d'adresse
-            address_keywords = ['adresse', 'address', 'siège', 'localisation']
-            for keyword in address_keywords:
-                elem = soup.find(string=re.compile(keyword, re.I))
+            for pattern in ADDRESS_PATTERNS:
+                elem = next((string for string in page.strings if pattern.search(string)), None)
                 if elem and elem.parent:
                     contact_data["adresse"] = elem.parent.get_text(strip=True)
                     break
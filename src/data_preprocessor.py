@@ -1,18 +1,36 @@
 # src/data_preprocessor.py
+import hashlib
 import json
-import re
-from typing import Dict, List, Tuple
+import os
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
 import pandas as pd
-from config.settings import RAW_DATA_DIR, PROCESSED_DATA_DIR
+from config.settings import RAW_DATA_DIR, PROCESSED_DATA_DIR, PREPROCESS_CONFIG
+from columnar_store import COLUMNAR_DATA_PATH, ColumnarTable, ColumnarWriter
+from digest_set import DigestSet
+from text_normalizer import normalize
+
+# Version du manifeste du prétraitement incrémental (JSON Lines depuis la version 2)
+MANIFEST_VERSION = 2
+
+# Colonnes des données d'entraînement, dans l'ordre du CSV
+TRAINING_COLUMNS = ['category', 'question', 'answer', 'original_question']
 
 class DataPreprocessor:
     """Classe pour le prétraitement des données du chatbot"""
     
-    def __init__(self):
-        self.raw_data_path = RAW_DATA_DIR / "ifoad_data.json"
-        self.processed_data_path = PROCESSED_DATA_DIR / "training_data.csv"
+    def __init__(self, raw_data_path: Optional[Path] = None, processed_dir: Optional[Path] = None):
+        self.raw_data_path = Path(raw_data_path) if raw_data_path else RAW_DATA_DIR / "ifoad_data.json"
+        processed_dir = Path(processed_dir) if processed_dir else PROCESSED_DATA_DIR
+        self.processed_data_path = processed_dir / "training_data.csv"
+        self.manifest_path = processed_dir / "training_manifest.json"
+        self.columnar_data_path = processed_dir / COLUMNAR_DATA_PATH.name
         # Assure que les dossiers existent
-        PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
+        processed_dir.mkdir(parents=True, exist_ok=True)
     
     def load_raw_data(self) -> Dict:
         """Charge les données brutes"""
@@ -27,28 +45,8 @@ class DataPreprocessor:
             return {}
     
     def clean_text(self, text: str) -> str:
-        """Nettoie le texte"""
-        text = text.lower().strip()
-        text = re.sub(r'[^\w\s]', ' ', text)  # Supprime la ponctuation
-        text = re.sub(r'\s+', ' ', text)      # Supprime les espaces multiples
-        return text
-    
-    def clean_text(self, text: str) -> str:
-        """Nettoie le texte"""
-    # Liste basique de mots vides français
-        french_stop_words = {'le', 'la', 'les', 'de', 'des', 'du', 'et', 'en', 'un', 'une', 'à', 'au', 'aux', 'dans', 'pour', 'par', 'sur', 'avec', 'est', 'son', 'ses', 'ces', 'cet', 'cette', 'qui', 'que', 'quoi', 'quand', 'où', 'comment', 'pourquoi'}
-        
-        text = text.lower().strip()
-        text = re.sub(r'[^\w\s]', ' ', text)  # Supprime la ponctuation
-        text = re.sub(r'\s+', ' ', text)      # Supprime les espaces multiples
-        
-        # Suppression simple des mots vides
-        words = text.split()
-        words = [word for word in words if word not in french_stop_words and len(word) > 2]
-        text = ' '.join(words)
-        
-        return text
-
+        """Nettoie le texte (minuscules, ponctuation, mots vides)"""
+        return normalize(text)
     
     def expand_questions(self, base_question: str) -> List[str]:
         """Génère des variations de questions"""
@@ -89,61 +87,274 @@ class DataPreprocessor:
         ]
         variations.extend(punctuation_variations)
         
-        # Suppression des doublons
-        return list(set(variations))
+        # Suppression des doublons (ordre conservé pour un résultat reproductible)
+        return list(dict.fromkeys(variations))
     
-    def prepare_training_data(self) -> pd.DataFrame:
-        """Prépare les données pour l'entraînement"""
-        print("🔧 Début du prétraitement des données...")
+    def entry_hash(self, category: str, question: str, answer: str) -> str:
+        """Empreinte d'un triplet (catégorie, question, réponse)"""
+        payload = json.dumps([category, question, answer], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def iter_raw_entries(self) -> Iterator[Tuple[str, str, str]]:
+        """Parcourt les triplets (catégorie, question, réponse) des données brutes
         
-        raw_data = self.load_raw_data()
-        if not raw_data:
-            print("❌ Aucune donnée à prétraiter")
-            return pd.DataFrame()
+        Avec ijson (optionnel), le JSON est lu en flux ; sinon il est chargé en entier.
+        """
+        try:
+            import ijson
+        except ImportError:
+            for category, qa_pairs in self.load_raw_data().items():
+                for question, answer in qa_pairs.items():
+                    yield category, question, answer
+            return
         
-        training_pairs = []
+        if not self.raw_data_path.exists():
+            print(f"❌ Fichier {self.raw_data_path} non trouvé")
+            return
         
-        for category, qa_pairs in raw_data.items():
-            print(f"  📁 Traitement de la catégorie : {category}")
-            for question, answer in qa_pairs.items():
-                # Nettoyage
-                clean_question = self.clean_text(question)
-                clean_answer = answer
-                
-                # Expansion des questions
-                question_variations = self.expand_questions(clean_question)
+        # Structure attendue : {catégorie: {question: réponse}}
+        depth = 0
+        category = question = None
+        with open(self.raw_data_path, 'rb') as f:
+            try:
+                for _, event, value in ijson.parse(f):
+                    if event == 'start_map':
+                        depth += 1
+                    elif event == 'end_map':
+                        depth -= 1
+                    elif event == 'map_key':
+                        if depth == 1:
+                            category = value
+                        elif depth == 2:
+                            question = value
+                    elif event == 'string' and depth == 2:
+                        yield category, question, value
+            except ijson.JSONError as e:
+                raise ValueError(f"JSON invalide : {e}") from e
+    
+    def load_manifest(self) -> Dict[str, Tuple[str, str, int]]:
+        """Index du manifeste du dernier prétraitement : empreinte -> (catégorie, question, position)
+        
+        Les variations ne sont pas gardées en mémoire : elles sont relues à leur
+        position dans le fichier quand l'entrée est reprise.
+        """
+        index = {}
+        try:
+            with open(self.manifest_path, 'rb') as f:
+                header = json.loads(f.readline() or b'{}')
+                if not isinstance(header, dict) or header.get("version") != MANIFEST_VERSION:
+                    return {}
+                offset = f.tell()
+                for line in f:
+                    entry = json.loads(line)
+                    index[entry['key']] = (entry['category'], entry['original_question'], offset)
+                    offset += len(line)
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return {}
+        return index
+    
+    @staticmethod
+    def _read_manifest_variations(manifest_file, offset: int) -> List[str]:
+        """Relit les variations d'une entrée du manifeste"""
+        manifest_file.seek(offset)
+        return json.loads(manifest_file.readline())['variations']
+    
+    def _expanded_entries(self, previous: Dict[str, Tuple[str, str, int]], previous_file,
+                          stats: Counter, workers: int = 1) -> Iterator[Tuple[str, str, str, str, List[str]]]:
+        """Entrées brutes avec leurs variations, reprises du manifeste ou expansées à la volée
+        
+        Avec workers > 1, l'expansion des lots d'entrées est répartie sur un pool
+        de processus. Les lots sont rendus dans l'ordre de lecture : le résultat
+        ne dépend pas du nombre de workers.
+        """
+        previous_keys = {(category, question) for category, question, _ in previous.values()}
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        # Lots en cours de traitement, bornés pour garder une mémoire constante
+        pending = deque()
+        
+        def finish(batch, expanded):
+            expanded = iter(expanded)
+            for key, category, question, answer in batch:
+                if key in previous:
+                    # Entrée inchangée : variations reprises du manifeste
+                    question_variations = self._read_manifest_variations(previous_file, previous[key][2])
+                    stats['reused'] += 1
+                else:
+                    question_variations = next(expanded)
+                    stats['modified' if (category, question) in previous_keys else 'added'] += 1
+                yield key, category, question, answer, question_variations
+        
+        try:
+            for batch in self._keyed_batches(PREPROCESS_CONFIG["batch_size"]):
+                to_expand = [question for key, _, question, _ in batch if key not in previous]
+                if executor is None:
+                    yield from finish(batch, _expand_batch(self, to_expand))
+                    continue
                 
-                for variation in question_variations:
-                    training_pairs.append({
-                        'category': category,
-                        'question': variation,
-                        'answer': clean_answer,
-                        'original_question': question
-                    })
+                if to_expand:
+                    future = executor.submit(_expand_batch, self, to_expand)
+                else:
+                    # Lot entièrement repris : il passe quand même par la file pour garder l'ordre
+                    future = Future()
+                    future.set_result([])
+                pending.append((batch, future))
+                if len(pending) >= 2 * workers:
+                    batch, future = pending.popleft()
+                    yield from finish(batch, future.result())
+            
+            while pending:
+                batch, future = pending.popleft()
+                yield from finish(batch, future.result())
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+    
+    def _keyed_batches(self, batch_size: int) -> Iterator[List[Tuple[str, str, str, str]]]:
+        """Lots d'entrées brutes (empreinte, catégorie, question, réponse)"""
+        current_category = None
+        batch = []
+        for category, question, answer in self.iter_raw_entries():
+            if category != current_category:
+                print(f"  📁 Traitement de la catégorie : {category}")
+                current_category = category
+            batch.append((self.entry_hash(category, question, answer), category, question, answer))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def prepare_training_data(self, incremental: bool = False,
+                              chunk_size: int = PREPROCESS_CONFIG["chunk_size"],
+                              workers: Optional[int] = None) -> Optional[ColumnarTable]:
+        """Prépare les données pour l'entraînement
         
-        if not training_pairs:
-            print("❌ Aucune paire question-réponse générée")
-            return pd.DataFrame()
+        Pipeline en flux : lecture des entrées brutes, expansion entrée par
+        entrée, dédoublonnage par empreinte et écriture par blocs de chunk_size
+        lignes. Les empreintes des lignes écrites vont dans un DigestSet, sur
+        disque au-delà de dedup_memory : la mémoire ne dépend pas du nombre de
+        lignes générées.
         
-        df = pd.DataFrame(training_pairs)
+        En mode incrémental, seules les entrées ajoutées ou modifiées depuis
+        le dernier passage sont réexpansées ; les autres sont reprises du manifeste.
+        Avec workers > 1, l'expansion est parallélisée sur plusieurs processus.
+        """
+        print("🔧 Début du prétraitement des données...")
+        workers = PREPROCESS_CONFIG["workers"] if workers is None else workers
+        workers = workers or os.cpu_count() or 1
+        if workers > 1:
+            print(f"  ⚙️ Expansion parallèle sur {workers} processus")
+        
+        previous = self.load_manifest() if incremental and self.processed_data_path.exists() else {}
+        stats = Counter()
+        category_counts = Counter()
+        # Entrées présentes, pour compter les suppressions (mode incrémental seulement)
+        current_keys = set()
+        n_entries = 0
         
-        # Suppression des doublons
-        df = df.drop_duplicates(subset=['question'])
+        csv_tmp = self.processed_data_path.with_name(f".{self.processed_data_path.name}.tmp")
+        manifest_tmp = self.manifest_path.with_name(f".{self.manifest_path.name}.tmp")
+        writer = ColumnarWriter(self.columnar_data_path)
+        table = None
         
-        # Sauvegarde
         try:
-            df.to_csv(self.processed_data_path, index=False, encoding='utf-8')
+            with open(csv_tmp, 'w', encoding='utf-8', newline='') as csv_file, \
+                    open(manifest_tmp, 'w', encoding='utf-8') as manifest_file, \
+                    (open(self.manifest_path, 'rb') if previous else nullcontext()) as previous_file, \
+                    DigestSet(PREPROCESS_CONFIG["dedup_memory"], self.processed_data_path.parent) as seen:
+                manifest_file.write(json.dumps({"version": MANIFEST_VERSION}) + "\n")
+                chunk = {column: [] for column in TRAINING_COLUMNS}
+                
+                for key, category, question, answer, variations in self._expanded_entries(
+                        previous, previous_file, stats, workers):
+                    n_entries += 1
+                    if incremental:
+                        current_keys.add((category, question))
+                    manifest_file.write(json.dumps({
+                        'key': key,
+                        'category': category,
+                        'original_question': question,
+                        'variations': variations
+                    }, ensure_ascii=False) + "\n")
+                    
+                    for variation in variations:
+                        for column, value in zip(TRAINING_COLUMNS, (category, variation, answer, question)):
+                            chunk[column].append(value)
+                    
+                    if len(chunk['question']) >= chunk_size:
+                        self._write_chunk(self._new_rows(chunk, seen, category_counts), csv_file, writer)
+                        chunk = {column: [] for column in TRAINING_COLUMNS}
+                
+                if chunk['question']:
+                    self._write_chunk(self._new_rows(chunk, seen, category_counts), csv_file, writer)
+            
+            if not n_entries:
+                print("❌ Aucune donnée à prétraiter")
+                return None
+            if writer.n_rows == 0:
+                print("❌ Aucune paire question-réponse générée")
+                return None
+            
+            if incremental:
+                previous_keys = {(category, question) for category, question, _ in previous.values()}
+                removed = len(previous_keys - current_keys)
+                print(f"  ♻️ Incrémental : {stats['reused']} reprises, {stats['added']} ajoutées, "
+                      f"{stats['modified']} modifiées, {removed} supprimées")
+            
+            # Sauvegarde : format colonnaire lu par le moteur, le CSV reste l'export lisible
+            table = writer.close()
+            os.replace(csv_tmp, self.processed_data_path)
+            os.replace(manifest_tmp, self.manifest_path)
+            
             print(f"✅ Données préparées sauvegardées dans {self.processed_data_path}")
-            print(f"📊 {len(df)} paires question-réponse générées")
-            print(f"📁 Catégories : {df['category'].nunique()}")
+            print(f"📊 {len(table)} paires question-réponse générées")
+            print(f"📁 Catégories : {len(category_counts)}")
             
             # Aperçu des données
             print("\n📋 Aperçu des données :")
-            for category in df['category'].unique():
-                count = len(df[df['category'] == category])
+            for category, count in category_counts.items():
                 print(f"   • {category}: {count} questions")
-                
+        
+        except ValueError as e:
+            print(f"❌ Erreur de lecture des données : {e}")
         except Exception as e:
             print(f"❌ Erreur lors de la sauvegarde : {e}")
+        finally:
+            if table is None:
+                writer.abort()
+            for tmp_path in (csv_tmp, manifest_tmp):
+                if tmp_path.exists():
+                    tmp_path.unlink()
         
-        return df
\ No newline at end of file
+        return table
+    
+    @staticmethod
+    def _new_rows(chunk: Dict[str, List[str]], seen: DigestSet,
+                  category_counts: Counter) -> Dict[str, List[str]]:
+        """Lignes du bloc dont la question n'a pas encore été écrite (première occurrence conservée)"""
+        # Empreintes 64 bits des questions (8 octets au lieu de la chaîne)
+        digests = np.frombuffer(b''.join(
+            hashlib.blake2b(question.encode('utf-8'), digest_size=8).digest() for question in chunk['question']
+        ), dtype='<u8')
+        _, first = np.unique(digests, return_index=True)
+        first.sort()
+        keep = first[~seen.contains(digests[first])]
+        seen.add(digests[keep])
+        keep = keep.tolist()
+        category_counts.update(chunk['category'][i] for i in keep)
+        return {column: [values[i] for i in keep] for column, values in chunk.items()}
+    
+    @staticmethod
+    def _write_chunk(chunk: Dict[str, List[str]], csv_file, writer: ColumnarWriter):
+        """Écrit un bloc de lignes dans le CSV et dans la table colonnaire"""
+        if not chunk['question']:
+            return
+        pd.DataFrame(chunk, columns=TRAINING_COLUMNS).to_csv(
+            csv_file, index=False, header=writer.n_rows == 0
+        )
+        writer.append(chunk['category'], chunk['question'], chunk['answer'], chunk['original_question'])
+
+
+def _expand_batch(preprocessor: DataPreprocessor, questions: List[str]) -> List[List[str]]:
+    """Nettoie puis expanse un lot de questions (exécuté dans un worker du pool)"""
+    return [preprocessor.expand_questions(preprocessor.clean_text(question)) for question in questions]
@@ -0,0 +1,166 @@
+# src/dense_index.py
+"""
+Recherche sémantique par plongements de phrases (optionnelle)
+
+Un petit modèle de plongements (sentence-transformers, fichiers locaux, CPU)
+encode les questions à l'entraînement. Les vecteurs sont stockés en float16
+(mmap) et regroupés par listes d'un index IVF : une requête ne compare son
+vecteur qu'aux lignes des n_probe listes dont le centroïde est le plus proche.
+Rapproche des questions sans mot commun (« combien coûte la licence » /
+« quels sont les frais de scolarité »).
+"""
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from config.settings import MODEL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Itérations du k-means sphérique qui place les centroïdes
+KMEANS_ITERATIONS = 10
+
+# Lignes comparées aux centroïdes par bloc pendant l'entraînement
+_ASSIGN_BLOCK = 8192
+
+
+class SentenceEncoder:
+    """Modèle de plongements chargé depuis un dossier local, sur CPU"""
+
+    def __init__(self, model_path: Path, batch_size: int = 64):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(str(model_path), device="cpu")
+        self.batch_size = batch_size
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Plongements normalisés L2 (float32) : le produit scalaire est la similarité cosinus"""
+        return self.model.encode(
+            texts, batch_size=self.batch_size, convert_to_numpy=True,
+            normalize_embeddings=True, show_progress_bar=False
+        ).astype(np.float32, copy=False)
+
+
+@lru_cache(maxsize=2)
+def load_encoder(model_path: str, batch_size: int = 64) -> Optional[SentenceEncoder]:
+    """Charge le modèle de plongements une fois par processus (None si indisponible)"""
+    if not Path(model_path).exists():
+        logger.warning("Modèle de plongements introuvable (%s) : recherche sémantique désactivée", model_path)
+        return None
+    try:
+        return SentenceEncoder(Path(model_path), batch_size)
+    except ImportError:
+        logger.warning("sentence-transformers non installé : recherche sémantique désactivée")
+        return None
+
+
+def dense_params() -> Optional[dict]:
+    """Paramètres de l'index sémantique enregistrés avec le modèle (None si désactivé ou indisponible)"""
+    config = MODEL_CONFIG["dense_retrieval"]
+    if not config["enabled"]:
+        return None
+    encoder = load_encoder(str(config["model_path"]), config["batch_size"])
+    if encoder is None:
+        return None
+    return {
+        "model_path": str(config["model_path"]),
+        "dimension": encoder.dimension,
+        "n_lists": config["n_lists"],
+        "weight": config["weight"]
+    }
+
+
+def _assign(embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Liste (centroïde le plus proche) de chaque ligne, par blocs pour borner la mémoire"""
+    assignments = np.empty(embeddings.shape[0], dtype=np.int64)
+    for start in range(0, embeddings.shape[0], _ASSIGN_BLOCK):
+        block = embeddings[start:start + _ASSIGN_BLOCK]
+        assignments[start:start + _ASSIGN_BLOCK] = (block @ centroids.T).argmax(axis=1)
+    return assignments
+
+
+class DenseIndex:
+    """Index IVF de plongements float16 : lignes regroupées par liste, listes contiguës
+
+    Les lignes de la liste l occupent embeddings[list_offsets[l]:list_offsets[l + 1]],
+    row_ids donne leur numéro de ligne dans le modèle.
+    """
+
+    def __init__(self, embeddings: np.ndarray, row_ids: np.ndarray,
+                 centroids: np.ndarray, list_offsets: np.ndarray):
+        self.embeddings = embeddings
+        self.row_ids = row_ids
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def fit(cls, embeddings: np.ndarray, n_lists: Optional[int] = None, seed: int = 0) -> "DenseIndex":
+        """Place les centroïdes (k-means sphérique) puis range les lignes par liste"""
+        n_rows = embeddings.shape[0]
+        if n_rows == 0:
+            return cls(embeddings.astype(np.float16), np.zeros(0, dtype=np.int32),
+                       np.zeros((0, embeddings.shape[1]), dtype=np.float32), np.zeros(1, dtype=np.int64))
+        # Environ racine de n listes : coût de sondage et taille des listes équilibrés
+        n_lists = min(n_lists or max(1, int(np.sqrt(n_rows))), n_rows)
+        rng = np.random.default_rng(seed)
+        centroids = embeddings[rng.choice(n_rows, n_lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignments = _assign(embeddings, centroids)
+            # Somme des lignes de chaque liste (matrice d'appartenance creuse)
+            membership = sparse.csr_matrix(
+                (np.ones(n_rows, dtype=np.float32), (assignments, np.arange(n_rows))),
+                shape=(n_lists, n_rows)
+            )
+            sums = np.asarray(membership @ embeddings)
+            norms = np.linalg.norm(sums, axis=1)
+            # Une liste vide garde son centroïde précédent
+            filled = norms > 0
+            centroids[filled] = sums[filled] / norms[filled, None]
+
+        assignments = _assign(embeddings, centroids)
+        order = np.argsort(assignments, kind='stable')
+        list_offsets = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        return cls(embeddings[order].astype(np.float16), order.astype(np.int32),
+                   centroids.astype(np.float32), list_offsets.astype(np.int64))
+
+    def search(self, query: np.ndarray, n_probe: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Lignes des n_probe listes les plus proches et leur similarité cosinus (négatifs ramenés à 0)"""
+        if self.n_lists == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        n_probe = min(n_probe, self.n_lists)
+        probes = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        starts = self.list_offsets[probes]
+        lengths = self.list_offsets[probes + 1] - starts
+        total = int(lengths.sum())
+        shifts = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        positions = shifts + np.arange(total)
+        scores = self.embeddings[positions].astype(np.float32) @ query
+        return self.row_ids[positions].astype(np.int64), np.maximum(scores, 0.0).astype(np.float64)
+
+    def save(self, directory: Path):
+        """Écrit l'index (les plongements restent en float16)"""
+        np.save(directory / "dense_embeddings.npy", self.embeddings)
+        np.save(directory / "dense_row_ids.npy", self.row_ids)
+        np.save(directory / "dense_centroids.npy", self.centroids)
+        np.save(directory / "dense_list_offsets.npy", self.list_offsets)
+
+    @classmethod
+    def load(cls, directory: Path, mmap_mode: Optional[str] = 'r') -> "DenseIndex":
+        """Relit l'index, plongements en mmap"""
+        return cls(
+            np.load(directory / "dense_embeddings.npy", mmap_mode=mmap_mode),
+            np.load(directory / "dense_row_ids.npy", mmap_mode=mmap_mode),
+            np.load(directory / "dense_centroids.npy"),
+            np.load(directory / "dense_list_offsets.npy")
+        )
@@ -0,0 +1,120 @@
+# src/digest_set.py
+"""
+Ensemble d'empreintes 64 bits à mémoire bornée
+
+Les empreintes sont rangées en séries triées (uint64). Une série de plus de
+memory_limit empreintes est écrite sur disque et lue par mmap. Les séries de
+même niveau sont fusionnées deux à deux par blocs (compteur binaire) : environ
+log2(n / memory_limit) séries sur disque, et une recherche binaire par série.
+La mémoire dépend de memory_limit et non du nombre d'empreintes ajoutées.
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Empreintes lues par bloc pendant la fusion de deux séries
+_MERGE_BLOCK = 1 << 18
+
+
+class DigestSet:
+    """Ensemble d'empreintes uint64 réparti en séries triées, en mémoire ou sur disque"""
+
+    def __init__(self, memory_limit: int = 1_000_000, directory: Optional[Path] = None):
+        self.memory_limit = max(1, memory_limit)
+        self._directory = tempfile.TemporaryDirectory(prefix=".digests_", dir=directory,
+                                                      ignore_cleanup_errors=True)
+        # (niveau, série triée) du plus ancien au plus récent
+        self._runs: List[Tuple[int, np.ndarray]] = []
+        self._files = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def contains(self, digests: np.ndarray) -> np.ndarray:
+        """Masque des empreintes déjà présentes"""
+        digests = np.asarray(digests, dtype=np.uint64)
+        found = np.zeros(len(digests), dtype=bool)
+        for _, run in self._runs:
+            positions = np.searchsorted(run, digests)
+            inside = positions < len(run)
+            found[inside] |= run[positions[inside]] == digests[inside]
+        return found
+
+    def add(self, digests: np.ndarray):
+        """Ajoute des empreintes absentes de l'ensemble et distinctes entre elles"""
+        if not len(digests):
+            return
+        self.size += len(digests)
+        self._runs.append((0, self._store(np.sort(digests.astype(np.uint64)))))
+        while len(self._runs) > 1 and self._runs[-1][0] == self._runs[-2][0]:
+            level, newer = self._runs.pop()
+            _, older = self._runs.pop()
+            self._runs.append((level + 1, self._merge(older, newer)))
+
+    def _store(self, run: np.ndarray) -> np.ndarray:
+        """Garde la série en mémoire si elle est petite, sinon l'écrit sur disque (mmap)"""
+        if len(run) <= self.memory_limit:
+            return run
+        path = self._next_path()
+        run.tofile(path)
+        return np.memmap(path, dtype=np.uint64, mode='r')
+
+    def _next_path(self) -> Path:
+        self._files += 1
+        return Path(self._directory.name) / f"run_{self._files}.u64"
+
+    def _merge(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Fusionne deux séries triées par blocs, sans les charger entières"""
+        total = len(a) + len(b)
+        if total <= self.memory_limit:
+            merged = np.concatenate([a, b])
+            merged.sort(kind='mergesort')
+        else:
+            # Écriture séquentielle du résultat (un fichier rempli par mmap est lent à supprimer)
+            path = self._next_path()
+            with open(path, 'wb') as f:
+                i = j = 0
+                while i < len(a) and j < len(b):
+                    block_a = np.asarray(a[i:i + _MERGE_BLOCK])
+                    block_b = np.asarray(b[j:j + _MERGE_BLOCK])
+                    # Tout ce qui est ≤ la plus petite des deux fins de bloc est définitif
+                    bound = min(block_a[-1], block_b[-1])
+                    n_a = int(np.searchsorted(block_a, bound, side='right'))
+                    n_b = int(np.searchsorted(block_b, bound, side='right'))
+                    block = np.concatenate([block_a[:n_a], block_b[:n_b]])
+                    block.sort(kind='mergesort')
+                    block.tofile(f)
+                    i, j = i + n_a, j + n_b
+                for rest, start in ((a, i), (b, j)):
+                    for k in range(start, len(rest), _MERGE_BLOCK):
+                        np.asarray(rest[k:k + _MERGE_BLOCK]).tofile(f)
+            merged = np.memmap(path, dtype=np.uint64, mode='r')
+        for run in (a, b):
+            self._discard(run)
+        return merged
+
+    @staticmethod
+    def _discard(run: np.ndarray):
+        """Supprime le fichier d'une série fusionnée"""
+        if isinstance(run, np.memmap) and run.filename:
+            try:
+                os.unlink(run.filename)
+            except OSError:
+                # Windows : fichier encore projeté, supprimé avec le dossier à la fermeture
+                pass
+
+    def close(self):
+        """Supprime les séries écrites sur disque"""
+        self._runs = []
+        self._directory.cleanup()
+
+    def __enter__(self) -> "DigestSet":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
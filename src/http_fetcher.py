@@ -0,0 +1,250 @@
+# src/http_fetcher.py
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import TokenBucket
+
+# Statuts par lesquels le serveur demande de ralentir
+_RETRY_STATUSES = (429, 503)
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Délai d'un en-tête Retry-After (secondes ou date HTTP), None s'il est absent ou invalide"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class FetchResult:
+    """Résultat d'un téléchargement"""
+
+    def __init__(self, url: str, status: int, content: bytes = b"", headers: Optional[Dict] = None,
+                 from_cache: bool = False, elapsed: float = 0.0, error: Optional[str] = None):
+        self.url = url
+        self.status = status
+        self.content = content
+        self.headers = headers or {}
+        self.from_cache = from_cache
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status == 200
+
+
+class HttpCache:
+    """Cache HTTP local : corps des pages et validateurs ETag / Last-Modified"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Métadonnées en cache pour une URL (avec le corps), ou None"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            meta["content"] = body_path.read_bytes()
+        except (OSError, json.JSONDecodeError):
+            return None
+        return meta
+
+    def put(self, url: str, content: bytes, headers: Dict):
+        """Enregistre une réponse 200 si elle porte un validateur"""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        meta_path, body_path = self._paths(url)
+        body_path.write_bytes(content)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_type": headers.get('Content-Type', ''),
+            "stored_at": time.time()
+        }
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+
+class PoliteFetcher:
+    """Téléchargement concurrent et respectueux des serveurs
+
+    - pool de connexions partagé via la session requests
+    - nombre de requêtes simultanées limité par hôte
+    - débit limité par hôte avec un seau à jetons
+    - requêtes conditionnelles (If-None-Match / If-Modified-Since) sur cache local
+    - règles robots.txt (Disallow, Crawl-delay) lues une fois par hôte
+    - sur 429 ou 503, hôte en pause pendant Retry-After (ou recul exponentiel) puis nouvel essai
+    """
+
+    def __init__(self, session: requests.Session, cache_dir: Optional[Path] = None,
+                 max_workers: int = 8, per_host_concurrency: int = 4,
+                 requests_per_second: float = 4.0, burst: int = 4, timeout: float = 10,
+                 respect_robots: bool = True, max_retries: int = 3,
+                 backoff: float = 1.0, max_backoff: float = 60.0):
+        self.session = session
+        self.max_workers = max_workers
+        self.per_host_concurrency = per_host_concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.timeout = timeout
+        self.respect_robots = respect_robots
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+
+        # Pool de connexions dimensionné pour les threads de téléchargement
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._hosts_lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        # Pas de requête vers l'hôte avant cette date (horloge monotone) après un 429 / 503
+        self._host_resume: Dict[str, float] = {}
+        self._robots: Dict[str, RobotFileParser] = {}
+        self._robots_locks: Dict[str, threading.Lock] = {}
+
+    def _host_limits(self, url: str):
+        """Sémaphore et seau à jetons associés à l'hôte de l'URL"""
+        host = urlsplit(url).netloc
+        with self._hosts_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_concurrency)
+                self._host_buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+            return self._host_slots[host], self._host_buckets[host]
+
+    def _allowed(self, url: str) -> bool:
+        """URL permise par le robots.txt de son hôte (téléchargé au premier accès)"""
+        parts = urlsplit(url)
+        with self._hosts_lock:
+            lock = self._robots_locks.setdefault(parts.netloc, threading.Lock())
+        with lock:
+            robots = self._robots.get(parts.netloc)
+            if robots is None:
+                robots = self._robots[parts.netloc] = self._load_robots(f"{parts.scheme}://{parts.netloc}")
+        return robots.can_fetch(self.session.headers.get('User-Agent', '*'), url)
+
+    def _load_robots(self, origin: str) -> RobotFileParser:
+        """Télécharge et analyse le robots.txt d'un hôte (RFC 9309)"""
+        robots = RobotFileParser(f"{origin}/robots.txt")
+        slot, bucket = self._host_limits(origin)
+        with slot:
+            bucket.acquire()
+            try:
+                response = self.session.get(robots.url, timeout=self.timeout)
+            except requests.RequestException:
+                response = None
+        if response is None or response.status_code >= 500:
+            # Règles inaccessibles : l'hôte est considéré entièrement interdit
+            robots.disallow_all = True
+        elif response.status_code >= 400:
+            # Pas de robots.txt : tout est permis
+            robots.allow_all = True
+        else:
+            robots.parse(response.text.splitlines())
+            delay = robots.crawl_delay(self.session.headers.get('User-Agent', '*'))
+            if delay:
+                # Crawl-delay : une requête au plus toutes les `delay` secondes
+                with self._hosts_lock:
+                    self._host_buckets[urlsplit(origin).netloc] = TokenBucket(
+                        min(self.requests_per_second, 1.0 / float(delay)), 1)
+        return robots
+
+    def _pause_host(self, host: str, delay: float):
+        """Suspend les requêtes vers l'hôte pendant delay secondes"""
+        with self._hosts_lock:
+            self._host_resume[host] = max(self._host_resume.get(host, 0.0), time.monotonic() + delay)
+
+    def _wait_host(self, host: str):
+        """Attend la fin d'une pause de l'hôte"""
+        while True:
+            with self._hosts_lock:
+                remaining = self._host_resume.get(host, 0.0) - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def fetch(self, url: str) -> FetchResult:
+        """Télécharge une URL (requête conditionnelle si elle est en cache)
+
+        Une URL interdite par robots.txt n'est pas demandée. Sur 429 ou 503,
+        la requête est répétée jusqu'à max_retries fois.
+        """
+        if self.respect_robots and not self._allowed(url):
+            return FetchResult(url, 0, error="interdit par robots.txt")
+        host = urlsplit(url).netloc
+        slot, bucket = self._host_limits(url)
+        cached = self.cache.get(url) if self.cache else None
+
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers['If-None-Match'] = cached["etag"]
+            if cached.get("last_modified"):
+                headers['If-Modified-Since'] = cached["last_modified"]
+
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            self._wait_host(host)
+            with slot:
+                bucket.acquire()
+                try:
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                except requests.RequestException as e:
+                    return FetchResult(url, 0, elapsed=time.perf_counter() - start, error=str(e))
+            if response.status_code not in _RETRY_STATUSES or attempt == self.max_retries:
+                break
+            # Serveur surchargé : tout l'hôte attend, pas seulement cette requête
+            delay = _retry_after(response.headers.get('Retry-After'))
+            if delay is None:
+                delay = self.backoff * 2 ** attempt
+            self._pause_host(host, min(delay, self.max_backoff))
+        elapsed = time.perf_counter() - start
+
+        if response.status_code == 304 and cached:
+            # Page inchangée : corps servi depuis le cache local
+            return FetchResult(url, 200, cached["content"], {'Content-Type': cached.get("content_type", "")},
+                               from_cache=True, elapsed=elapsed)
+
+        if response.status_code == 200 and self.cache:
+            self.cache.put(url, response.content, response.headers)
+
+        return FetchResult(url, response.status_code, response.content, dict(response.headers),
+                           elapsed=elapsed)
+
+    def fetch_all(self, pages: Dict[str, str]) -> Dict[str, FetchResult]:
+        """Télécharge un ensemble de pages {nom: url} en parallèle"""
+        if not pages:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pages))) as executor:
+            futures = {name: executor.submit(self.fetch, url) for name, url in pages.items()}
+            return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,78 @@
+# src/intent_classifier.py
+"""
+Classifieur d'intention : catégorie probable d'une question avant la recherche
+
+Régression logistique sur les mêmes vecteurs que la recherche (mots et
+n-grammes, poids de fusion inclus), entraînée avec le modèle. Les poids
+sont rangés par terme comme un index inversé (terme -> classes) : prédire
+ne coûte qu'un parcours des termes de la requête.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.linear_model import LogisticRegression
+
+from inverted_index import InvertedIndex
+
+# Termes et poids d'une requête pour chaque index (même ordre que les poids du classifieur)
+IntentFeatures = Sequence[Tuple[int, np.ndarray, np.ndarray]]
+
+
+class IntentClassifier:
+    """Classifieur linéaire des catégories ; la classe i est le fragment i du modèle"""
+
+    def __init__(self, intercept: np.ndarray, weights: List[InvertedIndex]):
+        self.intercept = intercept
+        self.weights = weights
+
+    @property
+    def n_classes(self) -> int:
+        return self.intercept.shape[0]
+
+    @classmethod
+    def fit(cls, features: List[sparse.spmatrix], labels: np.ndarray,
+            C: float = 10.0) -> Optional["IntentClassifier"]:
+        """Entraîne sur les vecteurs des lignes (un bloc par index) ; None avec moins de deux catégories"""
+        n_classes = int(labels.max()) + 1 if labels.shape[0] else 0
+        if n_classes < 2:
+            return None
+        classifier = LogisticRegression(C=C, max_iter=200)
+        classifier.fit(sparse.hstack(features).tocsr(), labels)
+        coef, intercept = classifier.coef_, classifier.intercept_
+        if n_classes == 2:
+            # Cas binaire : un seul vecteur de poids, équivalent à des logits (0, w.x + b)
+            coef = np.vstack((np.zeros_like(coef), coef))
+            intercept = np.r_[0.0, intercept]
+
+        weights, start = [], 0
+        for block in features:
+            end = start + block.shape[1]
+            postings = sparse.csr_matrix(coef[:, start:end].T)
+            postings.eliminate_zeros()
+            weights.append(InvertedIndex(postings))
+            start = end
+        return cls(np.asarray(intercept, dtype=np.float64), weights)
+
+    def predict_proba(self, features: IntentFeatures) -> np.ndarray:
+        """Probabilité de chaque catégorie pour une requête"""
+        logits = self.intercept.copy()
+        for part, terms, weights in features:
+            classes, contributions = self.weights[part].gather(terms, weights)
+            logits += np.bincount(classes, contributions, minlength=self.n_classes)
+        logits -= logits.max()
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum()
+
+    @staticmethod
+    def route(probabilities: np.ndarray, confidence: float, max_shards: int) -> Optional[np.ndarray]:
+        """Fragments à interroger : les plus probables jusqu'à la confiance demandée
+
+        None si max_shards catégories ne suffisent pas à l'atteindre (recherche complète).
+        """
+        top = np.argsort(-probabilities)[:max_shards]
+        covered = np.cumsum(probabilities[top])
+        reached = np.flatnonzero(covered >= confidence)
+        if reached.shape[0] == 0:
+            return None
+        return np.sort(top[:reached[0] + 1])
@@ -0,0 +1,300 @@
+# src/inverted_index.py
+"""
+Index inversé (terme -> lignes et poids) et recherche des k meilleures réponses
+
+Le score d'une ligne n'est accumulé que pour les termes de la requête : le
+coût d'une requête dépend de la longueur des listes parcourues, pas de la
+taille du corpus. L'option MaxScore arrête l'exploration exhaustive dès que
+les termes restants ne peuvent plus faire entrer de nouvelle ligne dans le top-k.
+
+Les lignes d'un même fragment (une catégorie) sont contiguës : une table de
+positions par terme permet de ne parcourir que la partie des listes qui
+appartient aux fragments demandés.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# Une partie de requête : (index, termes, poids des termes dans le score fusionné)
+QueryPart = Tuple["InvertedIndex", np.ndarray, np.ndarray]
+
+# Une liste plus longue que LOOKUP_RATIO fois le nombre de candidats est
+# interrogée par recherche dichotomique plutôt que parcourue
+LOOKUP_RATIO = 32
+
+# Au-delà d'une entrée parcourue pour DENSE_RATIO lignes du corpus, les
+# scores sont accumulés dans un tableau dense plutôt que par tri des lignes
+DENSE_RATIO = 16
+
+_EMPTY_IDS = np.zeros(0, dtype=np.int64)
+_EMPTY_SCORES = np.zeros(0)
+
+
+class InvertedIndex:
+    """Listes de lignes par terme (CSR terme x ligne, lignes triées)
+
+    term_max contient le poids maximal de chaque terme : c'est la borne
+    supérieure de sa contribution utilisée par MaxScore. Pour les termes
+    présents (shard_terms, triés), shard_offsets[i, s] est la position du
+    début du fragment s dans la liste du terme shard_terms[i] et
+    shard_max[i, s] le poids maximal du terme dans ce fragment.
+    """
+
+    def __init__(self, postings: sparse.csr_matrix, term_max: Optional[np.ndarray] = None,
+                 shard_terms: Optional[np.ndarray] = None, shard_offsets: Optional[np.ndarray] = None,
+                 shard_max: Optional[np.ndarray] = None):
+        self.postings = postings
+        self.term_max = term_max if term_max is not None else _term_max(postings)
+        self.shard_terms = shard_terms
+        self.shard_offsets = shard_offsets
+        self.shard_max = shard_max
+
+    @classmethod
+    def from_rows(cls, row_vectors: sparse.spmatrix,
+                  shard_bounds: Optional[np.ndarray] = None) -> "InvertedIndex":
+        """Construit l'index à partir des vecteurs des lignes (ligne x terme)
+
+        shard_bounds donne la première ligne de chaque fragment, suivie du nombre de lignes.
+        """
+        postings = sparse.csr_matrix(row_vectors).T.tocsr()
+        postings.sort_indices()
+        index = cls(postings)
+        if shard_bounds is not None:
+            index.shard_terms, index.shard_offsets, index.shard_max = _shard_table(postings, shard_bounds)
+        return index
+
+    @property
+    def n_rows(self) -> int:
+        return self.postings.shape[1]
+
+    @property
+    def row_vectors(self) -> sparse.csc_matrix:
+        """Vue ligne x terme (transposée sans copie)"""
+        return self.postings.T
+
+    def _slices(self, terms: np.ndarray, weights: np.ndarray,
+                shards: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Début et longueur des parties de listes à parcourir, avec le poids de chacune"""
+        indptr = self.postings.indptr
+        if shards is None or self.shard_offsets is None:
+            starts = indptr[terms]
+            return starts, indptr[terms + 1] - starts, weights
+        if self.shard_terms.shape[0] == 0:
+            return _EMPTY_IDS, _EMPTY_IDS, _EMPTY_SCORES
+        slots = np.minimum(np.searchsorted(self.shard_terms, terms), self.shard_terms.shape[0] - 1)
+        present = (self.shard_terms[slots] == terms)[:, None]
+        starts = self.shard_offsets[slots[:, None], shards]
+        lengths = np.where(present, self.shard_offsets[slots[:, None], shards + 1] - starts, 0)
+        return starts.ravel(), lengths.ravel(), np.repeat(weights, shards.shape[0])
+
+    def outside_bound(self, terms: np.ndarray, weights: np.ndarray, shards: np.ndarray) -> float:
+        """Contribution maximale de la requête à une ligne hors des fragments demandés"""
+        if self.shard_max is None or self.shard_terms.shape[0] == 0:
+            return float(np.dot(weights, self.term_max[terms]))
+        outside = np.ones(self.shard_max.shape[1], dtype=bool)
+        outside[shards] = False
+        if not outside.any():
+            return 0.0
+        slots = np.minimum(np.searchsorted(self.shard_terms, terms), self.shard_terms.shape[0] - 1)
+        present = self.shard_terms[slots] == terms
+        maxima = self.shard_max[slots[present]][:, outside].max(axis=1)
+        return float(np.dot(weights[present], maxima))
+
+    def gather(self, terms: np.ndarray, weights: np.ndarray,
+               shards: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Lignes des listes des termes (limitées aux fragments demandés) et leurs contributions pondérées"""
+        starts, lengths, weights = self._slices(terms, weights, shards)
+        total = int(lengths.sum())
+        if total == 0:
+            return _EMPTY_IDS, _EMPTY_SCORES
+        # Positions de toutes les entrées des listes, sans boucle Python
+        shifts = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        positions = shifts + np.arange(total)
+        return (self.postings.indices[positions],
+                self.postings.data[positions] * np.repeat(weights, lengths))
+
+    def lookup(self, term: int, rows: np.ndarray) -> np.ndarray:
+        """Poids d'un terme pour des lignes données (0 si absent), par recherche dichotomique"""
+        start, end = self.postings.indptr[term], self.postings.indptr[term + 1]
+        posting_rows = self.postings.indices[start:end]
+        positions = np.searchsorted(posting_rows, rows)
+        found = positions < posting_rows.shape[0]
+        found[found] = posting_rows[positions[found]] == rows[found]
+        result = np.zeros(rows.shape[0])
+        result[found] = self.postings.data[start:end][positions[found]]
+        return result
+
+    def complete(self, terms: np.ndarray, weights: np.ndarray, rows: np.ndarray,
+                 shards: Optional[np.ndarray] = None) -> np.ndarray:
+        """Contributions des termes limitées à des lignes données (triées)
+
+        Les listes longues devant le nombre de lignes sont interrogées par
+        recherche dichotomique sans être parcourues ; les courtes sont
+        rassemblées en une passe.
+        """
+        lengths = self.postings.indptr[terms + 1] - self.postings.indptr[terms]
+        long_lists = lengths > rows.shape[0] * LOOKUP_RATIO
+        result = np.zeros(rows.shape[0])
+        for term, weight in zip(terms[long_lists], weights[long_lists]):
+            result += weight * self.lookup(term, rows)
+        short = ~long_lists
+        if short.any():
+            term_rows, contributions = self.gather(terms[short], weights[short], shards)
+            positions = np.searchsorted(rows, term_rows)
+            found = positions < rows.shape[0]
+            found[found] = rows[positions[found]] == term_rows[found]
+            result += np.bincount(positions[found], contributions[found], minlength=rows.shape[0])
+        return result
+
+
+def _term_max(postings: sparse.csr_matrix) -> np.ndarray:
+    """Poids maximal de chaque terme (0 pour un terme absent)"""
+    result = np.zeros(postings.shape[0])
+    lengths = np.diff(postings.indptr)
+    non_empty = lengths > 0
+    if postings.nnz:
+        result[non_empty] = np.maximum.reduceat(postings.data, postings.indptr[:-1][non_empty])
+    return result
+
+
+def _shard_table(postings: sparse.csr_matrix,
+                 shard_bounds: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Termes présents, position de début et poids maximal de chaque fragment dans leur liste"""
+    n_shards = shard_bounds.shape[0] - 1
+    lengths = np.diff(postings.indptr)
+    shard_terms = np.flatnonzero(lengths)
+    term_of = np.repeat(np.arange(postings.shape[0]), lengths)
+    shard_of = np.searchsorted(shard_bounds, postings.indices, side='right') - 1
+    counts = np.bincount(term_of * n_shards + shard_of, minlength=postings.shape[0] * n_shards)
+    counts = counts.reshape(postings.shape[0], n_shards)[shard_terms]
+    shard_offsets = postings.indptr[shard_terms, None] + np.hstack(
+        (np.zeros((shard_terms.shape[0], 1), dtype=np.int64), np.cumsum(counts, axis=1))
+    )
+    shard_offsets = shard_offsets.astype(np.int64)
+    # Les parties non vides des listes se suivent dans data : un maximum par partie
+    starts, ends = shard_offsets[:, :-1].ravel(), shard_offsets[:, 1:].ravel()
+    non_empty = ends > starts
+    shard_max = np.zeros(starts.shape[0])
+    if non_empty.any():
+        shard_max[non_empty] = np.maximum.reduceat(postings.data, starts[non_empty])
+    return shard_terms, shard_offsets, shard_max.reshape(shard_terms.shape[0], n_shards)
+
+
+def _accumulate(rows: List[np.ndarray], contributions: List[np.ndarray],
+                n_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Somme des contributions par ligne (lignes triées, uniques)
+
+    Accumulateur dense (bincount sur toutes les lignes) quand les listes
+    parcourues couvrent une part notable du corpus, tri des seules lignes
+    touchées sinon.
+    """
+    if not rows:
+        return _EMPTY_IDS, _EMPTY_SCORES
+    rows = np.concatenate(rows)
+    contributions = np.concatenate(contributions)
+    if rows.shape[0] * DENSE_RATIO >= n_rows:
+        scores = np.bincount(rows, contributions, minlength=n_rows)
+        touched = np.flatnonzero(scores)
+        return touched, scores[touched]
+    unique_rows, inverse = np.unique(rows, return_inverse=True)
+    return unique_rows, np.bincount(inverse, contributions, minlength=unique_rows.shape[0])
+
+
+def _pool(rows: np.ndarray, scores: np.ndarray, answer_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Score de chaque réponse candidate : maximum sur ses lignes
+
+    Les lignes d'une même réponse sont contiguës : des lignes triées donnent
+    des identifiants de réponse triés.
+    """
+    if rows.shape[0] == 0:
+        return _EMPTY_IDS, _EMPTY_SCORES
+    answers = np.asarray(answer_ids[rows])
+    starts = np.flatnonzero(np.r_[True, answers[1:] != answers[:-1]])
+    return answers[starts], np.maximum.reduceat(scores, starts)
+
+
+def _kth_score(scores: np.ndarray, k: int) -> float:
+    """k-ième meilleur score (0 s'il y a moins de k candidats)"""
+    if scores.shape[0] < k:
+        return 0.0
+    return float(np.partition(scores, scores.shape[0] - k)[scores.shape[0] - k])
+
+
+def search(parts: Sequence[QueryPart], answer_ids: np.ndarray, k: int,
+           early_termination: bool = True,
+           extra: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+           shards: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Les k meilleures réponses (identifiants, scores décroissants) d'une requête
+
+    Le score d'une ligne est la somme des poids de la requête multipliés par
+    ceux des lignes, sur toutes les parties (index de mots, de n-grammes),
+    plus les contributions extra (lignes, scores) calculées hors des index
+    inversés (recherche sémantique). Avec shards, seules les lignes de ces
+    fragments sont parcourues (extra doit déjà y être limité). Seules les
+    réponses de score non nul sont retournées.
+    """
+    indexes = [index for index, _, _ in parts]
+    part_of = np.concatenate([np.full(len(terms), p) for p, (_, terms, _) in enumerate(parts)] or [_EMPTY_IDS])
+    terms = np.concatenate([np.asarray(terms, dtype=np.int64) for _, terms, _ in parts] or [_EMPTY_IDS])
+    weights = np.concatenate([np.asarray(w, dtype=np.float64) for _, _, w in parts] or [_EMPTY_SCORES])
+    bounds = np.concatenate([w * index.term_max[t] for index, t, w in parts] or [_EMPTY_SCORES])
+
+    # Termes absents de l'index ignorés, les autres par borne supérieure de contribution décroissante
+    order = np.flatnonzero(bounds > 0)
+    order = order[np.argsort(-bounds[order], kind='stable')]
+    part_of, terms, weights, bounds = part_of[order], terms[order], weights[order], bounds[order]
+    # remaining[i] : contribution maximale des termes à partir du i-ème
+    remaining = np.r_[np.cumsum(bounds[::-1])[::-1], 0.0]
+
+    n_terms = terms.shape[0]
+    n_rows = indexes[0].n_rows if indexes else answer_ids.shape[0]
+    position = 0
+    checkpoint = 8 if early_termination else n_terms
+    rows: List[np.ndarray] = [extra[0]] if extra is not None else []
+    contributions: List[np.ndarray] = [extra[1]] if extra is not None else []
+    candidates, candidate_scores = _accumulate(rows, contributions, n_rows)
+    threshold = 0.0
+
+    # Phase exhaustive : tant que les termes restants peuvent faire entrer une nouvelle ligne
+    while position < n_terms:
+        end = min(checkpoint, n_terms)
+        for p, index in enumerate(indexes):
+            selected = part_of[position:end] == p
+            if selected.any():
+                part_rows, part_contributions = index.gather(terms[position:end][selected],
+                                                             weights[position:end][selected], shards)
+                rows.append(part_rows)
+                contributions.append(part_contributions)
+        position, checkpoint = end, checkpoint * 2
+
+        candidates, candidate_scores = _accumulate(rows, contributions, n_rows)
+        rows, contributions = [candidates], [candidate_scores]
+        if position < n_terms:
+            threshold = _kth_score(_pool(candidates, candidate_scores, answer_ids)[1], k)
+            if threshold >= remaining[position]:
+                break
+
+    # Phase MaxScore : les termes restants ne complètent que les lignes encore
+    # capables d'atteindre le seuil, réévalué après chaque groupe de termes
+    group = 8
+    while position < n_terms and candidates.shape[0]:
+        eligible = candidate_scores + remaining[position] >= threshold
+        candidates, candidate_scores = candidates[eligible], candidate_scores[eligible]
+        end = min(position + group, n_terms)
+        for p, index in enumerate(indexes):
+            selected = np.flatnonzero(part_of[position:end] == p) + position
+            if selected.shape[0]:
+                candidate_scores = candidate_scores + index.complete(terms[selected], weights[selected],
+                                                                     candidates, shards)
+        position, group = end, group * 2
+        threshold = max(threshold, _kth_score(_pool(candidates, candidate_scores, answer_ids)[1], k))
+
+    answers, scores = _pool(candidates, candidate_scores, answer_ids)
+    positive = scores > 0
+    answers, scores = answers[positive], scores[positive]
+    if k < answers.shape[0]:
+        top = np.argpartition(-scores, k - 1)[:k]
+        answers, scores = answers[top], scores[top]
+    order = np.lexsort((answers, -scores))
+    return answers[order], scores[order]
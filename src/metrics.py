@@ -0,0 +1,326 @@
+# src/metrics.py
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config.settings import METRICS_CONFIG
+
+# Bornes des histogrammes de durée (secondes)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Préfixe commun des métriques exportées
+PREFIX = "chatbot_"
+
+# Variable d'environnement posée par le lanceur : les workers agrègent leurs métriques
+MULTIPROCESS_ENV = "CHATBOT_METRICS_MULTIPROCESS"
+
+_NOOP_SPAN = nullcontext()
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    """Histogramme cumulatif au format Prometheus"""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * (n_buckets + 1)
+        self.total = 0.0
+        self.count = 0
+
+
+class _Span:
+    """Mesure la durée d'un bloc et l'enregistre dans un histogramme"""
+
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: LabelKey):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry._observe(self.name, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Compteurs, jauges et durées des chemins critiques, exportés au format Prometheus
+
+    Désactivé, chaque appel se réduit à un test de booléen. Avec plusieurs
+    workers (enable_multiprocess), chaque processus dépose un instantané de
+    ses séries dans un dossier commun et l'export les agrège tous : compteurs
+    et histogrammes additionnés (y compris ceux des workers arrêtés), jauges
+    par processus (étiquette pid) tant que leur instantané est récent.
+    """
+
+    def __init__(self, enabled: bool = False, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._lock = threading.Lock()
+        self.multiprocess_dir: Optional[Path] = None
+        self.snapshot_interval = 5.0
+        self._snapshot_pid: Optional[int] = None
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        """Incrémente un compteur"""
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Fixe la valeur d'une jauge"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges.setdefault(name, {})[self._key(labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Enregistre une durée"""
+        if self.enabled:
+            self._observe(name, seconds, self._key(labels))
+
+    def _observe(self, name: str, seconds: float, key: LabelKey):
+        position = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(len(self.buckets))
+            histogram.counts[position] += 1
+            histogram.total += seconds
+            histogram.count += 1
+
+    def span(self, name: str, **labels):
+        """Contexte mesurant la durée d'un bloc (sans effet si désactivé)"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, self._key(labels))
+
+    def reset(self):
+        """Remet toutes les séries à zéro"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def enable_multiprocess(self, directory: Path, interval: float = 5.0):
+        """Agrège l'export avec les autres workers via des instantanés dans directory
+
+        L'instantané du processus est réécrit toutes les interval secondes et
+        avant chaque export : les compteurs agrégés ne reculent jamais d'un
+        export à l'autre, quel que soit le worker qui répond.
+        """
+        if not self.enabled or self._snapshot_pid == os.getpid():
+            return
+        if self._snapshot_pid is not None:
+            # Worker issu d'un fork : les séries héritées figurent déjà dans l'instantané du
+            # parent, et le verrou a pu être copié pris par son thread d'instantanés
+            self._lock = threading.Lock()
+            self.reset()
+        self._snapshot_pid = os.getpid()
+        self.multiprocess_dir = Path(directory)
+        self.snapshot_interval = interval
+        self.multiprocess_dir.mkdir(parents=True, exist_ok=True)
+
+        def snapshot_loop():
+            while True:
+                try:
+                    self._write_snapshot()
+                except OSError:
+                    pass
+                time.sleep(interval)
+
+        threading.Thread(target=snapshot_loop, name="metrics-snapshot", daemon=True).start()
+
+    def _snapshot(self) -> Dict:
+        """Séries du processus, sérialisables en JSON"""
+        with self._lock:
+            return {
+                "counters": {name: [[list(map(list, key)), value] for key, value in series.items()]
+                             for name, series in self._counters.items()},
+                "gauges": {name: [[list(map(list, key)), value] for key, value in series.items()]
+                           for name, series in self._gauges.items()},
+                "histograms": {name: [[list(map(list, key)), h.counts, h.total, h.count]
+                                      for key, h in series.items()]
+                               for name, series in self._histograms.items()}
+            }
+
+    def _write_snapshot(self):
+        """Dépose l'instantané du processus (remplacement atomique)"""
+        path = self.multiprocess_dir / f"{os.getpid()}.json"
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(json.dumps(self._snapshot()), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    def _merged(self) -> Tuple[Dict, Dict, Dict]:
+        """Séries de tous les processus : compteurs et histogrammes additionnés, jauges par pid"""
+        self._write_snapshot()
+        counters: Dict[str, Dict[LabelKey, float]] = {}
+        gauges: Dict[str, Dict[LabelKey, float]] = {}
+        histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        # Un worker arrêté ne réécrit plus son instantané : ses jauges ne valent plus
+        stale_before = time.time() - 3 * self.snapshot_interval
+        for path in self.multiprocess_dir.glob("*.json"):
+            try:
+                fresh = path.stat().st_mtime >= stale_before
+                snapshot = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            for name, series in snapshot["counters"].items():
+                merged = counters.setdefault(name, {})
+                for key, value in series:
+                    key = tuple(map(tuple, key))
+                    merged[key] = merged.get(key, 0.0) + value
+            if fresh:
+                for name, series in snapshot["gauges"].items():
+                    merged = gauges.setdefault(name, {})
+                    for key, value in series:
+                        merged[tuple(sorted(map(tuple, key + [["pid", path.stem]])))] = value
+            for name, series in snapshot["histograms"].items():
+                merged = histograms.setdefault(name, {})
+                for key, counts, total, count in series:
+                    key = tuple(map(tuple, key))
+                    histogram = merged.get(key)
+                    if histogram is None:
+                        histogram = merged[key] = _Histogram(len(self.buckets))
+                    histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                    histogram.total += total
+                    histogram.count += count
+        return counters, gauges, histograms
+
+    def render_prometheus(self) -> str:
+        """Export au format texte Prometheus (agrégé sur les workers en mode multiprocessus)"""
+        if self.multiprocess_dir is not None:
+            counters, gauges, histograms = self._merged()
+            return self._render(counters, gauges, histograms)
+        with self._lock:
+            return self._render(self._counters, self._gauges, self._histograms)
+
+    def _render(self, counters: Dict[str, Dict[LabelKey, float]], gauges: Dict[str, Dict[LabelKey, float]],
+                histograms: Dict[str, Dict[LabelKey, _Histogram]]) -> str:
+        lines = []
+        for name, series in sorted(counters.items()):
+            lines.append(f"# TYPE {PREFIX}{name}_total counter")
+            for key, value in series.items():
+                lines.append(f"{PREFIX}{name}_total{_format_labels(key)} {value:g}")
+        for name, series in sorted(gauges.items()):
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+            for key, value in series.items():
+                lines.append(f"{PREFIX}{name}{_format_labels(key)} {value:g}")
+        for name, series in sorted(histograms.items()):
+            metric = f"{PREFIX}{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for key, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                lines.append(f"{metric}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{metric}_sum{_format_labels(key)} {histogram.total:.9g}")
+                lines.append(f"{metric}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path: Path):
+        """Écrit l'export dans un fichier (remplacement atomique, pour le textfile collector)"""
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(self.render_prometheus(), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        f'{k}="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+# Registre du processus
+metrics = MetricsRegistry(enabled=METRICS_CONFIG["enabled"])
+
+
+def reset_multiprocess_dir(directory: Path):
+    """Vide le dossier des instantanés avant de lancer les workers (séries d'une exécution précédente)"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.glob("*.json"):
+        path.unlink(missing_ok=True)
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def start_exporter(registry: MetricsRegistry = metrics, port: Optional[int] = None,
+                   export_path: Optional[Path] = None, interval: Optional[float] = None) -> bool:
+    """Démarre l'export local (endpoint HTTP /metrics et/ou fichier), une fois par processus"""
+    global _exporter_started
+    if not registry.enabled:
+        return False
+
+    port = port if port is not None else METRICS_CONFIG["port"]
+    export_path = export_path if export_path is not None else METRICS_CONFIG["export_path"]
+    interval = interval if interval is not None else METRICS_CONFIG["export_interval"]
+
+    with _exporter_lock:
+        if _exporter_started:
+            return False
+        _exporter_started = True
+
+    if port:
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"📈 Métriques exposées sur http://127.0.0.1:{port}/metrics")
+
+    if export_path:
+        def write_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    registry.write_file(export_path)
+                except OSError:
+                    pass
+
+        threading.Thread(target=write_loop, name="metrics-file", daemon=True).start()
+
+    return True
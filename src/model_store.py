@@ -0,0 +1,604 @@
+# src/model_store.py
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from config.settings import MODEL_CONFIG, MODEL_DIR, PROCESSED_DATA_DIR
+from columnar_store import COLUMNAR_DATA_PATH, ColumnarTable, read_data_hash
+from dense_index import DenseIndex, SentenceEncoder, dense_params, load_encoder
+from intent_classifier import IntentClassifier
+from inverted_index import InvertedIndex, QueryPart
+from text_normalizer import TextNormalizer
+
+# Version du format de l'artefact : à incrémenter à chaque changement de structure
+MODEL_FORMAT_VERSION = 5
+
+# Fichier pointant vers la version courante du modèle
+CURRENT_POINTER = "CURRENT"
+
+# Nombre de versions conservées sur disque (la courante + les précédentes)
+KEEP_VERSIONS = 2
+
+# Modes de recherche : index de mots seul, ou fusion mots + n-grammes de caractères
+RETRIEVAL_MODES = ("word", "hybrid")
+
+
+def file_fingerprint(path: Path) -> str:
+    """Calcule l'empreinte SHA-256 du contenu d'un fichier"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def vectorizer_params() -> dict:
+    """Paramètres du vectoriseur TF-IDF"""
+    return {
+        "stop_words": None,
+        "lowercase": True,
+        "norm": "l2",
+        "max_features": MODEL_CONFIG["max_features"]
+    }
+
+
+def retrieval_params() -> dict:
+    """Mode de recherche et paramètres de l'index de n-grammes de caractères"""
+    mode = MODEL_CONFIG["retrieval_mode"]
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Mode de recherche inconnu : {mode} (attendu : {', '.join(RETRIEVAL_MODES)})")
+    params = {"mode": mode}
+    if mode == "hybrid":
+        params.update({
+            "ngram_range": list(MODEL_CONFIG["char_ngram_range"]),
+            "n_features": MODEL_CONFIG["char_n_features"],
+            "char_weight": MODEL_CONFIG["char_weight"]
+        })
+    # Index sémantique seulement si activé et si le modèle de plongements est disponible
+    dense = dense_params()
+    if dense is not None:
+        params["dense"] = dense
+    if MODEL_CONFIG["intent"]["enabled"]:
+        params["intent"] = {"C": MODEL_CONFIG["intent"]["C"]}
+    return params
+
+
+class CharNgramIndex:
+    """Index TF-IDF de n-grammes de caractères, robuste aux fautes de frappe
+
+    Les n-grammes sont hachés (HashingVectorizer) : pas de vocabulaire en
+    mémoire, la taille de l'index est fixée par n_features. L'index est
+    inversé (listes de lignes par n-gramme) : une requête ne parcourt que les
+    listes de ses propres n-grammes.
+    """
+
+    def __init__(self, ngram_range: Tuple[int, int], n_features: int,
+                 idf: np.ndarray, index: Optional[InvertedIndex] = None):
+        self.hasher = HashingVectorizer(
+            analyzer='char_wb', ngram_range=tuple(ngram_range), n_features=n_features,
+            alternate_sign=False, norm=None, lowercase=False
+        )
+        self.idf = idf
+        self.index = index
+
+    def transform(self, texts: List[str]) -> sparse.csr_matrix:
+        """Vecteurs TF-IDF (tf sous-linéaire) normalisés L2"""
+        vectors = self.hasher.transform(texts)
+        vectors.data = (1.0 + np.log(vectors.data)) * self.idf[vectors.indices]
+        # Normalisation L2 par ligne sans repasser par la validation de sklearn
+        row_of = np.repeat(np.arange(vectors.shape[0]), np.diff(vectors.indptr))
+        norms = np.sqrt(np.bincount(row_of, vectors.data ** 2, minlength=vectors.shape[0]))
+        norms[norms == 0] = 1.0
+        vectors.data /= norms[row_of]
+        return vectors
+
+    @classmethod
+    def fit(cls, questions: List[str], ngram_range: Tuple[int, int], n_features: int,
+            shard_bounds: Optional[np.ndarray] = None) -> "CharNgramIndex":
+        """Calcule l'idf lissé des n-grammes puis indexe les questions (par fragments si shard_bounds)"""
+        char_index = cls(ngram_range, n_features, np.ones(n_features))
+        counts = char_index.hasher.transform(questions)
+        document_frequency = np.bincount(counts.indices, minlength=n_features)
+        char_index.idf = np.log((1 + len(questions)) / (1 + document_frequency)) + 1.0
+        char_index.index = InvertedIndex.from_rows(char_index.transform(questions), shard_bounds)
+        return char_index
+
+
+def model_normalizer() -> TextNormalizer:
+    """Normaliseur appliqué aux questions d'entraînement et aux requêtes"""
+    return TextNormalizer(**MODEL_CONFIG["normalization"])
+
+
+class TfidfModel:
+    """Modèle TF-IDF entraîné : vectoriseur, index inversé des questions et index des réponses uniques
+
+    Les variations de questions sont regroupées par réponse : la ligne i de
+    l'index pointe vers answers[answer_ids[i]], et les lignes d'une même
+    réponse sont contiguës à partir de answer_offsets[id]. Les réponses sont
+    elles-mêmes rangées par catégorie : les lignes de categories[s] forment
+    le fragment s (shard_bounds[s]:shard_bounds[s + 1]). Les questions sont
+    normalisées par normalizer avant vectorisation, les requêtes aussi.
+    """
+
+    def __init__(self, vectorizer: TfidfVectorizer, word_index: InvertedIndex,
+                 answers: List[str], answer_categories: List[str],
+                 answer_ids: np.ndarray, data_hash: str,
+                 normalizer: Optional[TextNormalizer] = None,
+                 char_index: Optional[CharNgramIndex] = None, char_weight: float = 0.0,
+                 dense_index: Optional[DenseIndex] = None, encoder: Optional[SentenceEncoder] = None,
+                 dense_weight: float = 0.0, intent: Optional[IntentClassifier] = None):
+        self.vectorizer = vectorizer
+        self.word_index = word_index
+        self.answers = answers
+        self.answer_categories = answer_categories
+        self.answer_ids = answer_ids
+        self.answer_offsets = _group_offsets(answer_ids)
+        self.data_hash = data_hash
+        self.normalizer = normalizer or model_normalizer()
+        self.char_index = char_index
+        self.char_weight = char_weight if char_index is not None else 0.0
+        self.dense_index = dense_index if encoder is not None else None
+        self.encoder = encoder
+        self.dense_weight = dense_weight if self.dense_index is not None else 0.0
+        self.intent = intent
+
+        # Fragments par catégorie : première réponse de chaque catégorie
+        first_answers = [a for a in range(len(answer_categories))
+                         if a == 0 or answer_categories[a] != answer_categories[a - 1]]
+        self.categories = [answer_categories[a] for a in first_answers]
+        self.shard_bounds = np.r_[self.answer_offsets[first_answers], answer_ids.shape[0]].astype(np.int64)
+        self.answer_shards = np.searchsorted(first_answers, np.arange(len(answer_categories)), side='right') - 1
+        # Encodage des requêtes sans passer par vectorizer.transform (validation coûteuse)
+        self._analyzer = vectorizer.build_analyzer()
+        self._vocabulary = getattr(vectorizer, "vocabulary_", None) or vectorizer.vocabulary
+        self._idf = vectorizer.idf_
+
+    @property
+    def n_rows(self) -> int:
+        """Nombre de variations de questions indexées"""
+        return self.word_index.n_rows
+
+    @property
+    def question_vectors(self) -> sparse.csc_matrix:
+        """Matrice des questions (ligne x terme), vue transposée de l'index inversé"""
+        return self.word_index.row_vectors
+
+    def encode_words(self, normalized_question: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Termes et poids TF-IDF normalisés L2 d'une requête (identiques à vectorizer.transform)"""
+        counts: Dict[int, int] = {}
+        vocabulary = self._vocabulary
+        for token in self._analyzer(normalized_question):
+            term = vocabulary.get(token)
+            if term is not None:
+                counts[term] = counts.get(term, 0) + 1
+        terms = np.fromiter(counts, dtype=np.int64, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self._idf[terms]
+        norm = np.sqrt(np.dot(weights, weights))
+        return terms, (weights / norm if norm else weights)
+
+    def _indexes(self) -> List[Tuple[InvertedIndex, float]]:
+        """Index inversés et leur poids dans le score fusionné"""
+        sparse_weight = 1.0 - self.dense_weight
+        if self.char_index is None:
+            return [(self.word_index, sparse_weight)]
+        return [(self.word_index, sparse_weight * (1.0 - self.char_weight)),
+                (self.char_index.index, sparse_weight * self.char_weight)]
+
+    def query_parts(self, normalized_question: str) -> List[QueryPart]:
+        """Parties de la requête pour la recherche dans les index inversés, poids de fusion inclus"""
+        (word_index, word_weight), *char = self._indexes()
+        terms, weights = self.encode_words(normalized_question)
+        parts = [(word_index, terms, word_weight * weights)]
+        if char:
+            char_query = self.char_index.transform([normalized_question])
+            parts.append((char[0][0], char_query.indices.astype(np.int64), char[0][1] * char_query.data))
+        return parts
+
+    def query_parts_batch(self, normalized_questions: List[str]) -> List[List[QueryPart]]:
+        """Parties de requête d'un lot de questions, une seule transformation par index"""
+        blocks = [self.vectorizer.transform(normalized_questions)]
+        if self.char_index is not None:
+            blocks.append(self.char_index.transform(normalized_questions))
+        batch = []
+        for i in range(len(normalized_questions)):
+            parts = []
+            for (index, weight), block in zip(self._indexes(), blocks):
+                row = slice(block.indptr[i], block.indptr[i + 1])
+                parts.append((index, block.indices[row].astype(np.int64), weight * block.data[row]))
+            batch.append(parts)
+        return batch
+
+    def route(self, parts: List[QueryPart]) -> Tuple[Optional[np.ndarray], Optional[str]]:
+        """Fragments à interroger selon le classifieur d'intention, et catégorie la plus probable
+
+        (None, None) sans classifieur ; fragments None si la confiance est insuffisante
+        ou si la recherche par fragments est désactivée.
+        """
+        if self.intent is None:
+            return None, None
+        positions = {id(index): i for i, (index, _) in enumerate(self._indexes())}
+        probabilities = self.intent.predict_proba(
+            [(positions[id(index)], terms, weights) for index, terms, weights in parts]
+        )
+        settings = MODEL_CONFIG["intent"]
+        if not settings["shard_search"]:
+            return None, self.categories[int(probabilities.argmax())]
+        shards = IntentClassifier.route(probabilities, settings["route_confidence"], settings["max_shards"])
+        return shards, self.categories[int(probabilities.argmax())]
+
+    def outside_bound(self, parts: List[QueryPart], extra: Optional[Tuple[np.ndarray, np.ndarray]],
+                      shards: np.ndarray) -> float:
+        """Score maximal possible d'une ligne hors des fragments demandés
+
+        Somme des bornes de chaque partie et de la meilleure contribution
+        sémantique hors fragments : si le k-ième score obtenu dans les
+        fragments l'atteint, l'index complet ne ferait pas mieux.
+        """
+        bound = sum(index.outside_bound(terms, weights, shards) for index, terms, weights in parts)
+        if extra is not None and extra[0].shape[0]:
+            rows, scores = extra
+            outside = ~np.isin(np.searchsorted(self.shard_bounds, rows, side='right') - 1, shards)
+            if outside.any():
+                bound += float(scores[outside].max())
+        return bound
+
+    def restrict(self, extra: Optional[Tuple[np.ndarray, np.ndarray]],
+                 shards: Optional[np.ndarray]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Limite des contributions (lignes, scores) aux fragments demandés"""
+        if extra is None or shards is None:
+            return extra
+        rows, scores = extra
+        kept = np.isin(np.searchsorted(self.shard_bounds, rows, side='right') - 1, shards)
+        return rows[kept], scores[kept]
+
+    def query_dense(self, normalized_question: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Lignes proches de la requête dans l'index sémantique et leur contribution pondérée
+
+        La requête normalisée est encodée, comme les questions à l'entraînement :
+        la réponse ne dépend que de la clé de cache.
+        """
+        if self.dense_index is None:
+            return None
+        query = self.encoder.encode([normalized_question])[0]
+        rows, scores = self.dense_index.search(query, MODEL_CONFIG["dense_retrieval"]["n_probe"])
+        return rows, self.dense_weight * scores
+
+    def query_dense_batch(self, normalized_questions: List[str]) -> List[Optional[Tuple[np.ndarray, np.ndarray]]]:
+        """query_dense pour un lot de questions, encodées en une fois"""
+        if self.dense_index is None:
+            return [None] * len(normalized_questions)
+        n_probe = MODEL_CONFIG["dense_retrieval"]["n_probe"]
+        results = []
+        for query in self.encoder.encode(normalized_questions):
+            rows, scores = self.dense_index.search(query, n_probe)
+            results.append((rows, self.dense_weight * scores))
+        return results
+
+    @classmethod
+    def fit(cls, questions: List[str], answers: List[str], categories: List[str],
+            data_hash: str, normalizer: Optional[TextNormalizer] = None) -> "TfidfModel":
+        """Entraîne le vectoriseur sur les questions (lignes normalisées L2, format CSR)"""
+        normalizer = normalizer or model_normalizer()
+        # Table des réponses uniques (une réponse = un couple réponse/catégorie)
+        answer_keys = list(zip(answers, categories))
+        answer_index: Dict[Tuple[str, str], int] = {}
+        row_ids = np.empty(len(answer_keys), dtype=np.int32)
+        for i, key in enumerate(answer_keys):
+            row_ids[i] = answer_index.setdefault(key, len(answer_index))
+        
+        # Réponses renumérotées par catégorie (tri stable) : une catégorie = un bloc de lignes
+        answer_table = list(answer_index)
+        answer_order = sorted(range(len(answer_table)), key=lambda a: answer_table[a][1])
+        renumber = np.empty(len(answer_table), dtype=np.int32)
+        renumber[answer_order] = np.arange(len(answer_table), dtype=np.int32)
+        answer_table = [answer_table[a] for a in answer_order]
+        row_ids = renumber[row_ids]
+        
+        # Regroupement des lignes d'une même réponse (tri stable)
+        order = np.argsort(row_ids, kind='stable')
+        questions = normalizer.batch([questions[i] for i in order])
+        row_categories = [answer_table[a][1] for a in row_ids[order]]
+        shard_bounds = np.r_[
+            np.flatnonzero([i == 0 or row_categories[i] != row_categories[i - 1]
+                            for i in range(len(row_categories))]),
+            len(row_categories)
+        ].astype(np.int64)
+        
+        vectorizer = TfidfVectorizer(**vectorizer_params())
+        word_index = InvertedIndex.from_rows(vectorizer.fit_transform(questions), shard_bounds)
+        
+        retrieval = retrieval_params()
+        char_index = None
+        if retrieval["mode"] == "hybrid":
+            char_index = CharNgramIndex.fit(questions, retrieval["ngram_range"], retrieval["n_features"],
+                                            shard_bounds)
+        dense_index, encoder = None, None
+        if "dense" in retrieval:
+            encoder = load_encoder(retrieval["dense"]["model_path"], MODEL_CONFIG["dense_retrieval"]["batch_size"])
+            dense_index = DenseIndex.fit(encoder.encode(questions), retrieval["dense"]["n_lists"])
+        model = cls(
+            vectorizer,
+            word_index,
+            [answer for answer, _ in answer_table],
+            [category for _, category in answer_table],
+            row_ids[order],
+            data_hash,
+            normalizer,
+            char_index,
+            retrieval.get("char_weight", 0.0),
+            dense_index,
+            encoder,
+            retrieval["dense"]["weight"] if dense_index is not None else 0.0
+        )
+        if "intent" in retrieval:
+            # Mêmes vecteurs que la recherche, pondérés comme dans le score fusionné
+            model.intent = IntentClassifier.fit(
+                [index.row_vectors * weight for index, weight in model._indexes()],
+                model.answer_shards[model.answer_ids],
+                retrieval["intent"]["C"]
+            )
+        return model
+
+    @classmethod
+    def from_csv(cls, data_path: Path) -> "TfidfModel":
+        """Entraîne un modèle à partir du fichier CSV prétraité"""
+        qa_data = pd.read_csv(data_path)
+        return cls.fit(
+            qa_data['question'].astype(str).tolist(),
+            qa_data['answer'].tolist(),
+            qa_data['category'].tolist(),
+            file_fingerprint(data_path)
+        )
+
+    @classmethod
+    def from_table(cls, table: ColumnarTable) -> "TfidfModel":
+        """Entraîne un modèle à partir de la table colonnaire"""
+        answers = table.answers.tolist()
+        answer_ids = np.asarray(table.answer_ids).tolist()
+        category_codes = np.asarray(table.category_codes).tolist()
+        return cls.fit(
+            table.questions.tolist(),
+            [answers[i] for i in answer_ids],
+            [table.categories[c] for c in category_codes],
+            table.data_hash
+        )
+
+    @classmethod
+    def from_path(cls, data_path: Path) -> "TfidfModel":
+        """Entraîne un modèle depuis des données colonnaires (dossier) ou CSV"""
+        if Path(data_path).is_dir():
+            return cls.from_table(ColumnarTable.load(data_path))
+        return cls.from_csv(data_path)
+
+    def save(self, model_dir: Path = MODEL_DIR) -> Path:
+        """Écrit l'artefact dans un sous-dossier versionné puis bascule le pointeur CURRENT"""
+        model_dir = Path(model_dir)
+        model_dir.mkdir(parents=True, exist_ok=True)
+
+        version = f"v{MODEL_FORMAT_VERSION}-{self.data_hash[:12]}-{int(time.time())}"
+        tmp_dir = model_dir / f".{version}.tmp"
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir()
+
+        meta = {
+            "format_version": MODEL_FORMAT_VERSION,
+            "data_hash": self.data_hash,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "n_rows": self.n_rows,
+            "n_features": self.word_index.postings.shape[0],
+            "vectorizer_params": vectorizer_params(),
+            "normalization": self.normalizer.config(),
+            "retrieval": retrieval_params(),
+            "vocabulary": {term: int(idx) for term, idx in self.vectorizer.vocabulary_.items()}
+        }
+        with open(tmp_dir / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        with open(tmp_dir / "tables.json", 'w', encoding='utf-8') as f:
+            json.dump({"answers": self.answers, "answer_categories": self.answer_categories}, f, ensure_ascii=False)
+
+        np.save(tmp_dir / "idf.npy", np.asarray(self.vectorizer.idf_, dtype=np.float64))
+        _save_index(tmp_dir, "word", self.word_index)
+        np.save(tmp_dir / "answer_ids.npy", self.answer_ids)
+        if self.char_index is not None:
+            np.save(tmp_dir / "char_idf.npy", self.char_index.idf)
+            _save_index(tmp_dir, "char", self.char_index.index)
+        if self.dense_index is not None:
+            self.dense_index.save(tmp_dir)
+        if self.intent is not None:
+            np.save(tmp_dir / "intent_intercept.npy", self.intent.intercept)
+            for i, weights in enumerate(self.intent.weights):
+                _save_index(tmp_dir, f"intent_{i}", weights)
+
+        final_dir = model_dir / version
+        os.replace(tmp_dir, final_dir)
+
+        # Bascule atomique du pointeur vers la nouvelle version
+        pointer_tmp = model_dir / f"{CURRENT_POINTER}.tmp"
+        pointer_tmp.write_text(version, encoding='utf-8')
+        os.replace(pointer_tmp, model_dir / CURRENT_POINTER)
+
+        _prune_versions(model_dir, keep=version)
+        return final_dir
+
+    @classmethod
+    def load(cls, model_dir: Path = MODEL_DIR, expected_hash: Optional[str] = None,
+             mmap: bool = True) -> Optional["TfidfModel"]:
+        """Charge la version courante de l'artefact (None si absente, obsolète ou incompatible)"""
+        version_dir = current_version_dir(model_dir)
+        if version_dir is None:
+            return None
+
+        try:
+            with open(version_dir / "meta.json", 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if meta.get("format_version") != MODEL_FORMAT_VERSION:
+            return None
+        if meta.get("vectorizer_params") != vectorizer_params():
+            return None
+        normalizer = model_normalizer()
+        if meta.get("normalization") != normalizer.config():
+            return None
+        retrieval = retrieval_params()
+        if meta.get("retrieval") != retrieval:
+            return None
+        if expected_hash is not None and meta.get("data_hash") != expected_hash:
+            return None
+
+        mmap_mode = 'r' if mmap else None
+        idf = np.load(version_dir / "idf.npy", mmap_mode=mmap_mode)
+        word_index = _load_index(version_dir, "word", (meta["n_features"], meta["n_rows"]), mmap_mode)
+
+        # Reconstruction du vectoriseur sans réentraînement
+        vectorizer = TfidfVectorizer(**meta["vectorizer_params"], vocabulary=meta["vocabulary"])
+        vectorizer.idf_ = idf
+
+        with open(version_dir / "tables.json", 'r', encoding='utf-8') as f:
+            tables = json.load(f)
+
+        answer_ids = np.load(version_dir / "answer_ids.npy", mmap_mode=mmap_mode)
+
+        char_index = None
+        if retrieval["mode"] == "hybrid":
+            char_index = CharNgramIndex(
+                retrieval["ngram_range"], retrieval["n_features"],
+                np.load(version_dir / "char_idf.npy", mmap_mode=mmap_mode),
+                _load_index(version_dir, "char", (retrieval["n_features"], meta["n_rows"]), mmap_mode)
+            )
+
+        dense_index, encoder = None, None
+        if "dense" in retrieval:
+            dense_index = DenseIndex.load(version_dir, mmap_mode)
+            encoder = load_encoder(retrieval["dense"]["model_path"], MODEL_CONFIG["dense_retrieval"]["batch_size"])
+
+        intent = None
+        if (version_dir / "intent_intercept.npy").exists():
+            intercept = np.load(version_dir / "intent_intercept.npy")
+            n_parts = 2 if char_index is not None else 1
+            feature_counts = [meta["n_features"], retrieval.get("n_features")][:n_parts]
+            intent = IntentClassifier(intercept, [
+                _load_index(version_dir, f"intent_{i}", (n_terms, intercept.shape[0]), mmap_mode)
+                for i, n_terms in enumerate(feature_counts)
+            ])
+
+        return cls(vectorizer, word_index, tables["answers"], tables["answer_categories"],
+                   answer_ids, meta["data_hash"], normalizer, char_index, retrieval.get("char_weight", 0.0),
+                   dense_index, encoder, retrieval["dense"]["weight"] if dense_index is not None else 0.0,
+                   intent)
+
+
+def _save_index(directory: Path, name: str, index: InvertedIndex):
+    """Écrit les listes d'un index inversé et les bornes de ses termes"""
+    np.save(directory / f"{name}_postings_data.npy", index.postings.data)
+    np.save(directory / f"{name}_postings_indices.npy", index.postings.indices)
+    np.save(directory / f"{name}_postings_indptr.npy", index.postings.indptr)
+    np.save(directory / f"{name}_term_max.npy", index.term_max)
+    if index.shard_offsets is not None:
+        np.save(directory / f"{name}_shard_terms.npy", index.shard_terms)
+        np.save(directory / f"{name}_shard_offsets.npy", index.shard_offsets)
+        np.save(directory / f"{name}_shard_max.npy", index.shard_max)
+
+
+def _load_index(directory: Path, name: str, shape: Tuple[int, int],
+                mmap_mode: Optional[str]) -> InvertedIndex:
+    """Relit un index inversé écrit par _save_index (mmap par défaut)"""
+    postings = sparse.csr_matrix(
+        (
+            np.load(directory / f"{name}_postings_data.npy", mmap_mode=mmap_mode),
+            np.load(directory / f"{name}_postings_indices.npy", mmap_mode=mmap_mode),
+            np.load(directory / f"{name}_postings_indptr.npy", mmap_mode=mmap_mode)
+        ),
+        shape=shape,
+        copy=False
+    )
+    postings.has_sorted_indices = True
+    shard_terms = shard_offsets = shard_max = None
+    if (directory / f"{name}_shard_offsets.npy").exists():
+        shard_terms = np.load(directory / f"{name}_shard_terms.npy", mmap_mode=mmap_mode)
+        shard_offsets = np.load(directory / f"{name}_shard_offsets.npy", mmap_mode=mmap_mode)
+        shard_max = np.load(directory / f"{name}_shard_max.npy", mmap_mode=mmap_mode)
+    return InvertedIndex(postings, np.load(directory / f"{name}_term_max.npy", mmap_mode=mmap_mode),
+                         shard_terms, shard_offsets, shard_max)
+
+
+def _group_offsets(answer_ids: np.ndarray) -> np.ndarray:
+    """Indice de la première ligne de chaque réponse (lignes triées par réponse)"""
+    if answer_ids.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, answer_ids[1:] != answer_ids[:-1]])
+
+
+def current_version_dir(model_dir: Path = MODEL_DIR) -> Optional[Path]:
+    """Retourne le dossier de la version courante du modèle"""
+    pointer = Path(model_dir) / CURRENT_POINTER
+    try:
+        version = pointer.read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+    version_dir = Path(model_dir) / version
+    return version_dir if version_dir.is_dir() else None
+
+
+def _prune_versions(model_dir: Path, keep: str):
+    """Supprime les anciennes versions au-delà de KEEP_VERSIONS"""
+    versions = sorted(
+        (p for p in model_dir.iterdir() if p.is_dir() and p.name.startswith("v")),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True
+    )
+    for old in versions[KEEP_VERSIONS:]:
+        if old.name != keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def default_data_path() -> Path:
+    """Données prétraitées à utiliser : format colonnaire si présent, sinon CSV"""
+    if COLUMNAR_DATA_PATH.is_dir():
+        return COLUMNAR_DATA_PATH
+    return PROCESSED_DATA_DIR / "training_data.csv"
+
+
+def data_fingerprint(data_path: Path) -> str:
+    """Empreinte des données prétraitées (lue dans les métadonnées pour le format colonnaire)"""
+    if Path(data_path).is_dir():
+        data_hash = read_data_hash(data_path)
+        if data_hash is None:
+            raise FileNotFoundError(f"Données colonnaires invalides : {data_path}")
+        return data_hash
+    return file_fingerprint(data_path)
+
+
+def artifact_signature(data_path: Path, model_dir: Path = MODEL_DIR) -> Tuple:
+    """Signature peu coûteuse (stat) des données prétraitées et du pointeur de version
+
+    Sert à détecter un changement sans recalculer d'empreinte à chaque sondage.
+    """
+    data_path = Path(data_path)
+    watched = (data_path / "meta.json" if data_path.is_dir() else data_path,
+               Path(model_dir) / CURRENT_POINTER)
+    signature = []
+    for path in watched:
+        try:
+            stat = path.stat()
+            signature.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def train_model(data_path: Optional[Path] = None, model_dir: Path = MODEL_DIR) -> TfidfModel:
+    """Entraîne le modèle depuis les données prétraitées et écrit l'artefact"""
+    model = TfidfModel.from_path(data_path or default_data_path())
+    model.save(model_dir)
+    return model
@@ -0,0 +1,65 @@
+# src/page_parser.py
+import time
+from typing import Dict, List
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import (Comment, Declaration, Doctype, ProcessingInstruction, RubyParenthesisString,
+                         RubyTextString, Script, Stylesheet, TemplateString)
+
+# Noeuds texte ignorés, comme par get_text() : commentaires, déclarations,
+# contenu des balises script, style et template (JavaScript, CSS) et annotations ruby
+_SKIPPED_STRINGS = (Comment, Declaration, Doctype, ProcessingInstruction, Script, Stylesheet, TemplateString,
+                    RubyTextString, RubyParenthesisString)
+
+
+def select_parser(preferred: str = "auto") -> str:
+    """Choisit le backend d'analyse HTML : lxml si disponible, sinon html.parser"""
+    if preferred != "auto":
+        return preferred
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+class PageIndex:
+    """Vue d'une page construite en un seul parcours de l'arbre
+
+    Les extracteurs travaillent sur ces listes au lieu de reparcourir
+    l'arbre (find_all, get_text) chacun de leur côté.
+    """
+
+    def __init__(self, soup: BeautifulSoup, parse_time: float = 0.0):
+        self.soup = soup
+        self.parse_time = parse_time
+        self.elements: List[Tag] = []
+        self.by_name: Dict[str, List[Tag]] = {}
+        self.strings: List[NavigableString] = []
+
+        start = time.perf_counter()
+        for node in soup.descendants:
+            if isinstance(node, Tag):
+                self.elements.append(node)
+                self.by_name.setdefault(node.name, []).append(node)
+            elif isinstance(node, NavigableString) and not isinstance(node, _SKIPPED_STRINGS):
+                self.strings.append(node)
+
+        # Texte complet de la page, produit une seule fois
+        self.text = "".join(self.strings)
+        self.text_lower = self.text.lower()
+        self.walk_time = time.perf_counter() - start
+
+    def tags(self, *names: str) -> List[Tag]:
+        """Balises des noms donnés, dans l'ordre du document"""
+        if len(names) == 1:
+            return self.by_name.get(names[0], [])
+        wanted = set(names)
+        return [tag for tag in self.elements if tag.name in wanted]
+
+    @classmethod
+    def parse(cls, content: bytes, parser: str = "html.parser") -> "PageIndex":
+        """Analyse le HTML puis construit l'index de la page"""
+        start = time.perf_counter()
+        soup = BeautifulSoup(content, parser)
+        return cls(soup, time.perf_counter() - start)
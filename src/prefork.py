@@ -0,0 +1,237 @@
+# src/prefork.py
+"""
+Service HTTP en mode pré-fork
+
+Le processus parent charge le modèle une seule fois puis crée N workers par
+fork() : les structures du modèle (vocabulaire, tables de réponses, matrices)
+sont partagées en copie sur écriture au lieu d'être dupliquées par worker.
+Quand un nouvel artefact apparaît, le parent le charge puis remplace les
+workers un par un (redémarrage progressif, sans coupure du service).
+Un worker qui s'arrête juste après son démarrage (artefact invalide) est
+relancé avec un délai croissant, puis son emplacement est abandonné.
+"""
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict, Optional
+
+from config.settings import API_CONFIG, METRICS_CONFIG, MODEL_DIR
+from chatbot_engine import get_shared_engine, reload_shared_engine
+from metrics import MULTIPROCESS_ENV, metrics, reset_multiprocess_dir
+from model_store import current_version_dir, data_fingerprint, default_data_path
+
+logger = logging.getLogger(__name__)
+
+
+class PreforkServer:
+    """Parent pré-fork : écoute le port, supervise les workers et recharge le modèle"""
+
+    def __init__(self, host: str = API_CONFIG["host"], port: int = API_CONFIG["port"],
+                 workers: int = API_CONFIG["workers"],
+                 poll_interval: float = API_CONFIG["reload_poll_interval"]):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Le mode pré-fork nécessite un système POSIX (os.fork)")
+        self.host = host
+        self.port = port
+        self.n_workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.sock: Optional[socket.socket] = None
+        self.workers: Dict[int, float] = {}  # pid -> date de démarrage
+        self._slots: Dict[int, int] = {}  # pid -> emplacement de worker
+        self._failures: Dict[int, int] = {}  # emplacement -> échecs consécutifs au démarrage
+        self._respawns: Dict[int, float] = {}  # emplacement -> date de relance prévue
+        self.model_version: Optional[str] = None
+        self._stopping = False
+        self._restart_requested = False
+
+    def _bind(self) -> socket.socket:
+        """Socket d'écoute partagée par tous les workers"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    @staticmethod
+    def _artifact_version() -> Optional[str]:
+        """Version courante de l'artefact et des données prétraitées"""
+        version_dir = current_version_dir(MODEL_DIR)
+        try:
+            data_hash = data_fingerprint(default_data_path())
+        except OSError:
+            data_hash = None
+        return f"{version_dir.name if version_dir else ''}:{data_hash}"
+
+    def _load_model(self, reload: bool = False):
+        """Charge le modèle dans le parent puis gèle le tas avant les fork()"""
+        start = time.perf_counter()
+        engine = reload_shared_engine() if reload else get_shared_engine()
+        # Les objets existants sortent du suivi du GC : pas d'écriture sur
+        # leurs en-têtes dans les workers, donc pas de copie des pages partagées
+        gc.collect()
+        gc.freeze()
+        self.model_version = self._artifact_version()
+        logger.info("Modèle %s chargé dans le parent en %.2fs",
+                    engine.model.data_hash[:12], time.perf_counter() - start)
+
+    def _spawn(self, slot: int) -> int:
+        """Crée le worker d'un emplacement, qui sert l'API sur la socket partagée"""
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.time()
+            self._slots[pid] = slot
+            return pid
+
+        # Processus worker
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, signal.SIG_DFL)
+            import uvicorn
+            from api_server import app
+            app.state.managed_reload = True
+            config = uvicorn.Config(app, log_level="warning", timeout_graceful_shutdown=30)
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException:
+            logger.exception("Arrêt anormal du worker %d", os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _stop_worker(self, pid: int, timeout: float = 35):
+        """Arrêt gracieux : uvicorn termine les requêtes en cours avant de sortir"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.workers.pop(pid, None)
+            self._slots.pop(pid, None)
+            return
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            time.sleep(0.1)
+        else:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.pop(pid, None)
+        self._slots.pop(pid, None)
+
+    def _rolling_restart(self):
+        """Charge le nouvel artefact puis remplace les workers un à un"""
+        logger.info("Nouvel artefact détecté : redémarrage progressif des workers")
+        gc.unfreeze()
+        try:
+            self._load_model(reload=True)
+        except Exception:
+            # Artefact en cours d'écriture ou invalide : l'ancien modèle et les
+            # workers actuels restent en service, nouvel essai au prochain contrôle
+            logger.exception("Échec du chargement du nouvel artefact, version actuelle conservée")
+            gc.collect()
+            gc.freeze()
+            return
+        for old_pid in list(self.workers):
+            # Le remplaçant démarre avant l'arrêt de l'ancien : capacité constante
+            self._spawn(self._slots[old_pid])
+            time.sleep(0.5)
+            self._stop_worker(old_pid)
+        # Nouveau modèle : les emplacements abandonnés ou en attente de relance repartent
+        self._failures.clear()
+        live = set(self._slots.values())
+        for slot in range(self.n_workers):
+            if slot not in live:
+                self._respawns[slot] = time.time()
+        logger.info("Redémarrage progressif terminé (%d workers)", len(self.workers))
+
+    def _reap(self):
+        """Récupère les workers terminés et planifie leur remplacement"""
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            started = self.workers.pop(pid, None)
+            slot = self._slots.pop(pid, None)
+            if started is not None and not self._stopping:
+                self._schedule_respawn(pid, slot, status, time.time() - started)
+        if not self.workers and not self._respawns and not self._stopping:
+            logger.error("Plus aucun worker en service : arrêt du serveur")
+            self._stopping = True
+
+    def _schedule_respawn(self, pid: int, slot: int, status: int, uptime: float):
+        """Relance immédiate après un arrêt en service, délai doublé à chaque échec au démarrage"""
+        if uptime >= API_CONFIG["worker_min_uptime"]:
+            self._failures[slot] = 0
+            logger.warning("Worker %d arrêté (statut %d), remplacement", pid, status)
+            self._respawns[slot] = time.time()
+            return
+        failures = self._failures[slot] = self._failures.get(slot, 0) + 1
+        if failures >= API_CONFIG["worker_max_failures"]:
+            # Relancé au prochain redémarrage progressif (nouvel artefact ou SIGHUP)
+            logger.error("Worker %d arrêté %d fois de suite au démarrage (statut %d) : emplacement %d abandonné",
+                         pid, failures, status, slot)
+            return
+        delay = min(API_CONFIG["worker_backoff"] * 2 ** (failures - 1), API_CONFIG["worker_backoff_max"])
+        logger.warning("Worker %d arrêté au démarrage (statut %d, échec %d), remplacement dans %.1fs",
+                       pid, status, failures, delay)
+        self._respawns[slot] = time.time() + delay
+
+    def _respawn_due(self):
+        """Relance les emplacements dont le délai est écoulé"""
+        now = time.time()
+        for slot, due in list(self._respawns.items()):
+            if due <= now:
+                del self._respawns[slot]
+                self._spawn(slot)
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_hup(self, signum, frame):
+        self._restart_requested = True
+
+    def serve_forever(self):
+        """Boucle de supervision du parent"""
+        self.sock = self._bind()
+        if metrics.enabled:
+            # Workers remplacés au fil des rechargements : /metrics agrège les
+            # instantanés de tous, parent compris (rechargements du modèle)
+            reset_multiprocess_dir(METRICS_CONFIG["multiprocess_dir"])
+            os.environ[MULTIPROCESS_ENV] = "1"
+            metrics.enable_multiprocess(METRICS_CONFIG["multiprocess_dir"], METRICS_CONFIG["snapshot_interval"])
+        self._load_model()
+
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_hup)
+
+        for slot in range(self.n_workers):
+            self._spawn(slot)
+        print(f"🔌 API pré-fork sur http://{self.host}:{self.port} ({self.n_workers} workers)")
+
+        last_check = time.time()
+        try:
+            while not self._stopping:
+                time.sleep(0.2)
+                self._reap()
+                self._respawn_due()
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self._rolling_restart()
+                elif time.time() - last_check >= self.poll_interval:
+                    last_check = time.time()
+                    if self._artifact_version() != self.model_version:
+                        self._rolling_restart()
+        finally:
+            for pid in list(self.workers):
+                self._stop_worker(pid)
+            self.sock.close()
+            print("✅ API arrêtée")
@@ -0,0 +1,87 @@
+# src/response_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from text_normalizer import normalize
+
+
+class ResponseCache:
+    """Cache borné des réponses du chatbot (éviction LRU, TTL optionnel)"""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None,
+                 normalizer: Optional[Callable[[str], str]] = normalize):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.normalizer = normalizer
+        self.version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, question: str) -> str:
+        """Clé de cache : la question normalisée comme à l'entraînement
+
+        Sans normaliseur, la question est supposée déjà normalisée par l'appelant.
+        """
+        return self.normalizer(question) if self.normalizer else question
+
+    def get(self, question: str) -> Optional[Dict]:
+        """Retourne la réponse en cache ou None"""
+        key = self.key(question)
+        if not key:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                # Entrée expirée
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, question: str, response: Dict):
+        """Ajoute une réponse au cache en évinçant la moins récemment utilisée"""
+        key = self.key(question)
+        if not key or self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(response))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def bind(self, version: str):
+        """Associe le cache à une version du modèle ; le vide si elle a changé"""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Compteurs du cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0
+            }
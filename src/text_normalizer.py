@@ -0,0 +1,116 @@
+# src/text_normalizer.py
+"""
+Normalisation du texte partagée par le prétraitement, l'entraînement et les requêtes
+
+Les motifs sont compilés et les tables construites une seule fois à
+l'import ; normaliser une question courte coûte quelques microsecondes.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+# Liste basique de mots vides français
+FRENCH_STOP_WORDS = frozenset({
+    'le', 'la', 'les', 'de', 'des', 'du', 'et', 'en', 'un', 'une', 'à', 'au', 'aux',
+    'dans', 'pour', 'par', 'sur', 'avec', 'est', 'son', 'ses', 'ces', 'cet', 'cette',
+    'qui', 'que', 'quoi', 'quand', 'où', 'comment', 'pourquoi'
+})
+
+# Longueur minimale des mots conservés avec la suppression des mots vides
+MIN_WORD_LENGTH = 3
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+# Repli des accents du français (table de str.translate, sans passage par unicodedata)
+_ACCENTS = str.maketrans({
+    'à': 'a', 'â': 'a', 'ä': 'a', 'á': 'a',
+    'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
+    'î': 'i', 'ï': 'i', 'í': 'i',
+    'ô': 'o', 'ö': 'o', 'ó': 'o',
+    'ù': 'u', 'û': 'u', 'ü': 'u', 'ú': 'u',
+    'ÿ': 'y', 'ç': 'c', 'ñ': 'n',
+    'œ': 'oe', 'æ': 'ae'
+})
+
+_FOLDED_STOP_WORDS = frozenset(word.translate(_ACCENTS) for word in FRENCH_STOP_WORDS)
+
+
+@lru_cache(maxsize=65536)
+def light_stem(word: str) -> str:
+    """Racinisation légère du français : pluriels et e final
+
+    « formations » -> « formation », « inscrites » -> « inscrit »,
+    « nationaux » -> « national ». Les mots courts sont laissés intacts.
+    """
+    if len(word) > 5 and word.endswith('aux'):
+        return word[:-3] + 'al'
+    if len(word) > 3 and word[-1] in 'sx' and word[-2] != 's':
+        word = word[:-1]
+    if len(word) > 4 and word[-1] in 'eé':
+        word = word[:-1]
+    return word
+
+
+class TextNormalizer:
+    """Normaliseur configurable : minuscules, ponctuation, mots vides, accents, racines"""
+
+    def __init__(self, remove_stop_words: bool = True, fold_accents: bool = False,
+                 stemming: bool = False):
+        self.remove_stop_words = remove_stop_words
+        self.fold_accents = fold_accents
+        self.stemming = stemming
+        self._stop_words = _FOLDED_STOP_WORDS if fold_accents else FRENCH_STOP_WORDS
+
+    def config(self) -> Dict[str, bool]:
+        """Paramètres de normalisation (enregistrés avec le modèle)"""
+        return {
+            "remove_stop_words": self.remove_stop_words,
+            "fold_accents": self.fold_accents,
+            "stemming": self.stemming
+        }
+
+    def _words(self, text: str) -> str:
+        """Filtre et racinise les mots d'un texte déjà en minuscules et sans ponctuation"""
+        words = text.split()
+        if self.remove_stop_words:
+            stop_words = self._stop_words
+            words = [word for word in words if len(word) >= MIN_WORD_LENGTH and word not in stop_words]
+        if self.stemming:
+            words = [light_stem(word) for word in words]
+        return ' '.join(words)
+
+    def __call__(self, text: str) -> str:
+        """Normalise un texte"""
+        text = text.lower()
+        if self.fold_accents:
+            text = text.translate(_ACCENTS)
+        return self._words(_PUNCTUATION.sub(' ', text))
+
+    def batch(self, texts: Iterable[str]) -> List[str]:
+        """Normalise un lot de textes
+
+        Minuscules, accents et ponctuation sont traités en une passe sur le
+        lot entier (une ligne par texte) au lieu d'un appel par texte.
+        """
+        texts = [text.replace('\n', ' ') for text in texts]
+        if not texts:
+            return []
+        joined = '\n'.join(texts).lower()
+        if self.fold_accents:
+            joined = joined.translate(_ACCENTS)
+        joined = _PUNCTUATION.sub(' ', joined)
+        return [self._words(line) for line in joined.split('\n')]
+
+
+# Normalisation par défaut du prétraitement (sans repli des accents ni racinisation)
+default_normalizer = TextNormalizer()
+
+
+def normalize(text: str) -> str:
+    """Nettoie le texte (minuscules, ponctuation, mots vides)"""
+    return default_normalizer(text)
+
+
+def normalize_batch(texts: Iterable[str]) -> List[str]:
+    """Nettoie un lot de textes"""
+    return default_normalizer.batch(texts)
@@ -1,4 +1,5 @@
 # src/network_utils.py
+import logging
 import socket
 import requests
 from typing import Optional
@@ -35,7 +36,16 @@ def check_port_open(host: str, port: int) -> bool:
         return False
 
 def setup_logging(port: int = 8501):
-    """Affiche les informations de connexion réseau"""
+    """Configure les journaux et affiche les informations de connexion réseau"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('chatbot.log'),
+            logging.StreamHandler()
+        ]
+    )
+    
     local_ip = get_local_ip()
     public_ip = get_public_ip()
     
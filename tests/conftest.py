@@ -0,0 +1,35 @@
+# tests/conftest.py
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import pytest
+
+# Mêmes chemins que les scripts de lancement : racine (config) et src (modules)
+root_path = Path(__file__).resolve().parent.parent
+for path in (root_path, root_path / "src"):
+    if str(path) not in sys.path:
+        sys.path.append(str(path))
+
+
+@pytest.fixture(scope="session")
+def trained_model(tmp_path_factory):
+    """Données prétraitées et artefact entraînés une fois sur ifoad_data.json : (données, dossier du modèle)"""
+    from config.settings import RAW_DATA_DIR
+    from data_preprocessor import DataPreprocessor
+    from model_store import train_model
+
+    directory = tmp_path_factory.mktemp("model")
+    preprocessor = DataPreprocessor(RAW_DATA_DIR / "ifoad_data.json", directory / "processed")
+    with redirect_stdout(StringIO()):
+        preprocessor.prepare_training_data()
+    train_model(preprocessor.columnar_data_path, directory / "model")
+    return preprocessor.columnar_data_path, directory / "model"
+
+
+@pytest.fixture
+def engine(trained_model):
+    """Moteur neuf (cache vide) sur l'artefact entraîné"""
+    from chatbot_engine import ChatbotEngine
+    return ChatbotEngine(*trained_model)
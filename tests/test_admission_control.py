@@ -0,0 +1,154 @@
+# tests/test_admission_control.py
+import threading
+import time
+
+import pytest
+
+from admission_control import AdmissionGate, Overloaded
+
+
+class _BlockingEngine:
+    """Moteur factice : chaque calcul attend que le test le libère"""
+
+    def __init__(self, cached=None):
+        self.release = threading.Event()
+        self.calls = []
+        self.cached = cached or {}
+        self._lock = threading.Lock()
+
+    def get_response(self, question, context=None):
+        with self._lock:
+            self.calls.append(question)
+        self.release.wait(5)
+        return {"answer": question, "category": "test"}
+
+    def cached_response(self, question):
+        return self.cached.get(question)
+
+
+def _wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition jamais atteinte"
+        time.sleep(0.005)
+
+
+def _start(gate, question, client_id, results):
+    def run():
+        try:
+            results[question] = gate.get_response(question, client_id)
+        except Overloaded as error:
+            results[question] = error
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_queued_requests_are_served_in_arrival_order():
+    engine = _BlockingEngine()
+    gate = AdmissionGate(engine, max_concurrency=1, max_queue=10, queue_timeout=5, client_rate=100, client_burst=100)
+    results = {}
+    threads = [_start(gate, "q0", "a", results)]
+    _wait_for(lambda: gate.active == 1)
+    for i in range(1, 6):
+        threads.append(_start(gate, f"q{i}", f"client{i}", results))
+        _wait_for(lambda: gate.queued == i)
+
+    engine.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert engine.calls == [f"q{i}" for i in range(6)]
+    assert gate.active == 0 and gate.queued == 0
+
+
+def test_full_queue_sheds_to_cache_then_rejects():
+    engine = _BlockingEngine(cached={"en cache": {"answer": "déjà calculée", "category": "test"}})
+    gate = AdmissionGate(engine, max_concurrency=1, max_queue=1, queue_timeout=5, client_rate=100, client_burst=100)
+    results = {}
+    threads = [_start(gate, "active", "a", results)]
+    _wait_for(lambda: gate.active == 1)
+    threads.append(_start(gate, "queued", "b", results))
+    _wait_for(lambda: gate.queued == 1)
+
+    # File pleine : réponse en cache servie sans calcul, sinon refus
+    assert gate.get_response("en cache", "c") == {"answer": "déjà calculée", "category": "test"}
+    with pytest.raises(Overloaded) as refused:
+        gate.get_response("nouvelle", "d")
+    assert refused.value.reason == "saturated"
+
+    engine.release.set()
+    for thread in threads:
+        thread.join()
+    assert engine.calls == ["active", "queued"]
+
+
+def test_queued_request_expires_at_deadline():
+    engine = _BlockingEngine()
+    gate = AdmissionGate(engine, max_concurrency=1, max_queue=10, queue_timeout=0.1, client_rate=100, client_burst=100)
+    results = {}
+    thread = _start(gate, "active", "a", results)
+    _wait_for(lambda: gate.active == 1)
+
+    start = time.monotonic()
+    with pytest.raises(Overloaded) as refused:
+        gate.get_response("en attente", "b")
+    assert refused.value.reason == "saturated"
+    assert 0.09 <= time.monotonic() - start < 1.0
+    assert gate.queued == 0
+
+    engine.release.set()
+    thread.join()
+
+
+def test_client_rate_limit_and_exemptions():
+    engine = _BlockingEngine()
+    engine.release.set()
+    gate = AdmissionGate(engine, max_concurrency=4, client_rate=0.01, client_burst=2,
+                         client_limits={"intégration": {"rate": 0.01, "burst": 5}, "exempté": None})
+
+    for _ in range(2):
+        gate.get_response("q", "ip:1.2.3.4")
+    with pytest.raises(Overloaded) as refused:
+        gate.get_response("q", "ip:1.2.3.4")
+    assert refused.value.reason == "rate_limited" and refused.value.retry_after > 0
+
+    # Les autres clients ont leur propre seau
+    gate.get_response("q", "ip:5.6.7.8")
+    for _ in range(5):
+        gate.get_response("q", "intégration")
+    with pytest.raises(Overloaded):
+        gate.get_response("q", "intégration")
+    for _ in range(20):
+        gate.get_response("q", "exempté")
+
+
+def test_client_buckets_are_bounded():
+    engine = _BlockingEngine()
+    engine.release.set()
+    gate = AdmissionGate(engine, client_rate=100, client_burst=100, max_clients=3)
+    for i in range(10):
+        gate.get_response("q", f"client{i}")
+    assert gate.stats()["clients"] == 3
+
+
+def test_batch_cost_is_capped_at_the_client_burst():
+    engine = _BlockingEngine()
+    gate = AdmissionGate(engine, client_rate=0.001, client_burst=10,
+                         client_limits={"petit": {"rate": 0.001, "burst": 3}, "grand": {"rate": 0.001, "burst": 50}})
+
+    # Lot plus grand que le seau : accepté une fois le seau plein, pas refusé pour toujours
+    with gate.slot("petit", 20):
+        pass
+    with pytest.raises(Overloaded):
+        with gate.slot("petit", 1):
+            pass
+
+    # Rafale plus grande que celle par défaut : le lot est facturé en entier
+    with gate.slot("grand", 20):
+        pass
+    with pytest.raises(Overloaded):
+        with gate.slot("grand", 31):
+            pass
+    with gate.slot("grand", 30):
+        pass
@@ -0,0 +1,61 @@
+# tests/test_answer_pool.py
+import threading
+import time
+
+from answer_pool import AnswerPool
+
+
+class _SlowEngine:
+    """Moteur factice : chaque calcul attend que le test le libère"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.contexts = []
+
+    def get_response(self, question, context=None):
+        self.contexts.append(context)
+        self.release.wait(5)
+        return {"answer": question, "context": context}
+
+    def fallback_response(self):
+        return {"answer": "repli"}
+
+
+def test_same_question_joins_the_pending_computation():
+    engine = _SlowEngine()
+    pool = AnswerPool(engine, max_workers=1)
+    first = pool.submit("session", "Comment s'inscrire ?")
+    assert pool.submit("session", " Comment s'inscrire ? ") is first
+    assert pool.submit("autre", "Comment s'inscrire ?") is not first
+    engine.release.set()
+    assert pool.result(first, pool.deadline()) == ({"answer": "Comment s'inscrire ?", "context": None}, False)
+
+
+def test_timed_out_computation_is_not_joined_again():
+    engine = _SlowEngine()
+    pool = AnswerPool(engine, max_workers=1, timeout=0.05)
+    stale = pool.submit("session", "Comment s'inscrire ?", "ancien contexte")
+    deadline = pool.deadline()
+    assert not pool.ready(stale, deadline)
+
+    time.sleep(0.06)
+    assert pool.ready(stale, deadline)
+    assert pool.result(stale, deadline) == ({"answer": "repli"}, True)
+
+    # La question reposée repart sur le nouveau contexte
+    fresh = pool.submit("session", "Comment s'inscrire ?", "nouveau contexte")
+    assert fresh is not stale
+    engine.release.set()
+    assert pool.result(fresh, pool.deadline())[0]["context"] == "nouveau contexte"
+
+
+def test_abandoned_queued_computation_never_runs():
+    engine = _SlowEngine()
+    pool = AnswerPool(engine, max_workers=1)
+    running = pool.submit("a", "première")
+    queued = pool.submit("b", "seconde")
+    pool.abandon(queued)
+    assert queued.cancelled()
+    engine.release.set()
+    pool.result(running, pool.deadline())
+    assert engine.contexts == [None]
@@ -0,0 +1,76 @@
+# tests/test_api_server.py
+import pytest
+from fastapi.testclient import TestClient
+
+import admission_control
+import api_server
+import chatbot_engine
+from admission_control import AdmissionGate
+from config.settings import API_CONFIG, CLIENT_IDENTITY_CONFIG
+from metrics import metrics
+
+
+@pytest.fixture
+def client(engine, monkeypatch):
+    """Client de test sur le moteur entraîné, avec une porte d'admission neuve"""
+    monkeypatch.setattr(chatbot_engine, "_shared_engine", engine)
+    monkeypatch.setattr(admission_control, "_shared_gate", AdmissionGate(engine))
+    return TestClient(api_server.app)
+
+
+def _use_gate(monkeypatch, engine, **options):
+    monkeypatch.setattr(admission_control, "_shared_gate", AdmissionGate(engine, **options))
+
+
+def test_batch_is_charged_against_the_client_bucket(client, engine, monkeypatch):
+    monkeypatch.setitem(CLIENT_IDENTITY_CONFIG, "api_keys", {"cle-moodle": "moodle"})
+    _use_gate(monkeypatch, engine, client_rate=0.001, client_burst=10,
+              client_limits={"moodle": {"rate": 0.001, "burst": 3}})
+    batch = {"questions": ["Comment s'inscrire ?"] * 8}
+    headers = {"X-API-Key": "cle-moodle"}
+
+    # Lot de 8 pour un seau de 3 : servi une fois, puis limité
+    assert client.post("/ask/batch", json=batch, headers=headers).status_code == 200
+    refused = client.post("/ask/batch", json=batch, headers=headers)
+    assert refused.status_code == 429
+    assert int(refused.headers["Retry-After"]) >= 1
+
+
+def test_ask_returns_the_engine_response(client, engine):
+    response = client.post("/ask", json={"question": "Comment s'inscrire ?"})
+    assert response.status_code == 200
+    assert response.json()["answer"] == engine.get_response("Comment s'inscrire ?")["answer"]
+
+
+def test_batch_keeps_question_order(client, engine):
+    questions = ["Comment s'inscrire ?", "Quels sont les frais ?", "Comment s'inscrire ?"]
+    response = client.post("/ask/batch", json={"questions": questions})
+    assert response.status_code == 200
+    answers = [r["answer"] for r in response.json()["responses"]]
+    assert answers == [engine.get_response(question)["answer"] for question in questions]
+
+
+def test_oversized_batch_is_rejected(client, monkeypatch):
+    monkeypatch.setitem(API_CONFIG, "max_batch_size", 2)
+    response = client.post("/ask/batch", json={"questions": ["a", "b", "c"]})
+    assert response.status_code == 413
+
+
+def test_invalid_body_is_rejected(client):
+    assert client.post("/ask", json={}).status_code == 422
+
+
+def test_health_reports_loaded_model(client, engine):
+    health = client.get("/health").json()
+    assert health["status"] == "ok"
+    assert health["model"] == engine.model.data_hash[:12]
+    assert health["rows"] == engine.model.n_rows
+
+
+def test_metrics_are_exported_as_prometheus_text(client, monkeypatch):
+    monkeypatch.setattr(metrics, "enabled", True)
+    client.post("/ask", json={"question": "Comment s'inscrire ?"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE" in response.text
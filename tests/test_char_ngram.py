@@ -0,0 +1,46 @@
+# tests/test_char_ngram.py
+import pytest
+
+from config.settings import MODEL_CONFIG
+from model_store import TfidfModel, retrieval_params
+
+TYPOS = [
+    ("inscripton", "admission"),
+    ("procedur inscriptoin", "admission"),
+    ("frai scolarite", "frais"),
+    ("tarif formaton", "frais"),
+    ("modalites de paiment", "frais"),
+    ("comment vous contacte", "contact"),
+]
+
+
+def _category(engine, model, question: str) -> str:
+    return engine._build_response(*engine._rank(model, model.normalizer(question), 1))["category"]
+
+
+def test_hybrid_mode_tolerates_typos(engine):
+    assert engine.model.char_index is not None
+    for question, category in TYPOS:
+        assert _category(engine, engine.model, question) == category
+
+
+def test_word_mode_has_no_char_index(engine, trained_model, monkeypatch):
+    monkeypatch.setitem(MODEL_CONFIG, "retrieval_mode", "word")
+    word = TfidfModel.from_path(trained_model[0])
+    assert word.char_index is None
+    # Mot inconnu du vocabulaire : seule la recherche par n-grammes le rattrape
+    assert _category(engine, word, "inscripton") == "unknown"
+    assert _category(engine, engine.model, "inscripton") == "admission"
+
+
+def test_artifact_of_another_mode_is_not_loaded(trained_model, monkeypatch):
+    _, model_dir = trained_model
+    assert TfidfModel.load(model_dir) is not None
+    monkeypatch.setitem(MODEL_CONFIG, "retrieval_mode", "word")
+    assert TfidfModel.load(model_dir) is None
+
+
+def test_unknown_mode_is_rejected(monkeypatch):
+    monkeypatch.setitem(MODEL_CONFIG, "retrieval_mode", "fuzzy")
+    with pytest.raises(ValueError):
+        retrieval_params()
@@ -0,0 +1,108 @@
+# tests/test_chatbot_engine.py
+import json
+import threading
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+
+from chatbot_engine import ChatbotEngine
+from conversation_context import ConversationContext
+from data_preprocessor import DataPreprocessor
+
+DATA = {
+    "inscription": {"comment s'inscrire à la formation ?": "En ligne sur le portail.",
+                    "quels documents fournir ?": "Diplôme et pièce d'identité."},
+    "frais": {"combien coûte la formation ?": "150 000 FCFA.",
+              "comment payer les frais ?": "Par mobile money."}
+}
+
+
+def _prepare(raw_path, processed_dir, data) -> DataPreprocessor:
+    raw_path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    preprocessor = DataPreprocessor(raw_path, processed_dir)
+    with redirect_stdout(StringIO()):
+        preprocessor.prepare_training_data()
+    return preprocessor
+
+
+def _priced(price: str):
+    data = json.loads(json.dumps(DATA))
+    data["frais"]["combien coûte la formation ?"] = price
+    return data
+
+
+def test_reload_swaps_model_only_when_data_changes(tmp_path):
+    preprocessor = _prepare(tmp_path / "raw.json", tmp_path / "processed", DATA)
+    engine = ChatbotEngine(preprocessor.columnar_data_path, tmp_path / "model")
+    previous = engine.model
+    assert not engine.reload()
+
+    _prepare(tmp_path / "raw.json", tmp_path / "processed", _priced("200 000 FCFA."))
+    assert engine.reload()
+    assert engine.model is not previous
+
+    # Un appel qui a capturé l'ancien modèle termine dessus
+    assert engine.find_top_k("combien coûte la formation", 1, model=previous)[0]["answer"] == "150 000 FCFA."
+    assert engine.get_response("combien coûte la formation")["answer"] == "200 000 FCFA."
+
+
+def test_queries_keep_answering_during_reloads(tmp_path):
+    preprocessor = _prepare(tmp_path / "raw.json", tmp_path / "processed", DATA)
+    engine = ChatbotEngine(preprocessor.columnar_data_path, tmp_path / "model")
+    prices = ["150 000 FCFA.", "200 000 FCFA.", "250 000 FCFA.", "300 000 FCFA."]
+    answers, errors = [], []
+    done = threading.Event()
+
+    def ask():
+        while not done.is_set():
+            try:
+                answers.append(engine.get_response("combien coûte la formation")["answer"])
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=ask) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for price in prices[1:]:
+            _prepare(tmp_path / "raw.json", tmp_path / "processed", _priced(price))
+            assert engine.reload()
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+
+    assert not errors
+    assert set(answers) <= set(prices)
+    assert engine.get_response("combien coûte la formation")["answer"] == prices[-1]
+
+
+def _replay(engine: ChatbotEngine, questions):
+    """Réponses d'une session qui pose les questions dans l'ordre"""
+    context = ConversationContext()
+    return [engine.get_response(question, context) for question in questions]
+
+
+@pytest.mark.parametrize("history", ["quels sont les frais de scolarité", "conditions d'admission",
+                                     "débouchés après la licence informatique"])
+def test_follow_up_inherits_previous_category(engine, history):
+    first, follow_up = _replay(engine, [history, "et pour le master ?"])
+    assert follow_up["category"] == first["category"]
+
+
+def test_context_cache_depends_on_previous_turns(engine, trained_model):
+    # Même catégorie dominante (frais), historiques différents : réponses différentes
+    sessions = [["quels sont les frais de scolarité", "quel est le prix du master ?"],
+                ["modalités de paiement", "quel est le prix du master ?"],
+                ["tarifs formations", "quel est le prix du master ?"]]
+    fresh = [_replay(ChatbotEngine(*trained_model), session)[-1] for session in sessions]
+    assert len({response["answer"] for response in fresh}) > 1
+
+    shared = [_replay(engine, session)[-1] for session in sessions]
+    assert shared == fresh
+
+    # Une session identique retrouve sa réponse en cache
+    hits = engine.cache.stats()["hits"]
+    assert _replay(engine, sessions[1])[-1] == fresh[1]
+    assert engine.cache.stats()["hits"] > hits
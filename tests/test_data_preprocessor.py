@@ -0,0 +1,113 @@
+# tests/test_data_preprocessor.py
+import json
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+
+from config.settings import PREPROCESS_CONFIG
+from data_preprocessor import DataPreprocessor
+from model_store import data_fingerprint
+
+RAW_DATA = {
+    "inscription": {
+        "comment s'inscrire à la formation ?": "En ligne sur le portail.",
+        "quels documents fournir ?": "Diplôme et pièce d'identité.",
+        "quand commencent les cours ?": "En octobre."
+    },
+    "frais": {
+        "combien coûte la formation ?": "150 000 FCFA.",
+        "comment payer les frais ?": "Par mobile money.",
+        "pourquoi payer des frais d'inscription ?": "Ils couvrent l'accès à la plateforme."
+    },
+    "contact": {
+        "où se trouve l'IFOAD ?": "À Ouagadougou.",
+        "quelle est l'adresse email ?": "contact@ifoad-ujkz.net"
+    }
+}
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+
+def _prepare(preprocessor: DataPreprocessor, **kwargs):
+    """Table produite et messages affichés par un passage"""
+    output = StringIO()
+    with redirect_stdout(output):
+        table = preprocessor.prepare_training_data(**kwargs)
+    return table, output.getvalue()
+
+
+def _edited(data):
+    edited = json.loads(json.dumps(data))
+    edited["frais"]["combien coûte la formation ?"] = "200 000 FCFA."
+    edited["inscription"]["quelle est la durée de la formation ?"] = "Deux ans."
+    del edited["contact"]
+    edited["bourses"] = {"quelles bourses sont disponibles ?": "Bourses d'excellence."}
+    return edited
+
+
+def test_incremental_matches_full_rebuild(tmp_path):
+    raw_path = tmp_path / "raw.json"
+    _write(raw_path, RAW_DATA)
+    incremental = DataPreprocessor(raw_path, tmp_path / "incremental")
+    _prepare(incremental)
+
+    _write(raw_path, _edited(RAW_DATA))
+    _, report = _prepare(incremental, incremental=True)
+    full = DataPreprocessor(raw_path, tmp_path / "full")
+    _prepare(full)
+
+    assert "5 reprises, 2 ajoutées, 1 modifiées, 2 supprimées" in report
+    assert incremental.processed_data_path.read_bytes() == full.processed_data_path.read_bytes()
+    assert incremental.manifest_path.read_bytes() == full.manifest_path.read_bytes()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 50000])
+def test_dedup_keeps_first_occurrence_across_chunks(tmp_path, monkeypatch, chunk_size):
+    raw_path = tmp_path / "raw.json"
+    _write(raw_path, RAW_DATA)
+    reference = DataPreprocessor(raw_path, tmp_path / "reference")
+    _prepare(reference)
+
+    # Empreintes écrites sur disque dès la première série
+    monkeypatch.setitem(PREPROCESS_CONFIG, "dedup_memory", 3)
+    spilled = DataPreprocessor(raw_path, tmp_path / "spilled")
+    table, _ = _prepare(spilled, chunk_size=chunk_size)
+
+    assert spilled.processed_data_path.read_bytes() == reference.processed_data_path.read_bytes()
+    questions = table.questions.tolist()
+    assert len(questions) == len(set(questions))
+
+
+def test_parallel_expansion_matches_sequential(tmp_path):
+    raw_path = tmp_path / "raw.json"
+    _write(raw_path, RAW_DATA)
+    sequential = DataPreprocessor(raw_path, tmp_path / "sequential")
+    parallel = DataPreprocessor(raw_path, tmp_path / "parallel")
+    _prepare(sequential, workers=1)
+    _prepare(parallel, workers=2)
+    assert sequential.processed_data_path.read_bytes() == parallel.processed_data_path.read_bytes()
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_incremental_parallel_output_does_not_depend_on_workers(tmp_path, monkeypatch, workers):
+    # Petits lots : des lots entièrement repris suivent des lots encore en cours d'expansion
+    monkeypatch.setitem(PREPROCESS_CONFIG, "batch_size", 2)
+    raw_path = tmp_path / "raw.json"
+    edited = json.loads(json.dumps(RAW_DATA))
+    edited["inscription"]["comment s'inscrire à la formation ?"] = "Sur le portail, avant le 30 septembre."
+
+    outputs = []
+    for n in (1, workers):
+        _write(raw_path, RAW_DATA)
+        preprocessor = DataPreprocessor(raw_path, tmp_path / f"workers_{n}")
+        _prepare(preprocessor, workers=n)
+        _write(raw_path, edited)
+        _prepare(preprocessor, incremental=True, workers=n)
+        outputs.append((preprocessor.processed_data_path.read_bytes(),
+                        data_fingerprint(preprocessor.columnar_data_path)))
+
+    assert outputs[0][0] == outputs[1][0]
+    assert outputs[0][1] == outputs[1][1]
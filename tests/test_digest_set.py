@@ -0,0 +1,34 @@
+# tests/test_digest_set.py
+import numpy as np
+import pytest
+
+from digest_set import DigestSet
+
+
+@pytest.mark.parametrize("memory_limit", [1, 100, 10_000_000])
+def test_membership_matches_python_set(tmp_path, memory_limit):
+    rng = np.random.default_rng(0)
+    expected = set()
+    with DigestSet(memory_limit, tmp_path) as digests:
+        for _ in range(60):
+            batch = rng.integers(0, np.iinfo(np.uint64).max, 200, dtype=np.uint64, endpoint=True)
+            # Moitié d'empreintes déjà vues, moitié de nouvelles
+            if expected:
+                batch[:100] = rng.choice(np.fromiter(expected, dtype=np.uint64), 100)
+            found = digests.contains(batch)
+            assert found.tolist() == [int(digest) in expected for digest in batch]
+
+            new = np.unique(batch[~found])
+            digests.add(new)
+            expected.update(new.tolist())
+        assert len(digests) == len(expected)
+
+
+def test_runs_stay_few_and_files_are_removed(tmp_path):
+    with DigestSet(memory_limit=50, directory=tmp_path) as digests:
+        for start in range(0, 10_000, 100):
+            digests.add(np.arange(start, start + 100, dtype=np.uint64))
+        # Compteur binaire : au plus log2(100) + 1 séries
+        assert len(digests._runs) <= 8
+        assert digests.contains(np.array([0, 9_999, 10_000], dtype=np.uint64)).tolist() == [True, True, False]
+    assert not any(tmp_path.iterdir())
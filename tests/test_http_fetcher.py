@@ -0,0 +1,184 @@
+# tests/test_http_fetcher.py
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_fetcher import PoliteFetcher
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Sert les routes du serveur : chemin -> fonction(en-têtes, n° de l'appel) -> (statut, en-têtes, corps)"""
+
+    def do_GET(self):
+        with self.server.lock:
+            calls = [path for path, _, _ in self.server.requests if path == self.path]
+            self.server.requests.append((self.path, time.monotonic(), dict(self.headers)))
+        route = self.server.routes.get(self.path)
+        status, headers, body = route(self.headers, len(calls)) if route else (404, {}, b"")
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    """Serveur HTTP local ; les routes et la latence sont fixées par chaque test"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.routes = {"/robots.txt": lambda headers, n: (404, {}, b"")}
+    server.requests = []
+    server.latency = 0.0
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _page(body: bytes = b"<html>ok</html>", **headers):
+    return lambda request_headers, n: (200, {"Content-Type": "text/html", **headers}, body)
+
+
+def _times(server, path):
+    return [at for requested, at, _ in server.requests if requested == path]
+
+
+def _fetcher(**kwargs) -> PoliteFetcher:
+    options = {"requests_per_second": 100.0, "burst": 100, "timeout": 5}
+    options.update(kwargs)
+    return PoliteFetcher(requests.Session(), **options)
+
+
+def test_robots_disallow_is_respected(stub):
+    stub.routes["/robots.txt"] = lambda h, n: (200, {}, b"User-agent: *\nDisallow: /private\n")
+    stub.routes["/private/page"] = _page()
+    stub.routes["/public"] = _page()
+    fetcher = _fetcher()
+
+    blocked = fetcher.fetch(f"{stub.url}/private/page")
+    allowed = fetcher.fetch(f"{stub.url}/public")
+
+    assert not blocked.ok and "robots" in blocked.error
+    assert allowed.ok and allowed.content == b"<html>ok</html>"
+    assert not _times(stub, "/private/page")
+    # robots.txt n'est téléchargé qu'une fois par hôte
+    assert len(_times(stub, "/robots.txt")) == 1
+
+
+def test_missing_robots_allows_everything(stub):
+    stub.routes["/page"] = _page()
+    assert _fetcher().fetch(f"{stub.url}/page").ok
+
+
+def test_unreachable_robots_disallows_host(stub):
+    stub.routes["/robots.txt"] = lambda h, n: (500, {}, b"")
+    stub.routes["/page"] = _page()
+    result = _fetcher().fetch(f"{stub.url}/page")
+    assert not result.ok
+    assert not _times(stub, "/page")
+
+
+def test_robots_can_be_ignored(stub):
+    stub.routes["/robots.txt"] = lambda h, n: (200, {}, b"User-agent: *\nDisallow: /\n")
+    stub.routes["/page"] = _page()
+    assert _fetcher(respect_robots=False).fetch(f"{stub.url}/page").ok
+
+
+def test_429_waits_for_retry_after(stub):
+    stub.routes["/busy"] = lambda h, n: (429, {"Retry-After": "1"}, b"") if n == 0 else _page()(h, n)
+    result = _fetcher().fetch(f"{stub.url}/busy")
+
+    assert result.ok
+    first, second = _times(stub, "/busy")
+    assert second - first >= 0.9
+
+
+def test_429_without_header_backs_off_exponentially(stub):
+    stub.routes["/busy"] = lambda h, n: (429, {}, b"") if n < 2 else _page()(h, n)
+    result = _fetcher(backoff=0.1).fetch(f"{stub.url}/busy")
+
+    assert result.ok
+    times = _times(stub, "/busy")
+    assert len(times) == 3
+    assert times[1] - times[0] >= 0.09
+    assert times[2] - times[1] >= 0.19
+
+
+def test_429_gives_up_after_max_retries(stub):
+    stub.routes["/busy"] = lambda h, n: (429, {"Retry-After": "0"}, b"")
+    result = _fetcher(max_retries=2).fetch(f"{stub.url}/busy")
+    assert result.status == 429 and not result.ok
+    assert len(_times(stub, "/busy")) == 3
+
+
+def test_429_pauses_the_whole_host(stub):
+    stub.routes["/busy"] = lambda h, n: (429, {"Retry-After": "1"}, b"") if n == 0 else _page()(h, n)
+    stub.routes["/other"] = _page()
+    fetcher = _fetcher()
+    fetcher.fetch(f"{stub.url}/robots.txt")
+
+    worker = threading.Thread(target=fetcher.fetch, args=(f"{stub.url}/busy",))
+    worker.start()
+    time.sleep(0.2)
+    fetcher.fetch(f"{stub.url}/other")
+    worker.join()
+
+    # La seconde page attend la fin de la pause demandée par le serveur
+    assert _times(stub, "/other")[0] - _times(stub, "/busy")[0] >= 0.9
+
+
+def test_per_host_rate_limit(stub):
+    pages = {f"p{i}": f"{stub.url}/p{i}" for i in range(5)}
+    for i in range(5):
+        stub.routes[f"/p{i}"] = _page()
+    results = _fetcher(requests_per_second=10.0, burst=1).fetch_all(pages)
+
+    assert all(result.ok for result in results.values())
+    times = sorted(at for path, at, _ in stub.requests if path != "/robots.txt")
+    # Seau d'une place à 10 requêtes/s : au moins 0,1 s entre deux requêtes
+    assert times[-1] - times[0] >= 0.35
+
+
+def test_pages_are_fetched_concurrently(stub):
+    stub.latency = 0.3
+    pages = {f"p{i}": f"{stub.url}/p{i}" for i in range(4)}
+    for i in range(4):
+        stub.routes[f"/p{i}"] = _page()
+    fetcher = _fetcher(per_host_concurrency=4)
+    fetcher.fetch(f"{stub.url}/robots.txt")
+
+    start = time.perf_counter()
+    results = fetcher.fetch_all(pages)
+    elapsed = time.perf_counter() - start
+    assert all(result.ok for result in results.values())
+    # Durée de la page la plus lente (0,3 s), pas la somme des pages (1,2 s)
+    assert elapsed < 0.9
+
+
+def test_conditional_get_serves_unchanged_page_from_cache(stub, tmp_path):
+    def page(headers, n):
+        if headers.get("If-None-Match") == '"v1"':
+            return 304, {}, b""
+        return 200, {"ETag": '"v1"', "Content-Type": "text/html"}, b"<html>v1</html>"
+    stub.routes["/page"] = page
+    fetcher = _fetcher(cache_dir=tmp_path)
+
+    first = fetcher.fetch(f"{stub.url}/page")
+    second = fetcher.fetch(f"{stub.url}/page")
+
+    assert first.ok and not first.from_cache
+    assert second.ok and second.from_cache and second.content == b"<html>v1</html>"
+    assert stub.requests[-1][2].get("If-None-Match") == '"v1"'
@@ -0,0 +1,51 @@
+# tests/test_intent_classifier.py
+import json
+
+import numpy as np
+import pytest
+
+from config.settings import MODEL_CONFIG, RAW_DATA_DIR
+from intent_classifier import IntentClassifier
+
+
+def _questions():
+    """Questions d'origine des données avec leur catégorie"""
+    with open(RAW_DATA_DIR / "ifoad_data.json", encoding='utf-8') as f:
+        data = json.load(f)
+    return [(question, category) for category, pairs in data.items() for question in pairs]
+
+
+def test_route_keeps_most_probable_shards_until_confidence():
+    probabilities = np.array([0.1, 0.5, 0.3, 0.1])
+    np.testing.assert_array_equal(IntentClassifier.route(probabilities, 0.5, 2), [1])
+    np.testing.assert_array_equal(IntentClassifier.route(probabilities, 0.7, 2), [1, 2])
+    # Deux catégories ne couvrent que 0,8 : recherche complète
+    assert IntentClassifier.route(probabilities, 0.9, 2) is None
+
+
+def test_classifier_predicts_training_categories(engine):
+    model = engine.model
+    if model.intent is None:
+        pytest.skip("classifieur d'intention désactivé")
+    questions = _questions()
+    correct = sum(engine._rank(model, model.normalizer(question), 1)[1] == category
+                  for question, category in questions)
+    assert correct / len(questions) >= 0.9
+
+
+def test_shard_search_ranks_like_the_full_index(engine, monkeypatch):
+    model = engine.model
+    if model.intent is None:
+        pytest.skip("classifieur d'intention désactivé")
+    questions = [question for question, _ in _questions()]
+    # Débuts de questions : requêtes moins sûres, souvent hors des fragments prédits
+    questions += [" ".join(question.split()[:3]) for question in questions]
+
+    monkeypatch.setitem(MODEL_CONFIG["intent"], "shard_search", False)
+    full = [engine._rank(model, model.normalizer(question), 5)[0] for question in questions]
+    monkeypatch.setitem(MODEL_CONFIG["intent"], "shard_search", True)
+    routed = [engine._rank(model, model.normalizer(question), 5)[0] for question in questions]
+
+    for expected, actual in zip(full, routed):
+        assert [c["answer"] for c in actual] == [c["answer"] for c in expected]
+        np.testing.assert_allclose([c["score"] for c in actual], [c["score"] for c in expected])
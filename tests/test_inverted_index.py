@@ -0,0 +1,88 @@
+# tests/test_inverted_index.py
+import numpy as np
+import pytest
+from scipy import sparse
+
+from inverted_index import InvertedIndex, search
+
+
+def _corpus(seed: int, n_rows: int = 3000, n_terms: int = 400, density: float = 0.02):
+    """Lignes aléatoires (ligne x terme) et réponses de lignes contiguës"""
+    rng = np.random.default_rng(seed)
+    rows = sparse.random(n_rows, n_terms, density=density, format='csr', random_state=seed)
+    answer_ids = np.sort(rng.integers(0, n_rows // 4, n_rows))
+    return rng, rows, answer_ids
+
+
+def _query(rng, n_terms: int, length: int):
+    terms = np.sort(rng.choice(n_terms, size=length, replace=False))
+    return terms, rng.random(length)
+
+
+def _brute_force(row_blocks, queries, answer_ids, k):
+    """Top-k exhaustif : produit matrice-vecteur puis maximum par réponse"""
+    scores = np.zeros(answer_ids.shape[0])
+    for rows, (terms, weights) in zip(row_blocks, queries):
+        query = np.zeros(rows.shape[1])
+        query[terms] = weights
+        scores += rows @ query
+    best = np.zeros(answer_ids.max() + 1)
+    np.maximum.at(best, answer_ids, scores)
+    answers = np.flatnonzero(best > 0)
+    order = np.lexsort((answers, -best[answers]))[:k]
+    return answers[order], best[answers][order]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("k", [1, 5, 20])
+def test_maxscore_matches_exhaustive_search(seed, k):
+    rng, rows, answer_ids = _corpus(seed)
+    index = InvertedIndex.from_rows(rows)
+    for length in (1, 3, 12, 40):
+        terms, weights = _query(rng, rows.shape[1], length)
+        parts = [(index, terms, weights)]
+
+        pruned = search(parts, answer_ids, k, early_termination=True)
+        exhaustive = search(parts, answer_ids, k, early_termination=False)
+        expected = _brute_force([rows], [(terms, weights)], answer_ids, k)
+
+        np.testing.assert_array_equal(pruned[0], exhaustive[0])
+        np.testing.assert_allclose(pruned[1], exhaustive[1])
+        np.testing.assert_array_equal(pruned[0], expected[0])
+        np.testing.assert_allclose(pruned[1], expected[1])
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_maxscore_matches_exhaustive_search_over_several_parts(seed):
+    rng, words, answer_ids = _corpus(seed)
+    ngrams = sparse.random(words.shape[0], 900, density=0.01, format='csr', random_state=seed + 100)
+    word_index, ngram_index = InvertedIndex.from_rows(words), InvertedIndex.from_rows(ngrams)
+    for _ in range(10):
+        word_query = _query(rng, words.shape[1], 6)
+        ngram_query = _query(rng, ngrams.shape[1], 30)
+        parts = [(word_index, *word_query), (ngram_index, *ngram_query)]
+
+        pruned = search(parts, answer_ids, 5, early_termination=True)
+        expected = _brute_force([words, ngrams], [word_query, ngram_query], answer_ids, 5)
+
+        np.testing.assert_array_equal(pruned[0], expected[0])
+        np.testing.assert_allclose(pruned[1], expected[1])
+
+
+def test_shard_search_matches_filtered_exhaustive_search():
+    rng, rows, answer_ids = _corpus(7)
+    # Trois fragments de lignes contiguës, aux frontières de réponses
+    cuts = [np.searchsorted(answer_ids, answer_ids.max() // 3), np.searchsorted(answer_ids, 2 * answer_ids.max() // 3)]
+    shard_bounds = np.array([0, *cuts, rows.shape[0]])
+    index = InvertedIndex.from_rows(rows, shard_bounds)
+    in_shard = np.zeros(rows.shape[0], dtype=bool)
+    in_shard[shard_bounds[1]:shard_bounds[2]] = True
+
+    for _ in range(10):
+        terms, weights = _query(rng, rows.shape[1], 10)
+        answers, scores = search([(index, terms, weights)], answer_ids, 5, shards=np.array([1]))
+        filtered = sparse.diags(in_shard.astype(float)) @ rows
+        expected = _brute_force([filtered], [(terms, weights)], answer_ids, 5)
+
+        np.testing.assert_array_equal(answers, expected[0])
+        np.testing.assert_allclose(scores, expected[1])
@@ -0,0 +1,45 @@
+# tests/test_model_store.py
+import json
+
+import numpy as np
+
+from chatbot_engine import ChatbotEngine
+from config.settings import RAW_DATA_DIR
+from model_store import TfidfModel, current_version_dir, data_fingerprint
+
+
+def _questions():
+    """Questions d'origine des données"""
+    with open(RAW_DATA_DIR / "ifoad_data.json", encoding='utf-8') as f:
+        data = json.load(f)
+    return [question for pairs in data.values() for question in pairs]
+
+
+def test_loaded_artifact_ranks_like_a_fresh_fit(engine, trained_model):
+    data_path, model_dir = trained_model
+    loaded = TfidfModel.load(model_dir, expected_hash=data_fingerprint(data_path))
+    fitted = TfidfModel.from_path(data_path)
+    assert loaded is not None and loaded.data_hash == fitted.data_hash
+
+    for question in _questions():
+        expected, _ = engine._rank(fitted, fitted.normalizer(question), 5)
+        actual, _ = engine._rank(loaded, loaded.normalizer(question), 5)
+        assert [c["answer"] for c in actual] == [c["answer"] for c in expected]
+        np.testing.assert_allclose([c["score"] for c in actual], [c["score"] for c in expected])
+
+
+def test_load_rejects_missing_or_stale_artifact(trained_model, tmp_path):
+    _, model_dir = trained_model
+    assert TfidfModel.load(tmp_path) is None
+    assert TfidfModel.load(model_dir, expected_hash="0" * 64) is None
+    assert current_version_dir(model_dir) is not None
+
+
+def test_engine_starts_from_artifact_without_fitting(trained_model, monkeypatch):
+    def refit(*args, **kwargs):
+        raise AssertionError("réentraînement au démarrage")
+
+    monkeypatch.setattr(TfidfModel, "from_path", classmethod(refit))
+    engine = ChatbotEngine(*trained_model)
+    assert engine.model.n_rows > 0
+    assert engine.get_response("comment s'inscrire ?")["category"]
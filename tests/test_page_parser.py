@@ -0,0 +1,55 @@
+# tests/test_page_parser.py
+import pytest
+from bs4 import BeautifulSoup
+
+from page_parser import PageIndex
+
+PAGE = b"""<!DOCTYPE html>
+<html>
+<head>
+  <title>IFOAD-UJKZ</title>
+  <style>p { color: red; }</style>
+  <script>var frais = "150 000 FCFA";</script>
+</head>
+<body>
+  <!-- menu de navigation -->
+  <h1>Formations</h1>
+  <p>Licence <b>appliqu\xc3\xa9e</b> en ligne.</p>
+  <template><p>Gabarit non rendu</p></template>
+  <ruby>\xe6\xbc\xa2<rp>(</rp><rt>kan</rt><rp>)</rp></ruby>
+  <ul><li>Dipl\xc3\xb4me</li><li>Pi\xc3\xa8ce d'identit\xc3\xa9</li></ul>
+  <?php echo "instruction"; ?>
+  <noscript>Activez JavaScript</noscript>
+  <script type="application/ld+json">{"@type": "Course"}</script>
+</body>
+</html>
+"""
+
+
+def _available(parser: str) -> bool:
+    try:
+        BeautifulSoup(b"<p></p>", parser)
+    except Exception:
+        return False
+    return True
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+def test_text_matches_get_text(parser):
+    if not _available(parser):
+        pytest.skip(f"{parser} non installé")
+    page = PageIndex.parse(PAGE, parser)
+    assert page.text == BeautifulSoup(PAGE, parser).get_text()
+    assert "150 000 FCFA" not in page.text and "color" not in page.text
+    assert "Licence appliquée en ligne." in page.text
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+def test_tags_match_find_all(parser):
+    if not _available(parser):
+        pytest.skip(f"{parser} non installé")
+    page = PageIndex.parse(PAGE, parser)
+    soup = BeautifulSoup(PAGE, parser)
+    assert page.tags("li") == soup.find_all("li")
+    assert page.tags("h1", "p", "li") == soup.find_all(["h1", "p", "li"])
+    assert page.tags("table") == []
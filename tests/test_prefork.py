@@ -0,0 +1,113 @@
+# tests/test_prefork.py
+import itertools
+import logging
+import os
+import time
+
+import pytest
+
+from config.settings import API_CONFIG
+from prefork import PreforkServer
+
+
+class _Server(PreforkServer):
+    """Superviseur sans fork : les workers sont des pid fictifs"""
+
+    def __init__(self, workers: int):
+        super().__init__(workers=workers)
+        self._pids = itertools.count(1000)
+
+    def _spawn(self, slot: int) -> int:
+        pid = next(self._pids)
+        self.workers[pid] = time.time()
+        self._slots[pid] = slot
+        return pid
+
+    def pid_of(self, slot: int) -> int:
+        return next(pid for pid, s in self._slots.items() if s == slot)
+
+
+@pytest.fixture
+def exits(monkeypatch):
+    """Fins de workers renvoyées par os.waitpid (pid, statut)"""
+    pending = []
+    monkeypatch.setattr(os, "waitpid", lambda pid, options: pending.pop(0) if pending else (0, 0))
+    monkeypatch.setitem(API_CONFIG, "worker_min_uptime", 10)
+    monkeypatch.setitem(API_CONFIG, "worker_backoff", 0.5)
+    monkeypatch.setitem(API_CONFIG, "worker_backoff_max", 30)
+    monkeypatch.setitem(API_CONFIG, "worker_max_failures", 4)
+    return pending
+
+
+def _start(workers: int) -> _Server:
+    server = _Server(workers)
+    for slot in range(workers):
+        server._spawn(slot)
+    return server
+
+
+def _crash(server: _Server, exits, slot: int):
+    exits.append((server.pid_of(slot), 256))
+    server._reap()
+
+
+def test_startup_crashes_back_off_then_give_up(exits, caplog):
+    server = _start(2)
+    delays = []
+    for _ in range(API_CONFIG["worker_max_failures"] - 1):
+        _crash(server, exits, 0)
+        delays.append(server._respawns[0] - time.time())
+        # Pas de relance avant la fin du délai
+        server._respawn_due()
+        assert sorted(server._slots.values()) == [1]
+        server._respawns[0] = 0.0
+        server._respawn_due()
+    assert delays == pytest.approx([0.5, 1.0, 2.0], abs=0.05)
+
+    with caplog.at_level(logging.ERROR, logger="prefork"):
+        _crash(server, exits, 0)
+    assert 0 not in server._respawns and 0 not in server._slots.values()
+    assert "emplacement 0 abandonné" in caplog.text
+    # L'autre emplacement reste en service
+    assert list(server._slots.values()) == [1] and not server._stopping
+
+
+def test_crash_after_long_uptime_is_replaced_immediately(exits):
+    server = _start(1)
+    _crash(server, exits, 0)
+    server._respawns[0] = 0.0
+    server._respawn_due()
+    # Worker en service depuis longtemps : les échecs au démarrage sont oubliés
+    server.workers[server.pid_of(0)] -= 60
+    _crash(server, exits, 0)
+    assert server._failures[0] == 0
+    assert server._respawns[0] <= time.time()
+
+
+def test_server_stops_when_every_slot_is_abandoned(exits, caplog):
+    server = _start(1)
+    with caplog.at_level(logging.ERROR, logger="prefork"):
+        for _ in range(API_CONFIG["worker_max_failures"]):
+            _crash(server, exits, 0)
+            server._respawns.update({slot: 0.0 for slot in server._respawns})
+            server._respawn_due()
+    assert server._stopping
+    assert "Plus aucun worker" in caplog.text
+
+
+def test_rolling_restart_revives_abandoned_slots(exits, monkeypatch):
+    server = _start(2)
+    for _ in range(API_CONFIG["worker_max_failures"]):
+        _crash(server, exits, 0)
+        server._respawns.update({slot: 0.0 for slot in server._respawns})
+        server._respawn_due()
+    assert sorted(server._slots.values()) == [1]
+
+    # Nouvel artefact : l'emplacement abandonné repart sans délai
+    monkeypatch.setattr(server, "_load_model", lambda reload=False: None)
+    monkeypatch.setattr(server, "_stop_worker", lambda pid: (server.workers.pop(pid), server._slots.pop(pid)))
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    server._rolling_restart()
+    server._respawn_due()
+    assert sorted(server._slots.values()) == [0, 1]
+    assert not server._failures
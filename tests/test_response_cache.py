@@ -0,0 +1,91 @@
+# tests/test_response_cache.py
+import json
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+from chatbot_engine import ChatbotEngine
+from data_preprocessor import DataPreprocessor
+from response_cache import ResponseCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_size=2, normalizer=None)
+    cache.put("a", {"answer": "A"})
+    cache.put("b", {"answer": "B"})
+    assert cache.get("a") == {"answer": "A"}
+
+    cache.put("c", {"answer": "C"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"answer": "A"}
+    assert cache.get("c") == {"answer": "C"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_returned_responses_are_copies():
+    cache = ResponseCache(normalizer=None)
+    cache.put("a", {"answer": "A"})
+    cache.get("a")["answer"] = "modifiée"
+    assert cache.get("a") == {"answer": "A"}
+
+
+def test_ttl_expires_entries():
+    cache = ResponseCache(ttl=0.05, normalizer=None)
+    cache.put("a", {"answer": "A"})
+    assert cache.get("a") is not None
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResponseCache(max_size=0, normalizer=None)
+    cache.put("a", {"answer": "A"})
+    assert cache.get("a") is None
+
+
+def test_normalized_questions_share_an_entry():
+    cache = ResponseCache(normalizer=lambda question: " ".join(question.lower().split()))
+    cache.put("Comment  PAYER", {"answer": "A"})
+    assert cache.get("comment payer") == {"answer": "A"}
+
+
+def test_bind_clears_only_on_version_change():
+    cache = ResponseCache(normalizer=None)
+    cache.bind("v1")
+    cache.put("a", {"answer": "A"})
+    cache.bind("v1")
+    assert cache.get("a") is not None
+    cache.bind("v2")
+    assert cache.get("a") is None
+
+
+def _prepare(raw_path, processed_dir, data) -> DataPreprocessor:
+    raw_path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    preprocessor = DataPreprocessor(raw_path, processed_dir)
+    with redirect_stdout(StringIO()):
+        preprocessor.prepare_training_data()
+    return preprocessor
+
+
+def test_engine_cache_is_invalidated_when_artifact_changes(tmp_path):
+    data = {
+        "inscription": {"comment s'inscrire à la formation ?": "En ligne sur le portail.",
+                        "quels documents fournir ?": "Diplôme et pièce d'identité."},
+        "frais": {"combien coûte la formation ?": "150 000 FCFA.",
+                  "comment payer les frais ?": "Par mobile money."}
+    }
+    preprocessor = _prepare(tmp_path / "raw.json", tmp_path / "processed", data)
+    engine = ChatbotEngine(preprocessor.columnar_data_path, tmp_path / "model")
+
+    assert engine.get_response("combien coûte la formation")["answer"] == "150 000 FCFA."
+    assert engine.get_response("combien coûte la formation")["answer"] == "150 000 FCFA."
+    assert engine.cache.stats()["hits"] == 1
+
+    data["frais"]["combien coûte la formation ?"] = "200 000 FCFA."
+    _prepare(tmp_path / "raw.json", tmp_path / "processed", data)
+
+    assert engine.reload()
+    assert engine.cache.stats()["size"] == 0
+    assert engine.get_response("combien coûte la formation")["answer"] == "200 000 FCFA."